@@ -0,0 +1,163 @@
+from src.logic.process import ImgProcess
+from src.utils.bench import (
+    ResourceMonitor,
+    compare,
+    e2e_configs,
+    format_e2e,
+    format_micro,
+    load_report,
+    run_e2e,
+    run_micro,
+    save_report,
+)
+from src.utils.config import load_config
+import argparse
+import json
+import os
+import sys
+
+
+def report_results(report, table, args):
+    print(table)
+    save_report(report, args.output)
+    print(f"Saved {len(report['results'])} results -> {args.output}")
+    if args.compare:
+        regressions = compare(report, load_report(args.compare), args.threshold)
+        for regression in regressions:
+            print(
+                f"Regression {regression['case']}: "
+                f"{regression['before'] * 1000:.2f} ms -> {regression['after'] * 1000:.2f} ms "
+                f"({regression['ratio']:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+def micro(args):
+    report = run_micro(
+        load_config(args.config), args.sizes, args.repeat, args.only, args.seed
+    )
+    report_results(report, format_micro(report), args)
+
+
+def e2e(args):
+    report = run_e2e(
+        args.configs or e2e_configs(),
+        args.map_types,
+        args.workers,
+        args.data,
+        args.work,
+        args.count,
+        args.seed,
+    )
+    report_results(report, format_e2e(report), args)
+
+
+def run(args):
+    config = load_config(args.config)
+    config.update(json.loads(args.overrides))
+    with ResourceMonitor() as monitor:
+        ImgProcess(config).run()
+    print("BENCH " + json.dumps(monitor.usage))
+
+
+def add_compare(command_parser):
+    command_parser.add_argument(
+        "--compare",
+        metavar="REPORT",
+        help="Earlier report, exits with 1 if a case got slower than --threshold",
+    )
+    command_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed slowdown against --compare. Default = 0.1",
+    )
+
+
+parser = argparse.ArgumentParser(
+    prog="Wtp Dataset Destroyer bench",
+    description="Benchmarks of the degradations and of whole runs.",
+)
+commands = parser.add_subparsers(dest="command", required=True)
+micro_parser = commands.add_parser(
+    "micro", help="Throughput of every degradation on synthetic images"
+)
+micro_parser.add_argument(
+    "-f",
+    "--config",
+    default="configs/bench_micro.hcl",
+    help="Config whose degradations give the parameter sets. Default = configs/bench_micro.hcl",
+)
+micro_parser.add_argument(
+    "--sizes",
+    type=int,
+    nargs="+",
+    default=[256, 512, 2048, 4096],
+    help="Image sizes. Default = 256 512 2048 4096",
+)
+micro_parser.add_argument(
+    "--repeat", type=int, default=3, help="Timed runs of every case. Default = 3"
+)
+micro_parser.add_argument(
+    "--only", nargs="+", metavar="TYPE", help="Only benchmark these degradations"
+)
+micro_parser.add_argument(
+    "--seed", type=int, default=0, help="Seed of images and degradations"
+)
+micro_parser.add_argument(
+    "-o", "--output", default="bench_micro.json", help="Default = bench_micro.json"
+)
+add_compare(micro_parser)
+micro_parser.set_defaults(function=micro)
+e2e_parser = commands.add_parser(
+    "e2e", help="Throughput and resources of whole runs on a synthetic dataset"
+)
+e2e_parser.add_argument(
+    "-f",
+    "--configs",
+    nargs="+",
+    help="Configs to run. Default = configs/default.hcl, configs/full.hcl and configs/custom",
+)
+e2e_parser.add_argument(
+    "--map-types",
+    nargs="+",
+    default=["for", "thread", "process", "stream"],
+    help="Default = for thread process stream",
+)
+e2e_parser.add_argument(
+    "--workers",
+    type=int,
+    nargs="+",
+    default=sorted({1, os.cpu_count() or 1}),
+    help="Worker counts of every map type. Default = 1 and the number of CPUs",
+)
+e2e_parser.add_argument(
+    "--count", type=int, default=64, help="Images in the dataset. Default = 64"
+)
+e2e_parser.add_argument(
+    "--seed", type=int, default=0, help="Seed of the dataset and of the runs"
+)
+e2e_parser.add_argument(
+    "--data",
+    default="bench_data",
+    help="Folder of the synthetic dataset, made on the first run. Default = bench_data",
+)
+e2e_parser.add_argument(
+    "--work",
+    default="bench_output",
+    help="Output folder of the runs, cleared by every run. Default = bench_output",
+)
+e2e_parser.add_argument(
+    "-o", "--output", default="bench_e2e.json", help="Default = bench_e2e.json"
+)
+add_compare(e2e_parser)
+e2e_parser.set_defaults(function=e2e)
+run_parser = commands.add_parser(
+    "run", help="Runs one config and prints its resource usage, used by e2e"
+)
+run_parser.add_argument("config")
+run_parser.add_argument("overrides", help="JSON object of config overrides")
+run_parser.set_defaults(function=run)
+args = parser.parse_args()
+args.function(args)
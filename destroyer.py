@@ -1,42 +1,28 @@
 from src.logic.process import ImgProcess
+from src.utils.config import load_config
+from src.utils.manifest import Manifest, merge_manifests
+from src.utils.plan import format_plan
 import argparse
+import os
 import re
-import hcl2
 
 
-def number_fix(string_object):
-    match_re = re.search(r"\$\{(-?\d*\.\d+|-?\d+)\}", string_object)
-    if match_re:
-        number_str = match_re.group(1)
-        if "." in number_str:
-            return float(number_str)
-        else:
-            return int(number_str)
-    return string_object
+def shard_type(string_object):
+    match_re = re.fullmatch(r"(\d+)/(\d+)", string_object)
+    if not match_re:
+        raise argparse.ArgumentTypeError("shard must look like i/N, for example 0/4")
+    shard_index, shard_count = int(match_re.group(1)), int(match_re.group(2))
+    if not 0 <= shard_index < shard_count:
+        raise argparse.ArgumentTypeError("shard index must be in [0, N)")
+    return [shard_index, shard_count]
 
 
-def list_search(no_detect_list):
-    for index in range(len(no_detect_list)):
-        list_object = no_detect_list[index]
-        if isinstance(list_object, str):
-            no_detect_list[index] = number_fix(list_object)
-        elif isinstance(list_object, dict):
-            no_detect_list[index] = fix_hcl_dict(list_object)
-        elif isinstance(list_object, list):
-            no_detect_list[index] = list_search(list_object)
-    return no_detect_list
-
-
-def fix_hcl_dict(dict_hcl):
-    for key in dict_hcl.keys():
-        object = dict_hcl[key]
-        if isinstance(object, str):
-            dict_hcl[key] = number_fix(object)
-        elif isinstance(object, list):
-            dict_hcl[key] = list_search(object)
-        elif isinstance(object, dict):
-            dict_hcl[key] = fix_hcl_dict(object)
-    return dict_hcl
+def merge(manifest_paths, output_path):
+    manifest = merge_manifests([Manifest.load(path) for path in manifest_paths])
+    manifest.save(output_path)
+    print(
+        f"Merged {len(manifest_paths)} manifests, {len(manifest)} items -> {output_path}"
+    )
 
 
 parser = argparse.ArgumentParser(
@@ -49,9 +35,45 @@ parser.add_argument(
     default="configs/default.json",
     help="Path to your config. Default = configs/default.json",
 )
-json_folder = parser.parse_args().folder
-with open(json_folder) as file:
-    config = hcl2.load(file)
-config = fix_hcl_dict(config)
-# ImgProcess(config)
-ImgProcess(config).run()
+parser.add_argument(
+    "--shard",
+    type=shard_type,
+    help="Process only shard i of N, for example 0/4. Needs a seed in the config",
+)
+parser.add_argument(
+    "--merge",
+    nargs="+",
+    metavar="MANIFEST",
+    help="Validate and merge the manifests of all shards instead of running the config",
+)
+parser.add_argument(
+    "--merge-output",
+    help="Path of the merged manifest. Default = manifest.npz next to the first shard manifest",
+)
+parser.add_argument(
+    "--plan",
+    action="store_true",
+    help="Print the choices every degradation would make and an estimated run time, without writing anything",
+)
+parser.add_argument(
+    "--calibrate",
+    type=int,
+    default=4,
+    help="Images degraded for real by --plan to measure the cost of every degradation. Default = 4",
+)
+args = parser.parse_args()
+if args.merge:
+    merge(
+        args.merge,
+        args.merge_output
+        or os.path.join(os.path.dirname(args.merge[0]), "manifest.npz"),
+    )
+else:
+    config = load_config(args.folder)
+    if args.shard:
+        config["shard"] = args.shard
+    if args.plan:
+        print(format_plan(ImgProcess(config, dry_run=True).plan(args.calibrate)))
+    else:
+        # ImgProcess(config)
+        ImgProcess(config).run()
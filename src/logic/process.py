@@ -1,15 +1,60 @@
+import hashlib
+import json
+import multiprocessing
 import os
 
-from tqdm.contrib.concurrent import process_map, thread_map
-from ..process.utils import laplace_filter, lq_hq2grays, color_or_gray, img2gray
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from tqdm.contrib.concurrent import thread_map
+from ..process.utils import (
+    laplace_score,
+    lq_hq2grays,
+    color_or_gray,
+    img2gray,
+    random_windows,
+    scores_mask,
+    tile_mask,
+    tile_scores,
+)
 from pepeline import read, save, ImgColor, ImgFormat
 import numpy as np
-from os import listdir
+from itertools import islice
 from os.path import join
 from tqdm import tqdm
 from ..utils.process import del_all_file
 from ..utils.registry import get_class
+from ..utils.journal import Journal
+from ..utils.decode_cache import DecodeCache
+from ..utils.dedup import (
+    SharedHq,
+    SharedOutput,
+    SourceHq,
+    array_digest,
+    clone_file,
+)
+from ..utils.encode import ImageWriter, encode_png
+from ..utils.image_header import APPEARANCE_CHUNKS, read_png_header, read_size
+from ..utils.discovery import normalize_extensions, reservoir_sample, scan_images
+from ..utils.manifest import Manifest, ManifestStream, TileWindow, WorkItem
+from ..utils.shared import SharedImage
+from ..utils.stream import StagePipeline
+from ..utils.tar_output import TarShardWriter, merge_indexes
+from ..utils.array_output import ArrayStore
+from ..utils.writer import AsyncWriter
+from ..utils import arena, profiler
+from ..utils.quality_index import ImageScores, QualityIndex
+from ..utils.pipeline import DTYPES, FLOAT32, STORED, convert, run_turn
+from ..utils.plan import (
+    CALIBRATION_UNITS,
+    PlanRecorder,
+    planned_turn,
+    stand_in,
+    stand_in_shape,
+)
 import logging
+import threading
+import time
 
 
 class ImgProcess:
@@ -20,16 +65,53 @@ class ImgProcess:
             It should include the following keys:
                 - "input" (str): Path to the input folder containing images.
                 - "output" (str): Path to the output folder where processed images will be saved.
+                - "recursive" (bool, optional): Also read images from subfolders of the input folder.
+                    Defaults to None.
+                - "extensions" (list of str, optional): Only read files with these extensions. Defaults to None.
                 - "tile" (dict, optional): Dictionary containing settings for tile-based processing. Defaults to None.
                 - "gray_or_color" (bool, optional): Flag indicating whether to process images in grayscale or color.
                     Defaults to None.
                 - "gray" (bool, optional): Flag indicating whether to convert images to grayscale. Defaults to None.
+                - "quality_index" (str, optional): Path of an index of per-image scores that later runs use
+                    to skip rejected images without reading them. Defaults to None.
+                - "decode_cache" (dict, optional): Folder and size in MB of a cache of decoded input images
+                    that later runs memory map instead of decoding. Defaults to None.
+                - "profile" (bool | str, optional): Times every degradation, reading and saving, and reports
+                    the times at the end of the run and in profile.json. "memory" also reports the peak
+                    memory every degradation allocates. Defaults to None.
+                - "arena_size" (int, optional): MB of scratch buffers every worker thread keeps to reuse
+                    for temporaries of the degradations. Defaults to 256.
+                - "dtype" (str, optional): "float32", "float16" or "uint8", how images are decoded and kept
+                    between degradations that accept it. Defaults to "float32".
                 - "process" (list of dict): List containing dictionaries specifying the processing techniques to apply.
                 - "num_workers" (int, optional): Number of worker threads to use for parallel processing.
                 Defaults to None.
+                - "seed" (int, optional): Base seed of the run, image index is added to it. Defaults to random.
+                - "manifest" (bool, optional): Save the work manifest to output/manifest.npz. Defaults to None.
+                - "resume" (bool, optional): Keep a journal of completed images in the output folder and skip
+                    them when the run is restarted. Defaults to None.
+                - "resume_override" (bool, optional): Resume from a manifest written with other settings
+                    instead of raising ValueError. Defaults to None.
+                - "shard" (list of int, optional): [shard_index, shard_count], process only the images whose
+                    index modulo shard_count equals shard_index. Requires "seed". Defaults to None.
                 - "map_type" (str, optional): Type of mapping to use for processing images. Can be "process",
-                "thread", or None.
+                "thread", "stream" or None.
                     Defaults to "thread".
+                - "stream" (dict, optional): Worker counts and queue size for the "stream" map type.
+                    Defaults to None.
+                - "schedule" (str, optional): "largest_first" reads the size of every image from its header
+                    and hands out the largest ones first. Defaults to None, the listing order.
+                - "hq_link" (str, optional): Make an HQ that no degradation changed from the input PNG with
+                    a "hardlink", "reflink" or "copy" instead of encoding it. Defaults to None.
+                - "output_type" (str, optional): "folder" saves lq/ and hq/ folders of PNGs, "tar" saves
+                    lq/hq pairs into tar shards in output/shards, "npy" saves equally shaped pairs such as
+                    tiles into memory mapped arrays in output/arrays. Defaults to "folder".
+                - "writer" (dict, optional): Format, PNG compression and thread count of the writer that
+                    encodes the output files. Defaults to None, which saves them with pepeline in the worker.
+                - "tar" (dict, optional): Shard size and writer count for the "tar" output type.
+                    Defaults to None.
+                - "variants" (int, optional): Number of LQ variants with different seeds made from every
+                    image, saved as <name>_<variant>. Defaults to 1.
 
     Attributes:
         input (str): Path to the input folder containing images.
@@ -37,25 +119,55 @@ class ImgProcess:
         tile (dict): Dictionary containing settings for tile-based processing.
         no_wb (bool): Flag indicating whether to exclude white or black tiles during tile-based processing.
         tile_size (int): Size of each tile for tile-based processing.
+        tile_mode (str): "grid" to save every tile, "random" to save tile_crops random crops per image.
         gray_or_color (bool): Flag indicating whether to process images in grayscale or color.
         gray (bool): Flag indicating whether to convert images to grayscale.
-        all_images (list): List of all image filenames in the input folder.
+        seed (int): Base seed of the run.
+        shard (list of int): Index and count of the shard processed by this run, None for a full run.
+        manifest (Manifest or ManifestStream): Index, seed and output name of every image that is left
+            to process. A ManifestStream while the input folder is listed during the run.
+        journal (Journal): Log of completed images, None when resume is disabled.
         turn (list): List of image processing techniques to apply.
+        dtype (numpy.dtype): Dtype images are decoded to.
+        quality_index (QualityIndex): Scores of the input images, None when the run has no index.
+        decode_cache (DecodeCache): Cache of decoded input images, None to always decode them.
         output_lq (str): Path to the folder where low-quality processed images will be saved.
         output_hq (str): Path to the folder where high-quality processed images will be saved.
         map_type (str): Type of mapping to use for processing images.
         num_workers (int): Number of worker threads to use for parallel processing.
+        stream (dict): Settings of the staged read/degradation/write pipeline.
+        schedule (str): "largest_first" or None, the order the images are handed out in.
+        variants (int): Number of LQ variants made from every decoded image.
+        output_type (str): "folder", "tar" or "npy".
+        image_writer (ImageWriter): Encoder of the output files, None to save them with pepeline.
+        async_writer (AsyncWriter): Writer threads that save the results, None to save them in the
+            degradation worker.
+        output_store (str): Folder of the tar shards or arrays.
+        tar (TarShardWriter): Writer of the shards, None unless output_type is "tar".
+        arrays (ArrayStore): Writer of the arrays, None unless output_type is "npy".
+        hq_link (str): How an unchanged HQ is made from the input file: "hardlink", "reflink", "copy",
+            or None to always encode it.
 
     Methods:
-        process(img_fold): Processes an image using the specified image processing techniques.
-        process_tile(img_fold): Processes an image in tiles using the specified image processing techniques.
+        process(item): Processes an image using the specified image processing techniques.
+        process_tile(item): Processes an image in tiles using the specified image processing techniques.
+        process_tile_at(img, item, window): Processes a single tile of a decoded image.
+        run_tiles(): Runs every tile as its own task on a thread or process pool.
+        run_process(): Runs the images on a process pool that builds the pipeline once per worker.
+        run_stream(): Runs reading, degradation and saving as separate pipeline stages.
         run(): Executes the image processing workflow.
     """
 
-    def __init__(self, config: dict):
-        """Initialize the image processor with configuration validation."""
+    def __init__(self, config: dict, worker: bool = False, dry_run: bool = False):
+        """Initialize the image processor with configuration validation.
+
+        A worker only builds the degradation pipeline and skips listing the input
+        folder and preparing the output folder, which the main process already did.
+        A dry run, for plan(), lists the input folder and leaves the output folder untouched.
+        """
 
         # self._validate_config(config)
+        self.config = config
         self.input = config["input"]
         self.output = config["output"]
         self.tile = config.get("tile")
@@ -63,27 +175,72 @@ class ImgProcess:
             # self._validate_tile_config(self.tile)
             self.no_wb = self.tile.get("no_wb")
             self.tile_size = self.tile.get("size", 512)
+            self.tile_mode = self.tile.get("mode", "grid")
+            self.tile_crops = self.tile.get("crops", 1)
+            self.tile_align = self.tile.get("align", 1)
         self.gray_or_color = config.get("gray_or_color")
+        arena.configure(config.get("arena_size", 256))
+        profile = config.get("profile")
+        profiler.configure(
+            self.output if profile else None, worker, memory=profile == "memory"
+        )
+        dtype = config.get("dtype", "float32")
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype {dtype}")
+        self.dtype = DTYPES[dtype]
         self.gray = config.get("gray")
         process = config["degradation"]
         del_out_dir = config.get("out_clear")
-        self.all_images = [
-            file
-            for file in listdir(self.input)
-            if os.path.isfile(os.path.join(self.input, file))
-        ]
-        if config.get("shuffle_dataset"):
-            np.random.shuffle(self.all_images)
-        if config.get("size"):
-            self.all_images = self.all_images[: config.get("size")]
+        self.seed = config.get("seed", np.random.randint(2**30))
+        self.real_name = config.get("real_name")
+        self.resume = config.get("resume")
+        self.shard = config.get("shard")
+        if self.shard:
+            shard_index, shard_count = self.shard
+            if not 0 <= shard_index < shard_count:
+                raise ValueError(f"Invalid shard {shard_index}/{shard_count}")
+            if "seed" not in config:
+                raise ValueError("A sharded run needs a fixed seed")
         self.turn = []
         self.output_lq = join(self.output, "lq")
         self.output_hq = join(self.output, "hq")
         self.map_type = config.get("map_type", "thread")
         self.laplace_filter = config.get("laplace_filter")
         self.num_workers = config.get("num_workers")
+        self.stream = config.get("stream", {})
+        self.schedule = config.get("schedule")
+        if self.schedule not in (None, "largest_first"):
+            raise ValueError(f"Unknown schedule {self.schedule}")
         self.only_lq = config.get("only_lq", False)
-        self.real_name = config.get("real_name")
+        self.variants = config.get("variants", 1)
+        self.hq_link = config.get("hq_link")
+        self.output_type = config.get("output_type", "folder")
+        writer = config.get("writer")
+        self.image_writer = None
+        self.async_writer = None
+        if writer:
+            self.image_writer = ImageWriter(
+                writer.get("format", "png"), writer.get("compression", "fast")
+            )
+            threads = writer.get("threads", 2)
+            if threads:
+                self.async_writer = AsyncWriter(
+                    threads, writer.get("queue_size", threads * 4)
+                )
+        self.output_store = join(
+            self.output, "arrays" if self.output_type == "npy" else "shards"
+        )
+        self.tar = None
+        self.arrays = None
+        if self.output_type == "tar":
+            tar = config.get("tar", {})
+            self.tar = TarShardWriter(
+                self.output_store,
+                tar.get("shard_size", 1024),
+                tar.get("writers", 1),
+            )
+        elif self.output_type == "npy":
+            self.arrays = ArrayStore(self.output_store, self.only_lq)
         debug = config.get("debug")
         if debug:
             if not os.path.exists("debug"):
@@ -99,46 +256,585 @@ class ImgProcess:
             process_type = process_dict["type"]
             self.turn.append(get_class(process_type)(process_dict))
         self.index_process = None
-        if not os.path.exists(self.output_lq):
-            os.makedirs(self.output_lq)
-        if not os.path.exists(self.output_hq) and not self.only_lq:
-            os.makedirs(self.output_hq)
-        if del_out_dir:
-            lq_fold = join(self.output, "lq")
-            lq_folds = os.listdir(lq_fold)
-            del_all_file(lq_fold, lq_folds)
-            if not self.only_lq:
-                hq_fold = join(self.output, "hq")
-                hq_folds = os.listdir(hq_fold)
-                del_all_file(hq_fold, hq_folds)
+        # Decoded images and their scores depend on these settings
+        self.decode_variant = (
+            f"{self.gray}-{self.gray_or_color}-{np.dtype(self.dtype).str}"
+        )
+        quality_index = config.get("quality_index")
+        self.quality_index = (
+            QualityIndex(quality_index, self.decode_variant, part=worker)
+            if quality_index
+            else None
+        )
+        # The cache writes and evicts entries, a dry run decodes every input instead
+        decode_cache = None if dry_run else config.get("decode_cache")
+        self.decode_cache = (
+            DecodeCache(
+                decode_cache.get("folder", "~/.cache/wtp_dataset_destroyer"),
+                decode_cache.get("size", 10240),
+            )
+            if decode_cache
+            else None
+        )
+        # Shards may share an output folder, so each keeps its own manifest and journal
+        suffix = f"_{self.shard[0]}_of_{self.shard[1]}" if self.shard else ""
+        journal_path = join(self.output, f"journal{suffix}.bin")
+        self.journal = Journal(journal_path) if self.resume else None
+        if worker:
+            return
+        if not dry_run:
+            self.__prepare_output(del_out_dir)
+        self.manifest_path = join(self.output, f"manifest{suffix}.npz")
+        self.save_manifest = bool(config.get("manifest") or self.resume or self.shard)
+        if self.resume and os.path.exists(self.manifest_path):
+            self.manifest = Manifest.load(self.manifest_path)
+            self.__check_fingerprint()
+            self.seed = self.manifest.base_seed
+        else:
+            self.manifest = self.__build_manifest(config)
+            if (
+                self.save_manifest
+                and isinstance(self.manifest, Manifest)
+                and not dry_run
+            ):
+                self.manifest.fingerprint = self.__fingerprint()
+                self.manifest.save(self.manifest_path)
+        if self.resume:
+            pending = self.journal.pending_mask(self.manifest.indices)
+            tqdm.write(f"Resuming, {len(pending) - pending.sum()} images already done")
+            self.manifest = self.manifest.select(pending)
+        elif not dry_run:
+            Journal(journal_path).remove()
+        if self.quality_index and isinstance(self.manifest, Manifest):
+            # Rejected images keep their index, so the other images get the same seeds
+            kept = np.array(
+                [not self.__rejected(name) for name in self.manifest.names()],
+                dtype=bool,
+            )
+            if not kept.all():
+                tqdm.write(f"Quality index, skipping {len(kept) - kept.sum()} images")
+                self.manifest = self.manifest.select(kept)
+        if self.schedule and not dry_run:
+            self.__schedule()
+
+    def __fingerprint(self) -> dict:
+        """Returns the settings that decide the names, seeds and content of the results."""
+        tile = self.config.get("tile")
+        degradation = json.dumps(self.config["degradation"], sort_keys=True)
+        fingerprint = {
+            "input": os.path.abspath(self.input),
+            "seed": self.config.get("seed"),
+            "size": self.config.get("size"),
+            "shuffle_dataset": self.config.get("shuffle_dataset"),
+            "recursive": self.config.get("recursive"),
+            "extensions": self.config.get("extensions"),
+            "real_name": self.real_name,
+            "variants": self.variants,
+            # Parallel tiles give the same results
+            "tile": {key: value for key, value in tile.items() if key != "parallel"}
+            if tile
+            else None,
+            "degradation": hashlib.sha256(degradation.encode()).hexdigest(),
+        }
+        # As it is read back from the manifest
+        return json.loads(json.dumps(fingerprint))
+
+    def __check_fingerprint(self) -> None:
+        """Raises ValueError when the manifest to resume was written with other settings.
+
+        resume_override reuses it anyway.
+        """
+        saved = self.manifest.fingerprint
+        if saved is None:
+            tqdm.write(
+                f"{self.manifest_path} has no fingerprint, its settings are not checked"
+            )
+            return
+        current = self.__fingerprint()
+        changed = sorted(
+            key
+            for key in saved.keys() | current.keys()
+            if saved.get(key) != current.get(key)
+        )
+        if not changed:
+            return
+        if not self.config.get("resume_override"):
+            raise ValueError(
+                f"{self.manifest_path} was written by a run with other settings "
+                f"({', '.join(changed)}). Resume with the same config, clear the output "
+                "folder, or set resume_override = true to reuse the manifest"
+            )
+        tqdm.write(f"Resuming with changed settings: {', '.join(changed)}")
+
+    def __prepare_output(self, del_out_dir: bool) -> None:
+        """Creates the output folders, emptying them with out_clear."""
+        if self.output_type != "folder":
+            if not os.path.exists(self.output_store):
+                os.makedirs(self.output_store)
+            if del_out_dir and not self.resume and not self.shard:
+                del_all_file(self.output_store, os.listdir(self.output_store))
+        else:
+            if not os.path.exists(self.output_lq):
+                os.makedirs(self.output_lq)
+            if not os.path.exists(self.output_hq) and not self.only_lq:
+                os.makedirs(self.output_hq)
+            if del_out_dir and not self.resume and not self.shard:
+                lq_fold = join(self.output, "lq")
+                lq_folds = os.listdir(lq_fold)
+                del_all_file(lq_fold, lq_folds)
+                if not self.only_lq:
+                    hq_fold = join(self.output, "hq")
+                    hq_folds = os.listdir(hq_fold)
+                    del_all_file(hq_fold, hq_folds)
+
+    def __build_manifest(self, config: dict) -> Manifest | ManifestStream:
+        """Lists the input folder, streaming the items to the workers when the order allows it."""
+        # Shards on other machines and shuffles from the seed need the same order everywhere
+        all_images = scan_images(
+            self.input,
+            config.get("recursive", False),
+            normalize_extensions(config.get("extensions")),
+            sort=bool(self.shard or config.get("shuffle_dataset")),
+        )
+        size = config.get("size")
+        if config.get("shuffle_dataset"):
+            rng = np.random.default_rng(self.seed)
+            if size:
+                all_images = reservoir_sample(all_images, size, rng)
+            else:
+                all_images = list(all_images)
+            rng.shuffle(all_images)
+        elif size:
+            all_images = islice(all_images, size)
+        # A resumed run needs the whole manifest on disk before the first image is done,
+        # and a scheduled run the size of every image before the first one is handed out
+        if not self.resume and not self.schedule and not isinstance(all_images, list):
+            return ManifestStream(
+                all_images,
+                self.seed,
+                self.real_name,
+                self.shard,
+                self.__rejected if self.quality_index else None,
+            )
+        manifest = Manifest(all_images, self.seed, self.real_name)
+        if self.shard:
+            manifest = manifest.shard(*self.shard)
+        return manifest
+
+    def __schedule(self) -> None:
+        """Orders the manifest by the work of every image, largest first, keeping their index and seed.
+
+        Sizes are read from the image headers. The work of an image is the pixels it decodes to
+        plus the pixels of its results for every stage of the turn. In tile grid mode, images
+        smaller than a tile give no tiles and are dropped without being read.
+        """
+        costs = np.zeros(len(self.manifest))
+        kept = np.ones(len(self.manifest), dtype=bool)
+        for position, item in enumerate(tqdm(self.manifest, desc="Reading sizes")):
+            size = read_size(join(self.input, item.name))
+            if size is None:
+                # An unknown size may be a large image, which is worse to find at the end
+                costs[position] = np.inf
+                continue
+            units = self.__plan_units(item, *size)
+            if not units:
+                kept[position] = False
+                continue
+            result_pixels = sum(height * width for _, height, width in units)
+            costs[position] = size[0] * size[1] + result_pixels * len(self.turn)
+        if not kept.all():
+            tqdm.write(
+                f"Skipping {len(kept) - kept.sum()} images smaller than the tile"
+            )
+        order = np.argsort(-costs[kept], kind="stable")
+        self.manifest = self.manifest.select(kept).reorder(order)
+
+    def __item_count(self) -> int | None:
+        """Returns the number of images, None while the input folder is still being listed."""
+        return len(self.manifest) if isinstance(self.manifest, Manifest) else None
 
     def __img_read(self, img_fold: str) -> np.ndarray:
         input_folder = join(self.input, img_fold)
+        with profiler.timed("read"):
+            if self.decode_cache:
+                return self.decode_cache.get(
+                    input_folder,
+                    self.decode_variant,
+                    partial(self.__img_decode, img_fold, input_folder),
+                )
+            return self.__img_decode(img_fold, input_folder)
+
+    def __img_decode(self, img_fold: str, input_folder: str) -> np.ndarray:
+        # color_or_gray needs float, so only decode to uint8 straight away without it
+        img_format = (
+            ImgFormat.U8
+            if self.dtype == np.uint8 and not self.gray_or_color
+            else ImgFormat.F32
+        )
         if self.gray:
-            img = read(str(input_folder), ImgColor.GRAY, ImgFormat.F32)
+            img = read(str(input_folder), ImgColor.GRAY, img_format)
         else:
-            img = read(str(input_folder), ImgColor.RGB, ImgFormat.F32)
+            img = read(str(input_folder), ImgColor.RGB, img_format)
         if self.gray_or_color:
-            img = color_or_gray(img)
-        return img
+            known = self.__known(img_fold)
+            if known is not None and known.gray != -1:
+                img = img2gray(img) if known.gray else img
+            else:
+                img = color_or_gray(img)
+                if self.quality_index:
+                    self.quality_index.update(
+                        self.input, img_fold, img, gray=int(img.ndim == 2)
+                    )
+        return convert(img, (self.dtype,))
+
+    def __known(self, img_fold: str) -> ImageScores | None:
+        """Returns the scores of an input image from the quality index, None when they are not known."""
+        if self.quality_index:
+            return self.quality_index.lookup(self.input, img_fold)
+        return None
+
+    def __laplace_score(self, item: WorkItem, img: np.ndarray) -> np.float32:
+        known = self.__known(item.name)
+        if known is not None and not np.isnan(known.laplace):
+            return known.laplace
+        score = laplace_score(convert(img, FLOAT32))
+        if self.quality_index:
+            self.quality_index.update(self.input, item.name, img, laplace=score)
+        return score
+
+    def __tile_scores(
+        self, item: WorkItem, img: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        known = self.__known(item.name)
+        if known is not None and known.tile_size == self.tile_size:
+            return known.tile_scores, known.tile_wb
+        scores, solid = tile_scores(convert(img, FLOAT32), self.tile_size)
+        self.quality_index.update(
+            self.input,
+            item.name,
+            img,
+            tile_size=self.tile_size,
+            tile_scores=scores,
+            tile_wb=solid,
+        )
+        return scores, solid
 
-    def __img_save(self, lq: np.ndarray, hq: np.ndarray, output_name: str) -> None:
+    def __rejected(self, img_fold: str) -> bool:
+        """Whether the quality index shows that an image gives no results, without reading it."""
+        known = self.__known(img_fold)
+        if known is None:
+            return False
+        if self.tile:
+            if self.tile_mode != "grid" or known.tile_size != self.tile_size:
+                return False
+            mask = scores_mask(
+                known.tile_scores, known.tile_wb, self.laplace_filter, self.no_wb
+            )
+            return not mask.any()
+        if not self.laplace_filter or np.isnan(known.laplace):
+            return False
+        return bool(known.laplace < self.laplace_filter)
+
+    def __img_save(
+        self, lq: np.ndarray, hq: np.ndarray | SharedHq, output_name: str
+    ) -> None:
+        if isinstance(hq, SourceHq):
+            self.__only_lq_save(lq, output_name)
+            self.__hq_clone(hq, join(self.output_hq, output_name))
+            return
+        if isinstance(hq, SharedHq):
+            self.__only_lq_save(lq, output_name)
+            hq.output.save(
+                partial(self.__hq_save, hq.img), join(self.output_hq, output_name)
+            )
+            return
         if self.gray:
             lq, hq = lq_hq2grays(lq, hq)
 
-        save(lq, join(self.output_lq, output_name))
-        save(hq, join(self.output_hq, output_name))
+        self.__write(lq, join(self.output_lq, output_name))
+        self.__write(hq, join(self.output_hq, output_name))
+
+    def __write(self, img: np.ndarray, path: str) -> None:
+        img = convert(img, STORED)
+        # An earlier run may have hardlinked this output to an input or to another output,
+        # writing into the file in place would change those as well
+        if os.path.lexists(path):
+            os.remove(path)
+        if self.image_writer:
+            self.image_writer.write(img, path)
+        else:
+            save(img, path)
+
+    def __encode(self, img: np.ndarray) -> bytes:
+        img = convert(img, STORED)
+        if self.image_writer:
+            return self.image_writer.encode(img)
+        return encode_png(img)
+
+    def __output_name(self, output_name: str) -> str:
+        """Returns the output name with the extension of the configured format."""
+        if self.image_writer:
+            return os.path.splitext(output_name)[0] + self.image_writer.extension
+        return output_name
+
+    def __hq_save(self, hq: np.ndarray | SourceHq, path: str) -> None:
+        if isinstance(hq, SourceHq):
+            self.__hq_clone(hq, path)
+            return
+        if self.gray:
+            hq = img2gray(hq)
+        self.__write(hq, path)
+
+    def __hq_clone(self, hq: SourceHq, path: str) -> None:
+        try:
+            clone_file(hq.path, path, self.hq_link)
+        except OSError as e:
+            logging.debug("Cloning %s failed, encoding it: %s", hq.path, str(e))
+            self.__hq_save(hq.img, path)
+
+    def __source_hq(
+        self, item: WorkItem, hq: np.ndarray, hq_input: np.ndarray
+    ) -> np.ndarray | SourceHq:
+        """Returns hq as a SourceHq when it is still the decoded input and the input file encodes the same pixels.
+
+        Degradations return a new array when they change hq, so an unchanged hq is the same object.
+        Only 8-bit gray or RGB PNG inputs without transparency or color management chunks qualify,
+        the way save would encode hq.
+        """
+        if not self.hq_link or hq is not hq_input:
+            return hq
+        if os.path.splitext(self.__output_name(item.output_name))[1].lower() != ".png":
+            return hq
+        path = join(self.input, item.name)
+        header = read_png_header(path)
+        if header is None or header.bit_depth != 8:
+            return hq
+        # Transparency or color management of the input would not be in an encoded hq
+        if APPEARANCE_CHUNKS.intersection(header.chunks):
+            return hq
+        color_type = 0 if hq.ndim == 2 or hq.shape[2] == 1 else 2
+        if (header.height, header.width, header.color_type) != (
+            hq.shape[0],
+            hq.shape[1],
+            color_type,
+        ):
+            return hq
+        return SourceHq(hq, path)
 
     def __only_lq_save(self, lq: np.ndarray, output_name: str) -> None:
         if self.gray:
             lq = img2gray(lq)
-        save(lq, join(self.output_lq, output_name))
+        self.__write(lq, join(self.output_lq, output_name))
+
+    def __encode_hq(self, hq: np.ndarray | SourceHq) -> bytes:
+        if isinstance(hq, SourceHq):
+            # The input is a PNG with the same pixels, store it as it is
+            with open(hq.path, "rb") as file:
+                return file.read()
+        if self.gray:
+            hq = img2gray(hq)
+        return self.__encode(hq)
+
+    def __tar_save(
+        self, lq: np.ndarray, hq: np.ndarray | SourceHq | SharedHq, output_name: str
+    ) -> None:
+        if self.gray:
+            lq = img2gray(lq)
+        key, extension = os.path.splitext(output_name)
+        members = {f"lq{extension}": self.__encode(lq)}
+        if not self.only_lq:
+            if isinstance(hq, SharedHq):
+                hq_data = hq.output.encode(partial(self.__encode_hq, hq.img))
+            else:
+                hq_data = self.__encode_hq(hq)
+            members[f"hq{extension}"] = hq_data
+        future = self.tar.write(key, members)
+        # A journaled image has to be in its shard before it is marked as done
+        if self.journal:
+            future.result()
+
+    def __array_save(
+        self, lq: np.ndarray, hq: np.ndarray | SourceHq | SharedHq, output_name: str
+    ) -> None:
+        if isinstance(hq, SharedHq):
+            hq = hq.img
+        if isinstance(hq, SourceHq):
+            hq = hq.img
+        lq = convert(lq, STORED)
+        if not self.only_lq:
+            hq = convert(hq, STORED)
+        if self.gray:
+            lq = img2gray(lq)
+            hq = None if self.only_lq else img2gray(hq)
+        self.arrays.write(output_name, lq, hq)
+
+    def __save(self, lq: np.ndarray, hq: np.ndarray, output_name: str) -> Future | None:
+        """Saves a result, on the writer threads when the writer is asynchronous.
+
+        Returns:
+            Future: Future of the save when it runs on the writer threads, otherwise None.
+        """
+        output_name = self.__output_name(output_name)
+        if self.async_writer:
+            return self.async_writer.submit(self.__save_now, lq, hq, output_name)
+        self.__save_now(lq, hq, output_name)
+        return None
+
+    def __wait_saved(self, futures: list) -> None:
+        """Waits until the results of an image are saved before it goes into the journal."""
+        if self.journal:
+            for future in futures:
+                if future is not None:
+                    future.result()
+
+    def __save_now(self, lq: np.ndarray, hq: np.ndarray, output_name: str) -> None:
+        with profiler.timed("save"):
+            self.__store(lq, hq, output_name)
+
+    def __store(self, lq: np.ndarray, hq: np.ndarray, output_name: str) -> None:
+        if self.tar:
+            self.__tar_save(lq, hq, output_name)
+            return
+        if self.arrays:
+            self.__array_save(lq, hq, output_name)
+            return
+        # Images from subfolders keep their relative path with real_name
+        subfolder = os.path.dirname(output_name)
+        if subfolder:
+            os.makedirs(join(self.output_lq, subfolder), exist_ok=True)
+            if not self.only_lq:
+                os.makedirs(join(self.output_hq, subfolder), exist_ok=True)
+        if self.only_lq:
+            self.__only_lq_save(lq, output_name)
+        else:
+            self.__img_save(lq, hq, output_name)
+
+    def __degrade(self, item: WorkItem, img: np.ndarray):
+        """Yields the (lq, hq, output_name) result for a decoded image."""
+        # Laplace filter check
+        # With a quality index every score is stored, so later runs can use any threshold
+        if self.laplace_filter or self.quality_index:
+            score = self.__laplace_score(item, img)
+            if self.laplace_filter and score < self.laplace_filter:
+                logging.debug(f"Skipping {item.name} due to laplace filter")
+                return
+
+        if self.variants > 1:
+            yield from self.__degrade_variants(item, img)
+            return
+
+        # Setup processing
+        rng = np.random.default_rng(item.seed)
+
+        lq, hq = img, img.copy()
+        hq_input = hq
+
+        output_name = item.output_name
+        logging.debug(
+            "_______________________________\n\nProcessing image - Real name: %s, Output name: %s",
+            item.name,
+            output_name,
+        )
 
-    def process(self, img_fold: str) -> None:
+        # Process through pipeline with validation
+        lq, hq = run_turn(self.turn, lq, hq, rng)
+        yield lq, self.__source_hq(item, hq, hq_input), output_name
+
+    def __degrade_variants(self, item: WorkItem, img: np.ndarray):
+        """Yields the (lq, hq, output_name) result of every variant of a decoded image.
+
+        Variant 0 uses the seed of the image, so it matches a run without variants. Variants
+        with the same HQ share one HQ file, which is written once and hardlinked.
+        """
+        stem, extension = os.path.splitext(item.output_name)
+        outputs = {}
+        for variant in range(self.variants):
+            rng = np.random.default_rng(
+                item.seed if variant == 0 else [item.seed, variant]
+            )
+            # Degradations may write into lq, so only the last variant gets the decoded image
+            lq = img if variant == self.variants - 1 else img.copy()
+            hq = hq_input = img.copy()
+            output_name = f"{stem}_{variant}{extension}"
+            logging.debug(
+                "_______________________________\n\nProcessing image - Real name: %s, Output name: %s",
+                item.name,
+                output_name,
+            )
+            lq, hq = run_turn(self.turn, lq, hq, rng)
+            if not self.only_lq:
+                output = outputs.setdefault(array_digest(hq), SharedOutput())
+                hq = SharedHq(self.__source_hq(item, hq, hq_input), output)
+            yield lq, hq, output_name
+
+    def __tile_windows(self, item: WorkItem, img: np.ndarray) -> list[TileWindow]:
+        """Returns every tile of an image that passes the filters."""
+        h, w = img.shape[:2]
+        if self.tile_mode == "random":
+            # Images smaller than the tile give a single crop of what fits
+            height, width = min(h, self.tile_size), min(w, self.tile_size)
+            count = self.tile_crops if (height, width) == (self.tile_size,) * 2 else 1
+            xs, ys = random_windows(
+                convert(img, FLOAT32),
+                height,
+                width,
+                count,
+                np.random.default_rng(item.seed),
+                self.tile_align,
+                self.laplace_filter,
+                self.no_wb,
+            )
+            return [
+                TileWindow((k,), int(x), int(y), height, width)
+                for k, (x, y) in enumerate(zip(xs, ys))
+            ]
+        if self.quality_index:
+            scores, solid = self.__tile_scores(item, img)
+            mask = scores_mask(scores, solid, self.laplace_filter, self.no_wb)
+        else:
+            mask = tile_mask(
+                convert(img, FLOAT32), self.tile_size, self.laplace_filter, self.no_wb
+            )
+        return [
+            TileWindow(
+                (int(Kx), int(Ky)),
+                int(Kx) * self.tile_size,
+                int(Ky) * self.tile_size,
+                self.tile_size,
+                self.tile_size,
+            )
+            for Kx, Ky in np.argwhere(mask)
+        ]
+
+    def __degrade_tile_at(self, item: WorkItem, img: np.ndarray, window: TileWindow):
+        """Returns the (lq, hq, output_name) result of one tile accepted by __tile_windows."""
+        img_tile = img[
+            window.x : window.x + window.height, window.y : window.y + window.width
+        ]
+        # Some degradations write into lq, random crops of one image may overlap
+        lq, hq = img_tile.copy(), img_tile.copy()
+
+        output_name = window.output_name(item)
+        # Seeded by the tile key, so the result does not depend on which worker runs it
+        rng = np.random.default_rng(window.seed(item))
+        logging.debug(
+            "_______________________________\n\nProcessing image - Real name: %s, Output name: %s",
+            item.name,
+            output_name,
+        )
+        lq, hq = run_turn(self.turn, lq, hq, rng)
+        return lq, hq, output_name
+
+    def __degrade_tile(self, item: WorkItem, img: np.ndarray):
+        """Yields the (lq, hq, output_name) result for every accepted tile of a decoded image."""
+        for window in self.__tile_windows(item, img):
+            yield self.__degrade_tile_at(item, img, window)
+
+    def process(self, item: WorkItem) -> None:
         """Processes an image using the specified image processing techniques.
 
         Args:
-            img_fold (str): Filename of the image to process.
+            item (WorkItem): Manifest entry of the image to process.
 
         Raises:
             IOError: If image reading or writing fails
@@ -147,95 +843,428 @@ class ImgProcess:
         """
         try:
             # Image reading with validation
-            img = self.__img_read(img_fold)
-            # Laplace filter check
-            if self.laplace_filter and laplace_filter(img, self.laplace_filter):
-                logging.debug(f"Skipping {img_fold} due to laplace filter")
-                return
+            img = self.__img_read(item.name)
+            saved = [
+                self.__save(lq, hq, output_name)
+                for lq, hq, output_name in self.__degrade(item, img)
+            ]
+            self.__wait_saved(saved)
+            if self.journal:
+                self.journal.append(item.index)
+        except Exception as e:
+            logging.error("Processing failed for %s: %s", item.name, str(e))
 
-            # Setup processing
-            index = self.all_images.index(img_fold)
-            seed = np.random.randint(2**30) + index
-            np.random.seed(seed)
+    def process_tile(self, item: WorkItem) -> None:
+        """Processes an image in tiles using the specified image processing techniques."""
+        try:
+            img = self.__img_read(item.name)
+            saved = [
+                self.__save(lq, hq, output_name)
+                for lq, hq, output_name in self.__degrade_tile(item, img)
+            ]
+            self.__wait_saved(saved)
+            if self.journal:
+                self.journal.append(item.index)
+        except Exception as e:
+            logging.error("Processing failed for %s: %s", item.name, str(e))
 
-            lq, hq = img, img.copy()
+    def process_tile_at(
+        self, img: np.ndarray, item: WorkItem, window: TileWindow
+    ) -> bool:
+        """Processes one tile of a decoded image.
 
-            # Output name generation
-            output_name = img_fold if self.real_name else f"{index}.png"
-            logging.debug(
-                "_______________________________\n\nProcessing image - Real name: %s, Output name: %s",
-                img_fold,
-                output_name,
+        Args:
+            img (numpy.ndarray): Decoded image.
+            item (WorkItem): Manifest entry of the image.
+            window (TileWindow): Position of the tile.
+
+        Returns:
+            bool: False if processing failed.
+        """
+        try:
+            self.__wait_saved([self.__save(*self.__degrade_tile_at(item, img, window))])
+            return True
+        except Exception as e:
+            logging.error(
+                "Processing failed for %s tile %s: %s",
+                item.name,
+                window.output_name(item),
+                str(e),
             )
+            return False
 
-            # Process through pipeline with validation
-            for loss in self.turn:
-                lq, hq = loss.run(lq, hq)
-            if self.only_lq:
-                self.__only_lq_save(lq, output_name)
-            else:
-                self.__img_save(lq, hq, output_name)
+    def __tile_finish(
+        self, item: WorkItem, memory: SharedMemory | None, ok: bool
+    ) -> None:
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+        if self.journal and ok:
+            self.journal.append(item.index)
+        self.tile_pbar.update(1)
+
+    def __tile_done(
+        self, item: WorkItem, memory: SharedMemory | None, pending: list, future: Future
+    ) -> None:
+        self.tile_slots.release()
+        ok = future.exception() is None and future.result()
+        with self.tile_lock:
+            pending[0] -= 1
+            pending[1] = pending[1] and ok
+            done = pending[0] == 0
+        if done:
+            self.__tile_finish(item, memory, pending[1])
+
+    def run_tiles(self) -> None:
+        """Runs every tile as its own task, so the tiles of one large image spread over all workers.
+
+        Images are decoded once in the main thread. In process mode the decoded image is copied
+        into shared memory once and the workers slice their tiles from it.
+        """
+        num_workers = self.num_workers or os.cpu_count()
+        shared = self.map_type == "process"
+        if shared:
+            executor = ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_init_worker,
+                initargs=(self.config, self.arena_stats),
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=num_workers)
+        # Bounds the queued tiles, and with them the decoded images held in memory
+        self.tile_slots = threading.Semaphore(num_workers * 4)
+        self.tile_lock = threading.Lock()
+        self.tile_pbar = tqdm(total=self.__item_count())
+        with executor:
+            for item in self.manifest:
+                try:
+                    img = self.__img_read(item.name)
+                    windows = self.__tile_windows(item, img)
+                except Exception as e:
+                    logging.error("Processing failed for %s: %s", item.name, str(e))
+                    self.tile_pbar.update(1)
+                    continue
+                if not windows:
+                    self.__tile_finish(item, None, True)
+                    continue
+                memory = None
+                if shared:
+                    img, memory = SharedImage.create(img)
+                # Countdown of unfinished tiles and whether all of them succeeded
+                pending = [len(windows), True]
+                for window in windows:
+                    self.tile_slots.acquire()
+                    if shared:
+                        future = executor.submit(
+                            _process_shared_tile, img, item, window
+                        )
+                    else:
+                        future = executor.submit(
+                            self.process_tile_at, img, item, window
+                        )
+                    future.add_done_callback(
+                        partial(self.__tile_done, item, memory, pending)
+                    )
+        self.tile_pbar.close()
+
+    def __stream_read(self, item: WorkItem) -> list:
+        try:
+            return [(item, self.__img_read(item.name))]
         except Exception as e:
-            logging.error("Processing failed for %s: %s", img_fold, str(e))
+            logging.error("Reading failed for %s: %s", item.name, str(e))
 
-    def process_tile(self, img_fold: str) -> None:
-        """Processes an image in tiles using the specified image processing techniques."""
+    def __stream_degrade(self, decoded: tuple) -> list:
+        item, img = decoded
+        degrade = self.__degrade_tile if self.tile else self.__degrade
+        # Results before a failure are saved, as the other map types save them
+        results = []
+        ok = True
         try:
-            img = self.__img_read(img_fold)
-            h, w = img.shape[:2]
-            index = self.all_images.index(img_fold)
-            seed = np.random.randint(2**30) + index
-            np.random.seed(seed)
-            if h < self.tile_size or w < self.tile_size:
-                return
-            for Kx, Ky in np.ndindex(h // self.tile_size, w // self.tile_size):
-                img_tile = img[
-                    self.tile_size * Kx : self.tile_size * (Kx + 1),
-                    self.tile_size * Ky : self.tile_size * (Ky + 1),
-                ]
-                if self.laplace_filter:
-                    if laplace_filter(img_tile, self.laplace_filter):
-                        continue
-                elif self.no_wb:
-                    mean = np.mean(img_tile)
-                    if mean == 0.0 or mean == 1.0:
-                        continue
-
-                lq, hq = img_tile, img_tile.copy()
-
-                output_name = f"{str(index)}_{Kx}_{Ky}.png"
-                seed = np.random.randint(2**30) + Kx + Ky
-                np.random.seed(seed)
-                logging.debug(
-                    "_______________________________\n\nProcessing image - Real name: %s, Output name: %s",
-                    img_fold,
-                    output_name,
-                )
-                for loss in self.turn:
-                    lq, hq = loss.run(lq, hq)
-                if self.only_lq:
-                    self.__only_lq_save(lq, output_name)
-                else:
-                    self.__img_save(lq, hq, output_name)
+            for result in degrade(item, img):
+                results.append(result)
+        except Exception as e:
+            logging.error("Processing failed for %s: %s", item.name, str(e))
+            ok = False
+        if self.journal and ok and not results:
+            self.journal.append(item.index)
+        # Shared countdown of unsaved results and whether the item is complete when it reaches zero
+        pending = [len(results), ok]
+        return [(item, pending, *result) for result in results]
 
+    def __stream_save(self, result: tuple) -> None:
+        item, pending, lq, hq, output_name = result
+        try:
+            self.__wait_saved([self.__save(lq, hq, output_name)])
         except Exception as e:
-            logging.error("Processing failed for %s: %s", img_fold, str(e))
+            logging.error("Saving failed for %s: %s", output_name, str(e))
+            return
+        if self.journal:
+            with self.stream_lock:
+                pending[0] -= 1
+                done = pending[0] == 0
+            if done and pending[1]:
+                self.journal.append(item.index)
+
+    def run_stream(self) -> None:
+        """Runs reading, degradation and saving as separate thread pools connected by bounded queues."""
+        self.stream_lock = threading.Lock()
+        degradation_workers = self.stream.get(
+            "degradation_workers", self.num_workers or os.cpu_count()
+        )
+        pipeline = StagePipeline(
+            [
+                ("read", self.__stream_read, self.stream.get("read_workers", 2)),
+                ("degradation", self.__stream_degrade, degradation_workers),
+                ("write", self.__stream_save, self.stream.get("write_workers", 2)),
+            ],
+            self.stream.get("queue_size", degradation_workers * 2),
+        )
+        pipeline.run(self.manifest, self.__item_count())
+
+    def run_process(self) -> None:
+        """Runs the images on a process pool whose workers build the pipeline once."""
+        num_workers = self.num_workers or os.cpu_count()
+        total = self.__item_count()
+        # At least 8 chunks per worker keeps the tail of the run balanced
+        chunksize = max(1, min(64, (total or 0) // (num_workers * 8)))
+        if self.schedule:
+            # A chunk of the largest images would run on a single worker
+            chunksize = 1
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(self.config, self.arena_stats),
+        ) as executor:
+            results = executor.map(_process_worker, self.manifest, chunksize=chunksize)
+            for _ in tqdm(results, total=total):
+                pass
+
+    def __plan_units(self, item: WorkItem, height: int, width: int) -> list:
+        """Returns (seed, height, width) of every result a height x width input gives, as the run seeds them.
+
+        Every grid tile is planned, which tiles the filters reject is only known from the pixels.
+        """
+        if self.tile:
+            size = self.tile_size
+            if self.tile_mode == "random":
+                height, width = min(height, size), min(width, size)
+                count = self.tile_crops if (height, width) == (size, size) else 1
+                return [([item.seed, k], height, width) for k in range(count)]
+            return [
+                ([item.seed, Kx, Ky], size, size)
+                for Kx in range(height // size)
+                for Ky in range(width // size)
+            ]
+        if self.variants > 1:
+            return [
+                (item.seed if variant == 0 else [item.seed, variant], height, width)
+                for variant in range(self.variants)
+            ]
+        return [(item.seed, height, width)]
+
+    def __plan_channels(self, item: WorkItem) -> int:
+        if self.gray:
+            return 1
+        known = self.__known(item.name) if self.gray_or_color else None
+        if known is not None and known.gray != -1:
+            return 1 if known.gray else 3
+        return 3
+
+    def __calibrate(self, items: list, recorder: PlanRecorder) -> tuple:
+        """Decodes items and degrades their results for real, without saving them, to measure the cost of every stage.
+
+        The filters are not applied, so the cost is known even when they reject the first inputs.
+        At most CALIBRATION_UNITS results of every input are degraded.
+
+        Returns:
+            tuple: Seconds per megapixel of reading an input and of encoding a result, None when
+                nothing was read or encoded.
+        """
+        turn = planned_turn(
+            [get_class(d["type"])(d) for d in self.config["degradation"]], recorder
+        )
+        recorder.calibrating = True
+        read = [0.0, 0.0]
+        encode = [0.0, 0.0]
+        for item in tqdm(items, desc="Calibration"):
+            start = time.perf_counter()
+            try:
+                img = self.__img_read(item.name)
+            except Exception as e:
+                logging.error("Reading failed for %s: %s", item.name, str(e))
+                continue
+            read[0] += time.perf_counter() - start
+            read[1] += img.shape[0] * img.shape[1] / 1e6
+            units = self.__plan_units(item, *img.shape[:2])
+            for seed, height, width in units[:CALIBRATION_UNITS]:
+                crop = img[:height, :width]
+                rng = recorder.generator(np.random.default_rng(seed))
+                try:
+                    lq, hq = run_turn(turn, crop.copy(), crop.copy(), rng)
+                except Exception as e:
+                    logging.error("Degradation failed for %s: %s", item.name, str(e))
+                    continue
+                start = time.perf_counter()
+                self.__encode(lq)
+                if not self.only_lq:
+                    self.__encode(hq)
+                encode[0] += time.perf_counter() - start
+                encode[1] += height * width / 1e6
+        return (
+            read[0] / read[1] if read[1] else None,
+            encode[0] / encode[1] if encode[1] else None,
+        )
+
+    def plan(self, calibration: int = 4) -> dict:
+        """Samples the probability gates and choices of every stage for every input with the seeds of the run.
+
+        No input is decoded: the size of every input comes from its header, and the stages run
+        on a small stand-in image of the same aspect ratio and channels. Choices are those of the
+        run up to the first stage that draws random numbers per pixel, like noise, after which
+        they follow the same distribution. Then the first calibration inputs are degraded for real,
+        without saving, to measure the seconds per megapixel of every stage, which gives the estimate.
+
+        Args:
+            calibration (int, optional): Inputs of the calibration run. Defaults to 4.
+
+        Returns:
+            dict: The stages with how often they were reached and applied, their choices and
+                estimated seconds, and the estimated time of the run.
+        """
+        items = list(self.manifest)
+        recorder = PlanRecorder()
+        turn = planned_turn(
+            [get_class(d["type"])(d) for d in self.config["degradation"]], recorder
+        )
+        counts = {"items": 0, "units": 0, "megapixels": 0.0, "unreadable": 0}
+        input_megapixels = 0.0
+        # Stages log errors the small stand-in image can cause
+        logging.disable(logging.CRITICAL)
+        try:
+            for item in tqdm(items, desc="Plan"):
+                size = read_size(join(self.input, item.name))
+                if size is None:
+                    counts["unreadable"] += 1
+                    continue
+                counts["items"] += 1
+                input_megapixels += size[0] * size[1] / 1e6
+                channels = self.__plan_channels(item)
+                for seed, height, width in self.__plan_units(item, *size):
+                    shape = stand_in_shape(height, width, channels)
+                    img = convert(stand_in(shape), (self.dtype,))
+                    recorder.scale = height * width / (shape[0] * shape[1])
+                    counts["units"] += 1
+                    counts["megapixels"] += height * width / 1e6
+                    rng = recorder.generator(np.random.default_rng(seed))
+                    run_turn(turn, img, img.copy(), rng)
+        finally:
+            logging.disable(logging.NOTSET)
+        calibrated = PlanRecorder()
+        read_cost, encode_cost = self.__calibrate(items[:calibration], calibrated)
+        stages = {}
+        uncalibrated = []
+        for path, record in recorder.stages.items():
+            measured = calibrated.stages.get(path)
+            cost = measured.cost() if measured else None
+            operator = any(key.startswith(path + "/") for key in recorder.stages)
+            if cost is None and record.applied and not operator:
+                uncalibrated.append(path)
+            stages[path] = {
+                "runs": record.runs,
+                "applied": record.applied,
+                "errors": record.errors,
+                "choices": {
+                    options: dict(values) for options, values in record.choices.items()
+                },
+                "cost": cost,
+                "seconds": record.megapixels * cost if cost is not None else None,
+            }
+        read = read_cost * input_megapixels if read_cost is not None else None
+        save = encode_cost * counts["megapixels"] if encode_cost is not None else None
+        cpu_seconds = (
+            sum(stage["seconds"] or 0 for stage in stages.values())
+            + (read or 0)
+            + (save or 0)
+        )
+        workers = 1 if self.map_type == "for" else self.num_workers or os.cpu_count()
+        return {
+            **counts,
+            "stages": stages,
+            "read": read,
+            "save": save,
+            "uncalibrated": uncalibrated,
+            "cpu_seconds": cpu_seconds,
+            "wall_seconds": cpu_seconds / workers,
+            "workers": workers,
+        }
 
     def run(self):
         """Executes the image processing workflow."""
 
         process = self.process_tile if self.tile else self.process
+        start = time.perf_counter()
+        # In shared memory, so the workers of a process pool count into the same totals
+        self.arena_stats = multiprocessing.Array("q", 3)
+        arena.share_stats(self.arena_stats)
         try:
-            if self.map_type == "process":
-                process_map(
-                    process, self.all_images, max_workers=self.num_workers, chunksize=1
-                )
+            if (
+                self.tile
+                and self.tile.get("parallel")
+                and self.map_type in ("process", "thread")
+            ):
+                self.run_tiles()
+            elif self.map_type == "process":
+                self.run_process()
             elif self.map_type == "thread":
-                thread_map(process, self.all_images, max_workers=self.num_workers)
+                thread_map(
+                    process,
+                    self.manifest,
+                    max_workers=self.num_workers,
+                    total=self.__item_count(),
+                )
+            elif self.map_type == "stream":
+                self.run_stream()
             else:
-                for img in tqdm(self.all_images):
-                    process(img)
+                for item in tqdm(self.manifest):
+                    process(item)
+            if isinstance(self.manifest, ManifestStream):
+                self.manifest = self.manifest.manifest()
+                if self.save_manifest:
+                    self.manifest.fingerprint = self.__fingerprint()
+                    self.manifest.save(self.manifest_path)
+            if self.async_writer:
+                self.async_writer.close()
+            arena.report()
+            profiler.report(time.perf_counter() - start)
+            if self.quality_index:
+                self.quality_index.save()
+            if self.tar:
+                self.tar.close()
+                merge_indexes(self.output_store, join(self.output, "index.tsv"))
+            if self.arrays:
+                self.arrays.close()
 
         except Exception as e:
             logging.error(f"Processing failed: {str(e)}")
             raise
+
+
+_worker = None
+
+
+def _init_worker(config: dict, arena_stats) -> None:
+    """Builds the image processor of a process pool worker."""
+    global _worker
+    arena.share_stats(arena_stats)
+    _worker = ImgProcess(config, worker=True)
+
+
+def _process_worker(item: WorkItem) -> None:
+    if _worker.tile:
+        _worker.process_tile(item)
+    else:
+        _worker.process(item)
+
+
+def _process_shared_tile(img: SharedImage, item: WorkItem, window: TileWindow) -> bool:
+    return img.apply(_worker.process_tile_at, item, window)
@@ -1,4 +1,3 @@
-from numpy import random
 import numpy as np
 
 from .custom_blur.rkernel_blur import random_kernel_blur
@@ -28,6 +27,10 @@ class Blur:
 
     def __init__(self, blur_dict: dict):
         self.filter = blur_dict["filter"]
+        # Median blur works on uint8, every other filter on float
+        self.dtypes = (
+            (np.float32, np.uint8) if set(self.filter) == {"median"} else (np.float32,)
+        )
         kernel = blur_dict.get("kernel", [0, 1])
 
         # motion
@@ -65,8 +68,8 @@ class Blur:
             kernel_size += 1
         return kernel_size
 
-    def __gauss(self, lq: np.ndarray) -> np.ndarray:
-        sigma = safe_uniform(self.kernels["gauss"])
+    def __gauss(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        sigma = safe_uniform(self.kernels["gauss"], rng)
         if sigma <= 0.0:
             return lq
         logging.debug(f"Blur - type: gauss kernel: {sigma:.4f}")
@@ -74,52 +77,55 @@ class Blur:
             lq, (0, 0), sigmaX=sigma, sigmaY=sigma, borderType=cv.BORDER_REFLECT
         )
 
-    def __box(self, lq: np.ndarray) -> np.ndarray:
-        kernel = safe_uniform(self.kernels["box"])
+    def __box(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        kernel = safe_uniform(self.kernels["box"], rng)
         if kernel <= 0.0:
             return lq
         logging.debug(f"Blur - type: box kernel: {kernel:.4f}")
         return box_blur(lq, kernel)
 
-    def __lens(self, lq: np.ndarray) -> np.ndarray:
-        kernel = safe_uniform(self.kernels["lens"])
+    def __lens(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        kernel = safe_uniform(self.kernels["lens"], rng)
         if kernel <= 0.0:
             return lq
         logging.debug(f"Blur - type: lens kernel: {kernel:.4f}")
         return lens_blur(lq, kernel)
 
-    def __motion(self, lq: np.ndarray) -> np.ndarray:
-        size = safe_randint(self.size)
+    def __motion(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        size = safe_randint(self.size, rng)
         if size <= 0:
             return lq
-        angle = safe_randint(self.angle)
+        angle = safe_randint(self.angle, rng)
         logging.debug(f"Blur - type: motion size: {size} angle: {angle}")
         return motion_blur(lq, size, angle)
 
-    def __random(self, lq: np.ndarray) -> np.ndarray:
-        kernel = safe_uniform(self.kernels["random"])
+    def __random(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        kernel = safe_uniform(self.kernels["random"], rng)
         if kernel <= 0.0:
             return lq
         logging.debug(f"Blur - type: lens kernel: {kernel:.4f}")
-        return random_kernel_blur(lq, kernel)
+        return random_kernel_blur(lq, kernel, rng)
 
-    def __median(self, lq: np.ndarray) -> np.ndarray:
+    def __median(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
         kernel_list = self.kernels["median"]
-        kernel = safe_randint(kernel_list)
+        kernel = safe_randint(kernel_list, rng)
         if kernel == 0:
             return lq
         kernel = self.__kernel_odd(kernel)
         logging.debug(f"Blur - type: lens kernel: {kernel:.4f}")
-        return (
-            cv.medianBlur((lq * 255).astype(np.uint8), kernel).astype(np.float32) / 255
-        )
+        if lq.dtype != np.uint8:
+            lq = (lq * 255).astype(np.uint8)
+        return cv.medianBlur(lq, kernel)
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Applies blur effects to the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the image with applied blur effects and the corresponding high-quality image.
@@ -134,10 +140,10 @@ class Blur:
                 "random": self.__random,
             }
 
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
-            blur_method = random.choice(self.filter)
-            lq = BLUR_MAP[blur_method](lq)
+            blur_method = rng.choice(self.filter)
+            lq = BLUR_MAP[blur_method](lq, rng)
 
             return lq, hq
         except Exception as e:
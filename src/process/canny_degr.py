@@ -1,5 +1,6 @@
 from .utils import probability
 import numpy as np
+from ..utils.arena import scratch
 from ..utils.registry import register_class
 from ..utils.random import safe_arange
 import logging
@@ -23,8 +24,12 @@ class Canny:
                 - "white" (float, optional): Probability of replacing detected edges with a white background. Defaults to 0.0.
                 - "probability" (float, optional): Probability of applying the Canny edge detection. Defaults to 1.0.
                 - "lq_hq" (bool, optional): If True, use the processed low-quality image as the high-quality image. Defaults to False.
+
+    uint8 images keep their dtype, only the gray image for edge detection is made from float.
     """
 
+    dtypes = (np.float32, np.uint8)
+
     def __init__(self, canny_loss_dict: dict):
         thread1_list = canny_loss_dict.get("thread1", [10, 10, 1])
         self.thread1_list = safe_arange(thread1_list)
@@ -43,45 +48,63 @@ class Canny:
         dilated_image = cv2.dilate(1-img, kernel.astype(np.uint8)).clip(0,1)
         return 1-dilated_image
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def __edges(
+        self, lq: np.ndarray, thread1: int, thread2: int, aperture_size: int
+    ) -> np.ndarray:
+        """Returns a uint8 mask that is 0 on the edges of a float image and 1 elsewhere."""
+        if lq.ndim == 3:
+            gray = cv2.cvtColor(lq, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = lq
+        return (
+            1
+            - cv2.Canny(
+                (gray * 255).astype(np.uint8),
+                thread1,
+                thread2,
+                apertureSize=aperture_size,
+                L2gradient=True,
+            )
+            // 255
+        )
+
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """
         Applies the Canny edge detection algorithm to the low-quality image, with optional white background replacement.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the processed low-quality image and the corresponding high-quality image.
         """
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
-            thread1 = np.random.choice(self.thread1_list)
-            thread2 = thread1 + np.random.choice(self.thread2_list)
-            aperture_size = np.random.choice(self.aperture_size)
-            if lq.ndim == 3:
-                gray = cv2.cvtColor(lq, cv2.COLOR_RGB2GRAY)
+            thread1 = rng.choice(self.thread1_list)
+            thread2 = thread1 + rng.choice(self.thread2_list)
+            aperture_size = rng.choice(self.aperture_size)
+            # Edges are found on the float gray image, so they do not depend on the dtype of lq
+            if lq.dtype == np.uint8:
+                with scratch(lq.shape, np.float32) as lq_float:
+                    np.divide(lq, np.float32(255), out=lq_float)
+                    lq_masc = self.__edges(lq_float, thread1, thread2, aperture_size)
             else:
-                gray = lq
-            lq_masc = (
-                1
-                - cv2.Canny(
-                    (gray * 255).astype(np.uint8),
-                    thread1,
-                    thread2,
-                    apertureSize=aperture_size,
-                    L2gradient=True,
-                )
-                // 255
-            )
+                lq_masc = self.__edges(lq, thread1, thread2, aperture_size)
             if self.scale:
                 lq_masc = self.black_scale(
-                    lq_masc, np.random.choice(safe_arange(self.scale))
+                    lq_masc, rng.choice(safe_arange(self.scale))
                 )
-            white = not probability(self.white)
+            white = not probability(self.white, rng)
+            if lq.dtype == np.uint8:
+                white = np.uint8(255 * white)
             if lq.ndim == 3:
-                lq = np.where(cv2.cvtColor(lq_masc, cv2.COLOR_GRAY2RGB), lq, white)
+                # The mask broadcasts over the channels, no RGB copy of it is needed
+                lq = np.where(lq_masc[..., None], lq, white)
             else:
                 lq = np.where(lq_masc, lq, white)
             logging.debug(
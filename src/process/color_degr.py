@@ -29,26 +29,29 @@ class Color:
         self.gamma = color_loss_dict.get("gamma", [1.0, 1.0])
         self.probability = color_loss_dict.get("probability", 1.0)
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Changes levels to the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the noisy low-quality image and the corresponding high-quality image.
         """
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
             in_low = 0
             in_high = 255
-            high_output = safe_randint(self.high_list)
-            low_output = safe_randint(self.low_list)
+            high_output = safe_randint(self.high_list, rng)
+            low_output = safe_randint(self.low_list, rng)
             if low_output > high_output:
                 high_output = low_output + 10
-            gamma = safe_uniform(self.gamma)
+            gamma = safe_uniform(self.gamma, rng)
             lq = fast_color_level(
                 lq,
                 in_low=in_low,
@@ -1,7 +1,6 @@
 import subprocess
 
 import numpy as np
-from numpy import random
 import cv2 as cv
 from .utils import probability
 
@@ -24,8 +23,12 @@ class Compress:
                     Defaults to None.
                 - "probability" (float, optional): Probability of applying compression. Defaults to 1.0.
                 - "jpeg_sampling" (list of str, optional): List of JPEG subsampling factors. Defaults to ["4:2:2"].
+
+    Codecs work on uint8, so uint8 images are compressed without conversion and the result is uint8.
     """
 
+    dtypes = (np.float32, np.uint8)
+
     def __init__(self, compress_dict: dict):
         self.algorithm = compress_dict["algorithm"]
         compress = compress_dict.get("compress", [90, 100])
@@ -55,10 +58,15 @@ class Compress:
             }
 
     def __video_core(
-        self, lq: np.ndarray, codec: str, output_args: list, container: str = "mpeg"
+        self,
+        lq: np.ndarray,
+        codec: str,
+        output_args: list,
+        rng: np.random.Generator,
+        container: str = "mpeg",
     ) -> np.ndarray:
         height, width, channel = lq.shape
-        sampling = VIDEO_SUBSAMPLING[random.choice(self.video_sampling)]
+        sampling = VIDEO_SUBSAMPLING[rng.choice(self.video_sampling)]
         process1 = subprocess.Popen(
             [
                 "ffmpeg",
@@ -127,40 +135,49 @@ class Compress:
         logging.debug(f"Blur - {codec} subsampling: {sampling}")
         return frame_data
 
-    def __h264(self, lq: np.ndarray, quality: int) -> np.ndarray:
+    def __h264(
+        self, lq: np.ndarray, quality: int, rng: np.random.Generator
+    ) -> np.ndarray:
         """Compresses an image using H.264 codec.
 
         Args:
             lq (numpy.ndarray): The input image in RGB format.
             quality (int): The quality level for compression.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             numpy.ndarray: The compressed image.
         """
         output_args = ["-crf", str(quality)]
-        output_img = self.__video_core(lq, "h264", output_args)
+        output_img = self.__video_core(lq, "h264", output_args, rng)
         return output_img
 
-    def __hevc(self, lq: np.ndarray, quality: int) -> np.ndarray:
+    def __hevc(
+        self, lq: np.ndarray, quality: int, rng: np.random.Generator
+    ) -> np.ndarray:
         """Compresses an image using HEVC codec.
 
         Args:
             lq (numpy.ndarray): The input image in RGB format.
             quality (int): The quality level for compression.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             numpy.ndarray: The compressed image, or the original if an error occurs.
         """
         output_args = ["-crf", str(quality), "-x265-params", "log-level=0"]
 
-        return self.__video_core(lq, "hevc", output_args)
+        return self.__video_core(lq, "hevc", output_args, rng)
 
-    def __mpeg2(self, lq: np.ndarray, quality: int) -> np.ndarray:
+    def __mpeg2(
+        self, lq: np.ndarray, quality: int, rng: np.random.Generator
+    ) -> np.ndarray:
         """Compresses an image using MPEG-2 codec.
 
         Args:
             lq (numpy.ndarray): The input image in RGB format.
             quality (int): The quality level for compression.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             numpy.ndarray: The compressed image.
@@ -173,14 +190,17 @@ class Compress:
             "-qmin",
             str(quality),
         ]
-        output_img = self.__video_core(lq, "mpeg2video", output_args)
+        output_img = self.__video_core(lq, "mpeg2video", output_args, rng)
         return output_img
-    def __mpeg4(self, lq: np.ndarray, quality: int) -> np.ndarray:
+    def __mpeg4(
+        self, lq: np.ndarray, quality: int, rng: np.random.Generator
+    ) -> np.ndarray:
         """Compresses an image using MPEG-2 codec.
 
         Args:
             lq (numpy.ndarray): The input image in RGB format.
             quality (int): The quality level for compression.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             numpy.ndarray: The compressed image.
@@ -193,33 +213,39 @@ class Compress:
             "-qmin",
             str(quality),
         ]
-        output_img = self.__video_core(lq, "mpeg4", output_args)
+        output_img = self.__video_core(lq, "mpeg4", output_args, rng)
         return output_img
-    def __vp9(self, lq: np.ndarray, quality: int) -> np.ndarray:
+    def __vp9(
+        self, lq: np.ndarray, quality: int, rng: np.random.Generator
+    ) -> np.ndarray:
         """Compresses an image using VP9 codec.
 
         Args:
             lq (numpy.ndarray): The input image in RGB format.
             quality (int): The quality level for compression.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             numpy.ndarray: The compressed image.
         """
         output_args = ["-crf", str(quality), "-b:v", "0"]
-        output_img = self.__video_core(lq, "libvpx-vp9", output_args, "webm")
+        output_img = self.__video_core(lq, "libvpx-vp9", output_args, rng, "webm")
         return output_img
 
-    def __jpeg(self, lq: np.ndarray, quality: int) -> np.ndarray:
+    def __jpeg(
+        self, lq: np.ndarray, quality: int, rng: np.random.Generator
+    ) -> np.ndarray:
         """Compresses an image using JPEG format.
 
         Args:
             lq (numpy.ndarray): The input image in RGB format.
             quality (int): The quality level for compression.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             numpy.ndarray: The compressed image.
         """
-        jpeg_sampling = random.choice(self.jpeg_sampling)
+        jpeg_sampling = rng.choice(self.jpeg_sampling)
         encode_param = [
             int(cv.IMWRITE_JPEG_QUALITY),
             quality,
@@ -230,12 +256,15 @@ class Compress:
         _, encimg = cv.imencode(".jpg", lq, encode_param)
         return cv.imdecode(encimg, 1).copy()
 
-    def __webp(self, lq: np.ndarray, quality: int) -> np.ndarray:
+    def __webp(
+        self, lq: np.ndarray, quality: int, rng: np.random.Generator
+    ) -> np.ndarray:
         """Compresses an image using WebP format.
 
         Args:
             lq (numpy.ndarray): The input image in RGB format.
             quality (int): The quality level for compression.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             numpy.ndarray: The compressed image.
@@ -244,12 +273,15 @@ class Compress:
         _, encimg = cv.imencode(".webp", lq, encode_param)
         return cv.imdecode(encimg, 1).copy()
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Compresses the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the compressed low-quality image
@@ -265,25 +297,26 @@ class Compress:
             "vp9": self.__vp9,
         }
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
             gray = False
-            if lq.ndim == 3 and lq.shape[2] == 3:
+            if lq.dtype != np.uint8:
                 lq = (lq * 255.0).astype(np.uint8)
+            if lq.ndim == 3 and lq.shape[2] == 3:
                 lq = cv.cvtColor(lq, cv.COLOR_RGB2BGR)
             else:
-                lq = cv.cvtColor((lq * 255.0).astype(np.uint8), cv.COLOR_GRAY2BGR)
+                lq = cv.cvtColor(lq, cv.COLOR_GRAY2BGR)
                 gray = True
 
-            algorithm = random.choice(self.algorithm)
-            random_comp = safe_randint(self.target_compress[algorithm])
+            algorithm = rng.choice(self.algorithm)
+            random_comp = safe_randint(self.target_compress[algorithm], rng)
             logging.debug(f"Compress - algorithm: {algorithm} compress: {random_comp}")
-            lq = COMPRESS_TYPE_MAP[algorithm](lq, random_comp)
+            lq = COMPRESS_TYPE_MAP[algorithm](lq, random_comp, rng)
 
             if gray:
                 lq = cv.cvtColor(lq, cv.COLOR_BGR2GRAY)
             else:
                 lq = cv.cvtColor(lq, cv.COLOR_BGR2RGB)
-            return lq.astype(np.float32) / 255.0, hq
+            return lq, hq
         except Exception as e:
             logging.error(f"Compress error: {e}")
@@ -8,7 +8,6 @@ from chainner_ext import (
 )
 from ..constants import DITHERING_MAP
 from .utils import probability
-from numpy import random
 from ..utils.registry import register_class
 from ..utils.random import safe_uniform, safe_randint
 import logging
@@ -41,45 +40,60 @@ class Dithering:
         self.history = dithering_dict.get("history", [10, 15])
         self.ratio = dithering_dict.get("ratio", [0.1, 0.9])
         self.probability = dithering_dict.get("probability", 1.0)
-        self.dithering_type = "Burkes"
-        self.unif_quantiz = 8
 
-    def __error(self, lq: np.ndarray, quantization: UQ) -> np.ndarray:
-        logging.debug(
-            f"Dithering - type: {self.dithering_type} quantization {self.unif_quantiz}"
-        )
+    @staticmethod
+    def __error(
+        lq: np.ndarray, dithering_type: str, unif_quantiz: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        logging.debug(f"Dithering - type: {dithering_type} quantization {unif_quantiz}")
         return error_diffusion_dither(
-            lq, quantization, DITHERING_MAP[self.dithering_type]
+            lq, UQ(unif_quantiz), DITHERING_MAP[dithering_type]
         )
 
-    def __quantize(self, lq: np.ndarray, quantization: UQ) -> np.ndarray:
-        logging.debug(
-            f"Dithering - type: {self.dithering_type} quantization {self.unif_quantiz}"
-        )
-        return quantize(lq, quantization)
+    @staticmethod
+    def __quantize(
+        lq: np.ndarray, dithering_type: str, unif_quantiz: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        logging.debug(f"Dithering - type: {dithering_type} quantization {unif_quantiz}")
+        return quantize(lq, UQ(unif_quantiz))
 
-    def __order(self, lq: np.ndarray, quantization: UQ) -> np.ndarray:
-        map_size = random.choice(self.map_size)
+    def __order(
+        self,
+        lq: np.ndarray,
+        dithering_type: str,
+        unif_quantiz: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        map_size = rng.choice(self.map_size)
         logging.debug(
-            f"Dithering - type: {self.dithering_type} map_size: {map_size} quantization {self.unif_quantiz}"
+            f"Dithering - type: {dithering_type} map_size: {map_size} quantization {unif_quantiz}"
         )
-        return ordered_dither(lq, quantization, map_size)
+        return ordered_dither(lq, UQ(unif_quantiz), map_size)
 
-    def __riemersma(self, lq: np.ndarray, quantization: UQ) -> np.ndarray:
-        history = safe_randint(self.history)
-        decay_ratio = safe_uniform(self.ratio)
+    def __riemersma(
+        self,
+        lq: np.ndarray,
+        dithering_type: str,
+        unif_quantiz: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        history = safe_randint(self.history, rng)
+        decay_ratio = safe_uniform(self.ratio, rng)
         logging.debug(
-            f"Dithering - type: {self.dithering_type} history: {history} decay_ratio: {decay_ratio:.4f} "
-            f"quantization {self.unif_quantiz}"
+            f"Dithering - type: {dithering_type} history: {history} decay_ratio: {decay_ratio:.4f} "
+            f"quantization {unif_quantiz}"
         )
-        return riemersma_dither(lq, quantization, history, decay_ratio)
+        return riemersma_dither(lq, UQ(unif_quantiz), history, decay_ratio)
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Applies the selected dithering algorithm to the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the dithered low-quality image and the corresponding high-quality image.
@@ -98,11 +112,13 @@ class Dithering:
             "quantize": self.__quantize,
         }
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
-            self.dithering_type = random.choice(self.dithering_type_list)
-            self.unif_quantiz = safe_randint(self.quantize)
-            lq = DITHERING_TYPE_MAP[self.dithering_type](lq, UQ(self.unif_quantiz))
+            dithering_type = rng.choice(self.dithering_type_list)
+            unif_quantiz = safe_randint(self.quantize, rng)
+            lq = DITHERING_TYPE_MAP[dithering_type](
+                lq, dithering_type, unif_quantiz, rng
+            )
             return np.squeeze(lq), hq
         except Exception as e:
             logging.error(f"Dithering error: {e}")
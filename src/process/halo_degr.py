@@ -2,6 +2,7 @@ import numpy as np
 from chainner_ext import binary_threshold
 import cv2 as cv
 from .utils import probability
+from ..utils.arena import scratch
 from ..utils.random import safe_uniform
 from ..utils.registry import register_class
 import logging
@@ -33,104 +34,129 @@ class Halo:
         self.threshold = [threshold[0] / 255, threshold[1] / 255]
         self.type = halo_loss_dict.get("type_halo", ["unsharp_mask"])
 
-    def __unsharp_gray(self, lq: np.ndarray) -> np.ndarray:
+    def __unsharp_gray(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
         rgb = False
         if lq.ndim == 3:
             lq_gray = cv.cvtColor(lq, cv.COLOR_RGB2GRAY)
             rgb = True
         else:
             lq_gray = lq
-        sigma = safe_uniform(self.kernel)
-        amount = safe_uniform(self.amount)
-        threshold = safe_uniform(self.threshold)
+        sigma = safe_uniform(self.kernel, rng)
+        amount = safe_uniform(self.amount, rng)
+        threshold = safe_uniform(self.threshold, rng)
         logging.debug(
             f"Halo: type: unsharp_gray amount: {amount:.4f} kernel: {sigma:.4f}  threshold: {threshold:.4f}"
         )
-        blurred = cv.GaussianBlur(
-            lq_gray, (0, 0), sigmaX=sigma, sigmaY=sigma, borderType=cv.BORDER_REFLECT
-        )
-        diff = lq_gray - blurred
-        if threshold == 0:
-            diff = np.maximum(0, np.sign(diff) * np.abs(diff)) * amount
-        else:
-            diff = (
-                np.maximum(0, np.sign(diff) * np.maximum(0, np.abs(diff) - threshold))
-                * amount
+        with (
+            scratch(lq_gray.shape, lq_gray.dtype) as blurred,
+            scratch(lq_gray.shape, lq_gray.dtype) as diff,
+        ):
+            cv.GaussianBlur(
+                lq_gray,
+                (0, 0),
+                dst=blurred,
+                sigmaX=sigma,
+                sigmaY=sigma,
+                borderType=cv.BORDER_REFLECT,
             )
+            np.subtract(lq_gray, blurred, out=diff)
+            # Only the positive part of the difference above the threshold is added
+            if threshold != 0:
+                np.subtract(diff, threshold, out=diff)
+            np.maximum(diff, 0, out=diff)
+            diff *= amount
 
-        if rgb:
-            lq[..., 0] = lq[..., 0] + diff
-            lq[..., 1] = lq[..., 1] + diff
-            lq[..., 2] = lq[..., 2] + diff
-        else:
-            lq = lq + diff
+            if rgb:
+                for channel in range(3):
+                    np.add(lq[..., channel], diff, out=lq[..., channel])
+            else:
+                lq = lq + diff
         return np.clip(lq, 0, 1)
 
-    def __unsharp_mask(self, lq: np.ndarray) -> np.ndarray:
-        sigma = safe_uniform(self.kernel)
-        amount = safe_uniform(self.amount)
-        threshold = safe_uniform(self.threshold)
+    def __unsharp_mask(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        sigma = safe_uniform(self.kernel, rng)
+        amount = safe_uniform(self.amount, rng)
+        threshold = safe_uniform(self.threshold, rng)
         logging.debug(
             f"Halo: type: unsharp_mask amount: {amount:.4f} kernel: {sigma:.4f}  threshold: {threshold:.4f}"
         )
-        blurred = cv.GaussianBlur(
-            lq, (0, 0), sigmaX=sigma, sigmaY=sigma, borderType=cv.BORDER_REFLECT
-        )
-        if threshold == 0:
-            lq = cv.addWeighted(lq, amount + 1, blurred, -amount, 0)
-        else:
-            diff = lq - blurred
-            diff = np.sign(diff) * np.maximum(0, np.abs(diff) - threshold)
-            lq = lq + diff * amount
+        with scratch(lq.shape, lq.dtype) as blurred:
+            cv.GaussianBlur(
+                lq,
+                (0, 0),
+                dst=blurred,
+                sigmaX=sigma,
+                sigmaY=sigma,
+                borderType=cv.BORDER_REFLECT,
+            )
+            if threshold == 0:
+                lq = cv.addWeighted(lq, amount + 1, blurred, -amount, 0)
+            else:
+                diff = lq - blurred
+                diff = np.sign(diff) * np.maximum(0, np.abs(diff) - threshold)
+                lq = lq + diff * amount
 
         return lq
 
-    def __unsharp_halo(self, lq):
+    def __unsharp_halo(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
         rgb = False
         if lq.ndim == 3:
             lq_gray = cv.cvtColor(lq, cv.COLOR_RGB2GRAY)
             rgb = True
         else:
             lq_gray = lq
-        sigma = safe_uniform(self.kernel)
-        amount = safe_uniform(self.amount)
+        sigma = safe_uniform(self.kernel, rng)
+        amount = safe_uniform(self.amount, rng)
         logging.debug(
             f"Halo: type: unsharp_halo amount: {amount:.4f} kernel: {sigma:.4f} "
         )
-        blurred = cv.GaussianBlur(
-            lq_gray, (0, 0), sigmaX=sigma, sigmaY=sigma, borderType=cv.BORDER_REFLECT
-        )
-        diff = lq_gray - blurred
-        diff = np.maximum(0, np.sign(diff) * np.abs(diff))
-        diff = binary_threshold(diff * amount, 254 / 255, False).squeeze()
+        with (
+            scratch(lq_gray.shape, lq_gray.dtype) as blurred,
+            scratch(lq_gray.shape, lq_gray.dtype) as diff,
+        ):
+            cv.GaussianBlur(
+                lq_gray,
+                (0, 0),
+                dst=blurred,
+                sigmaX=sigma,
+                sigmaY=sigma,
+                borderType=cv.BORDER_REFLECT,
+            )
+            np.subtract(lq_gray, blurred, out=diff)
+            np.maximum(diff, 0, out=diff)
+            diff *= amount
+            halo = binary_threshold(diff, 254 / 255, False).squeeze()
         if rgb:
-            lq[..., 0] = np.minimum(1, lq[..., 0] + diff)
-            lq[..., 1] = np.minimum(1, lq[..., 1] + diff)
-            lq[..., 2] = np.minimum(1, lq[..., 2] + diff)
+            for channel in range(3):
+                np.add(lq[..., channel], halo, out=lq[..., channel])
+                np.minimum(lq[..., channel], 1, out=lq[..., channel])
         else:
-            lq = np.minimum(1, lq + diff)
+            lq = np.minimum(1, lq + halo)
         return lq
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Applies the selected halo loss reduction technique to the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the halo loss reduced low-quality image and the corresponding high-quality image.
         """
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
-            type_halo = np.random.choice(self.type)
+            type_halo = rng.choice(self.type)
             if type_halo == "unsharp_mask":
-                lq = self.__unsharp_mask(lq)
+                lq = self.__unsharp_mask(lq, rng)
             elif type_halo == "unsharp_gray":
-                lq = self.__unsharp_gray(lq)
+                lq = self.__unsharp_gray(lq, rng)
             else:
-                lq = self.__unsharp_halo(lq)
+                lq = self.__unsharp_halo(lq, rng)
 
             return lq, hq
         except Exception as e:
@@ -1,11 +1,15 @@
 import numpy as np
 
 from src.process.utils import probability
+from src.utils.pipeline import run_turn
 from src.utils.registry import register_class, get_class
 
 
 @register_class("and")
 class AndOperator:
+    # The images go to the degradations of both turns, which convert them as they need
+    dtypes = None
+
     def __init__(self, and_dict: dict):
         one_process = and_dict["one_degradation"]
         two_process = and_dict["two_degradation"]
@@ -20,18 +24,21 @@ class AndOperator:
             process_type = process_dict["type"]
             self.turn_two.append(get_class(process_type)(process_dict))
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
-        if not probability(self.probability_one):
-            for loss in self.turn_one:
-                lq, hq = loss.run(lq, hq)
-            if not probability(self.probability_two):
-                for loss in self.turn_two:
-                    lq, hq = loss.run(lq, hq)
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
+        if not probability(self.probability_one, rng):
+            lq, hq = run_turn(self.turn_one, lq, hq, rng)
+            if not probability(self.probability_two, rng):
+                lq, hq = run_turn(self.turn_two, lq, hq, rng)
         return lq, hq
 
 
 @register_class("or")
 class OrOperator:
+    # The images go to the degradations of both turns, which convert them as they need
+    dtypes = None
+
     def __init__(self, or_dict: dict):
         one_process = or_dict["one_degradation"]
         two_process = or_dict["two_degradation"]
@@ -46,12 +53,12 @@ class OrOperator:
             process_type = process_dict["type"]
             self.turn_two.append(get_class(process_type)(process_dict))
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
-        if probability(self.probability_one):
-            if not probability(self.probability_two):
-                for loss in self.turn_two:
-                    lq, hq = loss.run(lq, hq)
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
+        if probability(self.probability_one, rng):
+            if not probability(self.probability_two, rng):
+                lq, hq = run_turn(self.turn_two, lq, hq, rng)
             return lq, hq
-        for loss in self.turn_one:
-            lq, hq = loss.run(lq, hq)
+        lq, hq = run_turn(self.turn_one, lq, hq, rng)
         return lq, hq
@@ -53,7 +53,6 @@ class Noise:
         self.lqhq = noise_dict.get("lqhq", False)
         self.y_noise = noise_dict.get("y_noise", 0)
         self.uv_noise = noise_dict.get("uv_noise", 0)
-        self.noise_type = "perlin"
 
         # procedural_noises
         self.normalize_noise = noise_dict.get("normalize")
@@ -75,7 +74,6 @@ class Noise:
         if self.noise_clip:
             self.black_clip = self.noise_clip[0]
             self.white_clip = self.noise_clip[1]
-        self.scale_cof = 1.0
         motion = noise_dict.get("motion")
         self.motion_probability = 0.0
         if motion:
@@ -90,36 +88,39 @@ class Noise:
         self.percentage_salt_or_pepper = noise_dict.get(
             "probability_salt_or_pepper", [0, 0.5]
         )
-        self.default_debug = "Noise - color_type: gray"
 
-    def motion(self, noise):
-        noise = motion_blur(noise, safe_randint(self.size), safe_randint(self.angle))
-        sigma = safe_uniform(self.sigma)
-        amount = safe_uniform(self.amount)
+    def motion(self, noise: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        noise = motion_blur(
+            noise, safe_randint(self.size, rng), safe_randint(self.angle, rng)
+        )
+        sigma = safe_uniform(self.sigma, rng)
+        amount = safe_uniform(self.amount, rng)
         blurred = cv.GaussianBlur(
             noise, (0, 0), sigmaX=sigma, sigmaY=sigma, borderType=cv.BORDER_REFLECT
         )
 
         return cv.addWeighted(noise, amount + 1, blurred, -amount, 0)
 
-    def noise_scale(self, noise: np.ndarray) -> np.ndarray:
+    def noise_scale(
+        self, noise: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, float):
         shape = noise.shape
-        self.scale_cof = safe_uniform(self.scale_size)
+        scale_cof = safe_uniform(self.scale_size, rng)
         noise = normalize(
             resize(
                 noise.astype(np.float32) * 0.5 + 0.5,
-                (int(shape[1] * self.scale_cof), int(shape[0] * self.scale_cof)),
+                (int(shape[1] * scale_cof), int(shape[0] * scale_cof)),
                 ResizeFilter.Lanczos,
                 False,
             ).squeeze()[: shape[0], : shape[1]]
         )
-        sigma = safe_uniform(self.scale_sigma)
-        amount = safe_uniform(self.scale_amount)
+        sigma = safe_uniform(self.scale_sigma, rng)
+        amount = safe_uniform(self.scale_amount, rng)
         blurred = cv.GaussianBlur(
             noise, (0, 0), sigmaX=sigma, sigmaY=sigma, borderType=cv.BORDER_REFLECT
         )
 
-        return cv.addWeighted(noise, amount + 1, blurred, -amount, 0)
+        return cv.addWeighted(noise, amount + 1, blurred, -amount, 0), scale_cof
 
     def __noise_clip(self, noise: np.ndarray, img: np.ndarray) -> np.ndarray:
         black_noise_mask = img > self.black_clip
@@ -127,33 +128,35 @@ class Noise:
         noise_mask = black_noise_mask & white_noise_mask
         return np.where(noise_mask, noise, 0)
 
-    def __procedural_noises(self, lq: np.ndarray) -> np.ndarray:
-        octaves = np.random.choice(self.octaves_rand)
-        frequency = np.random.choice(self.frequency_rand)
-        lacunarity = np.random.choice(self.lacunarity_rand)
+    def __procedural_noises(
+        self, lq: np.ndarray, noise_type: str, debug: str, rng: np.random.Generator
+    ) -> np.ndarray:
+        octaves = rng.choice(self.octaves_rand)
+        frequency = rng.choice(self.frequency_rand)
+        lacunarity = rng.choice(self.lacunarity_rand)
         noise = noise_generate(
             lq.shape,
-            NOISE_MAP[self.noise_type],
+            NOISE_MAP[noise_type],
             octaves,
             frequency,
             lacunarity,
-            None,
+            int(rng.integers(2**32)),
         )
         if self.normalize_noise:
             noise = normalize(noise)
-        if not probability(self.motion_probability):
-            noise = self.motion(noise)
+        if not probability(self.motion_probability, rng):
+            noise = self.motion(noise, rng)
         bias = 0
         if self.bias != [0, 0]:
-            bias = safe_uniform(self.bias)
+            bias = safe_uniform(self.bias, rng)
             noise += bias
             noise.clip(-1, 1)
-        alpha = np.random.choice(self.alpha_rand)
+        alpha = rng.choice(self.alpha_rand)
         noise *= alpha
         logging.debug(
             "%s noise_type: %s alpha: %.4f bias: %.4f octaves: %s frequency: %.4f lacunarity: %.4f",
-            self.default_debug,
-            self.noise_type,
+            debug,
+            noise_type,
             alpha,
             bias,
             octaves,
@@ -165,102 +168,125 @@ class Noise:
 
         return (lq + noise).clip(0, 1)
 
-    def __gauss(self, lq: np.ndarray) -> np.ndarray:
-        noise = np.random.normal(0, 0.25, lq.shape)
-        if not probability(self.motion_probability):
-            noise = self.motion(noise)
-        if not probability(self.scale_probability):
-            noise = self.noise_scale(noise)
+    def __gauss(
+        self, lq: np.ndarray, noise_type: str, debug: str, rng: np.random.Generator
+    ) -> np.ndarray:
+        noise = rng.normal(0, 0.25, lq.shape)
+        if not probability(self.motion_probability, rng):
+            noise = self.motion(noise, rng)
+        scale_cof = 1.0
+        if not probability(self.scale_probability, rng):
+            noise, scale_cof = self.noise_scale(noise, rng)
         bias = 0
         if self.bias != [0, 0]:
-            bias = safe_uniform(self.bias)
+            bias = safe_uniform(self.bias, rng)
             noise += bias
             noise = noise.clip(-1, 1)
-        alpha = np.random.choice(self.alpha_rand)
+        alpha = rng.choice(self.alpha_rand)
         noise *= alpha
         logging.debug(
             "%s noise_type: %s alpha: %.4f bias: %.4f scale: %.4f",
-            self.default_debug,
-            self.noise_type,
+            debug,
+            noise_type,
             alpha,
             bias,
-            self.scale_cof,
+            scale_cof,
         )
         if self.noise_clip:
             noise = self.__noise_clip(noise, lq)
-        return (lq + noise).astype(np.float32)
+        return (lq + noise).astype(np.float32, copy=False)
 
-    def __uniform_noise(self, lq: np.ndarray) -> np.ndarray:
-        noise = np.random.uniform(-1, 1, lq.shape)
-        if not probability(self.motion_probability):
-            noise = self.motion(noise)
-        if not probability(self.scale_probability):
-            noise = self.noise_scale(noise)
+    def __uniform_noise(
+        self, lq: np.ndarray, noise_type: str, debug: str, rng: np.random.Generator
+    ) -> np.ndarray:
+        noise = rng.uniform(-1, 1, lq.shape)
+        if not probability(self.motion_probability, rng):
+            noise = self.motion(noise, rng)
+        scale_cof = 1.0
+        if not probability(self.scale_probability, rng):
+            noise, scale_cof = self.noise_scale(noise, rng)
         bias = 0
         if self.bias != [0, 0]:
-            bias = safe_uniform(self.bias)
+            bias = safe_uniform(self.bias, rng)
             noise += bias
             noise = noise.clip(-1, 1)
-        alpha = np.random.choice(self.alpha_rand)
+        alpha = rng.choice(self.alpha_rand)
         noise *= alpha
         logging.debug(
             "%s noise_type: %s alpha: %.4f bias: %.4f scale: %.4f",
-            self.default_debug,
-            self.noise_type,
+            debug,
+            noise_type,
             alpha,
             bias,
-            self.scale_cof,
+            scale_cof,
         )
         if self.noise_clip:
             noise = self.__noise_clip(noise, lq)
-        return (lq + noise).astype(np.float32)
+        return (lq + noise).astype(np.float32, copy=False)
 
-    def __salt_and_pepper_core(self, img_shape: tuple) -> (np.ndarray, float):
-        noise = np.random.uniform(0, 1, img_shape)
-        probability_sp = safe_uniform(self.percentage_salt_or_pepper)
+    def __salt_and_pepper_core(
+        self, img_shape: tuple, rng: np.random.Generator
+    ) -> (np.ndarray, float):
+        noise = rng.uniform(0, 1, img_shape)
+        probability_sp = safe_uniform(self.percentage_salt_or_pepper, rng)
         return noise, probability_sp
 
-    def __salt_and_pepper(self, lq: np.ndarray) -> np.ndarray:
-        noise, probability_sp = self.__salt_and_pepper_core(lq.shape)
+    def __salt_and_pepper(
+        self, lq: np.ndarray, noise_type: str, debug: str, rng: np.random.Generator
+    ) -> np.ndarray:
+        noise, probability_sp = self.__salt_and_pepper_core(lq.shape, rng)
         logging.debug(
             "%s noise_type: %s probability: %.4f",
-            self.default_debug,
-            self.noise_type,
+            debug,
+            noise_type,
             probability_sp,
         )
         lq = np.where(noise > probability_sp / 2, lq, 1)
-        return np.where(noise < 1 - probability_sp / 2, lq, 0).astype(np.float32)
+        return np.where(noise < 1 - probability_sp / 2, lq, 0).astype(
+            np.float32, copy=False
+        )
 
-    def __salt(self, lq: np.ndarray) -> np.ndarray:
-        noise, probability_sp = self.__salt_and_pepper_core(lq.shape)
+    def __salt(
+        self, lq: np.ndarray, noise_type: str, debug: str, rng: np.random.Generator
+    ) -> np.ndarray:
+        noise, probability_sp = self.__salt_and_pepper_core(lq.shape, rng)
         logging.debug(
             "%s noise_type: %s probability: %.4f",
-            self.default_debug,
-            self.noise_type,
+            debug,
+            noise_type,
             probability_sp,
         )
         if self.noise_clip:
             noise = self.__noise_clip(noise, lq)
-        return np.where(noise > probability_sp, lq, 1).astype(np.float32)
+        return np.where(noise > probability_sp, lq, 1).astype(
+            np.float32, copy=False
+        )
 
-    def __pepper(self, lq: np.ndarray) -> np.ndarray:
-        noise, probability_sp = self.__salt_and_pepper_core(lq.shape)
+    def __pepper(
+        self, lq: np.ndarray, noise_type: str, debug: str, rng: np.random.Generator
+    ) -> np.ndarray:
+        noise, probability_sp = self.__salt_and_pepper_core(lq.shape, rng)
         logging.debug(
             "%s noise_type: %s probability: %.4f",
-            self.default_debug,
-            self.noise_type,
+            debug,
+            noise_type,
             probability_sp,
         )
         if self.noise_clip:
             noise = self.__noise_clip(noise, lq)
-        return np.where(noise < 1 - probability_sp, lq, 0).astype(np.float32)
+        return np.where(noise < 1 - probability_sp, lq, 0).astype(
+            np.float32, copy=False
+        )
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Adds noise to the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the noisy low-quality image and the corresponding high-quality image.
@@ -278,32 +304,33 @@ class Noise:
             "salt_and_pepper": self.__salt_and_pepper,
         }
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
             y = False
             uv = False
+            debug = "Noise - color_type: gray"
             if lq.ndim == 3:
-                if not probability(self.y_noise):
+                if not probability(self.y_noise, rng):
                     y = True
                     yuv_img = colour.RGB_to_YCbCr(
                 lq, in_bits=8, K=colour.models.rgb.ycbcr.WEIGHTS_YCBCR["ITU-R BT.2020"]
             ).astype(np.float32)
                     lq = yuv_img[:, :, 0]
                     uv_array = yuv_img[:, :, 1:]
-                    self.default_debug = "Noise - color_type: y"
-                elif not probability(self.uv_noise):
+                    debug = "Noise - color_type: y"
+                elif not probability(self.uv_noise, rng):
                     uv = True
                     yuv_img = colour.RGB_to_YCbCr(
                 lq, in_bits=8, K=colour.models.rgb.ycbcr.WEIGHTS_YCBCR["ITU-R BT.2020"]
             ).astype(np.float32)
                     lq = yuv_img[:, :, 1:]
                     y_array = yuv_img[:, :, 0]
-                    self.default_debug = "Noise - color_type: uv"
+                    debug = "Noise - color_type: uv"
                 else:
-                    self.default_debug = "Noise - color_type: rgb"
+                    debug = "Noise - color_type: rgb"
 
-            self.noise_type = np.random.choice(self.type_noise)
-            lq = NOISE_TYPE_MAP[self.noise_type](lq)
+            noise_type = rng.choice(self.type_noise)
+            lq = NOISE_TYPE_MAP[noise_type](lq, noise_type, debug, rng)
             if y:
                 lq = np.stack((lq, uv_array[:, :, 0], uv_array[:, :, 1]), axis=-1)
                 lq = (
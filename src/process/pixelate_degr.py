@@ -26,27 +26,30 @@ class Pixelate:
         self.size_range = pixelate_dict.get("size", [1, 1])
         self.probability = pixelate_dict.get("probability", 1.0)
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """
         Applies the pixelation effect to the low-quality (LQ) image based on the specified parameters.
 
         Args:
             lq (np.ndarray): The low-quality (LQ) image to be pixelated.
             hq (np.ndarray): The high-quality (HQ) image to remain unchanged.
+            rng (np.random.Generator): Random generator of the current image.
 
         Returns:
             (np.ndarray, np.ndarray): A tuple containing the pixelated LQ image and the unchanged HQ image.
         """
         try:
             # Check if the pixelation should be applied based on the given probability.
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
 
             # Determine the shape of the input LQ image.
             shape_img = lq.shape
 
             # Select a pixel block size within the specified range.
-            pixel_size = safe_uniform(self.size_range)
+            pixel_size = safe_uniform(self.size_range, rng)
             if pixel_size <= 1:
                 return lq, hq
 
@@ -1,5 +1,4 @@
 import numpy as np
-from numpy import random
 from chainner_ext import resize
 from pepeline import fast_color_level
 from pepedpid import dpid_resize, cubic_resize
@@ -83,9 +82,11 @@ class Resize:
         else:
             x = dpid_resize(x,height,width,float(algorithm.split("_")[-1]))
         return x
-    def __up_down(self, lq: np.ndarray, width: int, height: int) -> np.ndarray:
-        up = safe_uniform(self.up_down_spread)
-        algorithm_up = random.choice(self.up_down_alg_up)
+    def __up_down(
+        self, lq: np.ndarray, width: int, height: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        up = safe_uniform(self.up_down_spread, rng)
+        algorithm_up = rng.choice(self.up_down_alg_up)
         logging.debug(f"Resize - up_down up: {up:.4f} algorithm_up: {algorithm_up}")
         lq = self.__resize(
             lq,
@@ -95,9 +96,11 @@ class Resize:
         )
         return lq
 
-    def __down_up(self, lq: np.ndarray, width: int, height: int) -> np.ndarray:
-        down = safe_uniform(self.down_up_spread)
-        algorithm_down = random.choice(self.down_up_alg_down)
+    def __down_up(
+        self, lq: np.ndarray, width: int, height: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        down = safe_uniform(self.down_up_spread, rng)
+        algorithm_down = rng.choice(self.down_up_alg_down)
         logging.debug(
             f"Resize - down_up down: {down:.4f} algorithm_down: {algorithm_down}"
         )
@@ -109,9 +112,16 @@ class Resize:
         )
         return lq
 
-    def __down_down(self, lq: np.ndarray, width: int, height: int, algorithm_lq: str):
+    def __down_down(
+        self,
+        lq: np.ndarray,
+        width: int,
+        height: int,
+        algorithm_lq: str,
+        rng: np.random.Generator,
+    ):
         height_k = width / height
-        step = safe_randint(self.down_down_step)
+        step = safe_randint(self.down_down_step, rng)
         step = (width - width / self.lq_scale) / step
         for down in list(
             reversed(np.arange(int(width // self.lq_scale), int(width), int(step)))
@@ -124,37 +134,40 @@ class Resize:
             )
         return lq
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Args:
             lq (numpy.ndarray): Low quality image.
             hq (numpy.ndarray): High quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
         Returns:
             Tuple of numpy.ndarrays: Resized low quality image and high quality image.
         """
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
             height, width = lq.shape[:2]
-            algorithm_lq = random.choice(self.lq_algorithm)
-            algorithm_hq = random.choice(self.hq_algorithm)
-            spread = random.choice(self.spread_arange)
+            algorithm_lq = rng.choice(self.lq_algorithm)
+            algorithm_hq = rng.choice(self.hq_algorithm)
+            spread = rng.choice(self.spread_arange)
             height = self.__real_size(height // spread)
             width = self.__real_size(width // spread)
             logging.debug(
                 f"Resize - algorithm_lq: {algorithm_lq} algorithm_hq: {algorithm_hq} spread: {spread:.4f}"
             )
             if algorithm_lq == "down_up":
-                lq = self.__down_up(lq, width//self.lq_scale, height//self.lq_scale)
-                algorithm_lq = random.choice(self.down_up_alg_up)
+                lq = self.__down_up(lq, width//self.lq_scale, height//self.lq_scale, rng)
+                algorithm_lq = rng.choice(self.down_up_alg_up)
                 logging.debug(f"Resize - down_up new_algorithm_lq: {algorithm_lq}")
             if algorithm_lq == "up_down":
-                lq = self.__up_down(lq, width, height)
-                algorithm_lq = random.choice(self.up_down_alg_down)
+                lq = self.__up_down(lq, width, height, rng)
+                algorithm_lq = rng.choice(self.up_down_alg_down)
                 logging.debug(f"Resize - up_down new_algorithm_lq: {algorithm_lq}")
             if algorithm_lq == "down_down":
-                algorithm_lq = random.choice(self.down_down_alg)
+                algorithm_lq = rng.choice(self.down_down_alg)
                 logging.debug(f"Resize - down_down new_algorithm_lq: {algorithm_lq}")
-                lq = self.__down_down(lq, width, height, algorithm_lq)
+                lq = self.__down_down(lq, width, height, algorithm_lq, rng)
 
             lq = self.__resize(
                 lq,
@@ -1,6 +1,7 @@
 import cv2 as cv
 import numpy as np
 from .utils import probability
+from ..utils.arena import scratch
 from ..utils.random import safe_uniform
 from ..utils.registry import register_class
 import logging
@@ -27,25 +28,26 @@ class Saturation:
         self.rand = saturation_dict.get("rand", [0.5, 1.0])
         self.probability = saturation_dict.get("probability", 1.0)
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Args:
             lq (numpy.ndarray): Low quality image.
             hq (numpy.ndarray): High quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
         Returns:
             Tuple of numpy.ndarrays: Image with adjusted saturation and original high quality image.
         """
         try:
             if lq.ndim == 2:
                 return lq, hq
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
-            random_saturation = safe_uniform(self.rand)
+            random_saturation = safe_uniform(self.rand, rng)
             logging.debug(f"Saturation - {random_saturation:.4f}")
-            hsv_image = cv.cvtColor(lq, cv.COLOR_RGB2HSV)
-            decreased_saturation = hsv_image.copy()
-            decreased_saturation[:, :, 1] = (
-                decreased_saturation[:, :, 1] * random_saturation
-            )
-            return cv.cvtColor(decreased_saturation, cv.COLOR_HSV2RGB), hq
+            with scratch(lq.shape, lq.dtype) as hsv_image:
+                cv.cvtColor(lq, cv.COLOR_RGB2HSV, dst=hsv_image)
+                hsv_image[:, :, 1] *= random_saturation
+                return cv.cvtColor(hsv_image, cv.COLOR_HSV2RGB), hq
         except Exception as e:
             logging.error(f"Saturation error: {e}")
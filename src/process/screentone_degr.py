@@ -1,7 +1,6 @@
 import cv2
 from pepeline import screentone, cvt_color, CvtType
 import numpy as np
-from numpy import random
 
 from .utils import probability, lq_hq2grays
 from ..constants import DOT_TYPE
@@ -42,7 +41,11 @@ class Screentone:
         self.probability = screentone_dict.get("probability", 1.0)
 
     def __cmyk_halftone(
-        self, lq: np.ndarray, hq: np.ndarray, dot_size: int
+        self,
+        lq: np.ndarray,
+        hq: np.ndarray,
+        dot_size: int,
+        rng: np.random.Generator,
     ) -> (np.ndarray, np.ndarray):
         """Applies CMYK halftone effect to the image.
 
@@ -50,33 +53,26 @@ class Screentone:
             lq (numpy.ndarray): The low-quality image in CMYK color space.
             hq (numpy.ndarray): The high-quality image.
             dot_size (int): The size of the halftone dots.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the CMYK halftoned low-quality image and the corresponding high-quality image.
         """
-        c_angle = int(random.choice(self.dot_angle_list[0]))
-        m_angle = int(random.choice(self.dot_angle_list[1]))
-        y_angle = int(random.choice(self.dot_angle_list[2]))
-        k_angle = int(random.choice(self.dot_angle_list[3]))
-        dot_type1 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[0]), DOT_TYPE["circle"]
-        )
-        dot_type2 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[1]), DOT_TYPE["circle"]
-        )
-        dot_type3 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[2]), DOT_TYPE["circle"]
-        )
-        dot_type4 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[3]), DOT_TYPE["circle"]
-        )
+        c_angle = int(rng.choice(self.dot_angle_list[0]))
+        m_angle = int(rng.choice(self.dot_angle_list[1]))
+        y_angle = int(rng.choice(self.dot_angle_list[2]))
+        k_angle = int(rng.choice(self.dot_angle_list[3]))
+        dot_type1 = DOT_TYPE.get(rng.choice(self.dot_types_list[0]), DOT_TYPE["circle"])
+        dot_type2 = DOT_TYPE.get(rng.choice(self.dot_types_list[1]), DOT_TYPE["circle"])
+        dot_type3 = DOT_TYPE.get(rng.choice(self.dot_types_list[2]), DOT_TYPE["circle"])
+        dot_type4 = DOT_TYPE.get(rng.choice(self.dot_types_list[3]), DOT_TYPE["circle"])
         lq = cvt_color(lq, CvtType.RGB2CMYK)
         lq[..., 0] = screentone(lq[..., 0], dot_size, c_angle, dot_type1)
         lq[..., 1] = screentone(lq[..., 1], dot_size, m_angle, dot_type2)
         lq[..., 2] = screentone(lq[..., 2], dot_size, y_angle, dot_type3)
         lq[..., 3] = screentone(lq[..., 3], dot_size, k_angle, dot_type4)
         if self.cmyk_alpha != [1, 1]:
-            alpha = safe_uniform(self.cmyk_alpha)
+            alpha = safe_uniform(self.cmyk_alpha, rng)
             lq *= alpha
         logging.debug(
             f"Screentone - type: cmyk dot: {dot_size} cmyk_angle: {c_angle} {m_angle} {y_angle} {k_angle} cmyk_dot_type: {dot_type1} {dot_type2} {dot_type3} {dot_type4}",
@@ -84,7 +80,11 @@ class Screentone:
         return cvt_color(lq, CvtType.CMYK2RGB), hq
 
     def __not_rot_halftone(
-        self, lq: np.ndarray, hq: np.ndarray, dot_size: int
+        self,
+        lq: np.ndarray,
+        hq: np.ndarray,
+        dot_size: int,
+        rng: np.random.Generator,
     ) -> (np.ndarray, np.ndarray):
         """Applies non-rotated halftone effect to the image.
 
@@ -92,19 +92,14 @@ class Screentone:
             lq (numpy.ndarray): The low-quality image in RGB color space.
             hq (numpy.ndarray): The high-quality image.
             dot_size (int): The size of the halftone dots.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the non-rotated halftoned low-quality image and the corresponding high-quality image.
         """
-        dot_type1 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[0]), DOT_TYPE["circle"]
-        )
-        dot_type2 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[1]), DOT_TYPE["circle"]
-        )
-        dot_type3 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[2]), DOT_TYPE["circle"]
-        )
+        dot_type1 = DOT_TYPE.get(rng.choice(self.dot_types_list[0]), DOT_TYPE["circle"])
+        dot_type2 = DOT_TYPE.get(rng.choice(self.dot_types_list[1]), DOT_TYPE["circle"])
+        dot_type3 = DOT_TYPE.get(rng.choice(self.dot_types_list[2]), DOT_TYPE["circle"])
         logging.debug(
             f"Screentone - type: not_rot dot: {dot_size} not_rot dot type: {dot_type1} {dot_type2} {dot_type3}"
         )
@@ -114,7 +109,11 @@ class Screentone:
         return lq, hq
 
     def __gray_halftone(
-        self, lq: np.ndarray, hq: np.ndarray, dot_size: int
+        self,
+        lq: np.ndarray,
+        hq: np.ndarray,
+        dot_size: int,
+        rng: np.random.Generator,
     ) -> (np.ndarray, np.ndarray):
         """Applies grayscale halftone effect to the image.
 
@@ -122,14 +121,13 @@ class Screentone:
             lq (numpy.ndarray): The low-quality image in grayscale.
             hq (numpy.ndarray): The high-quality image.
             dot_size (int): The size of the halftone dots.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the grayscale halftoned low-quality image and the corresponding high-quality image.
         """
         lq, hq = lq_hq2grays(lq, hq)
-        dot_type1 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[0]), DOT_TYPE["circle"]
-        )
+        dot_type1 = DOT_TYPE.get(rng.choice(self.dot_types_list[0]), DOT_TYPE["circle"])
         logging.debug(
             f"Screentone - type: gray dot: {dot_size} gray dot_type: {dot_type1}"
         )
@@ -137,7 +135,11 @@ class Screentone:
         return lq, hq
 
     def __rgb_halftone(
-        self, lq: np.ndarray, hq: np.ndarray, dot_size: int
+        self,
+        lq: np.ndarray,
+        hq: np.ndarray,
+        dot_size: int,
+        rng: np.random.Generator,
     ) -> (np.ndarray, np.ndarray):
         """Applies RGB halftone effect to the image.
 
@@ -145,22 +147,17 @@ class Screentone:
             lq (numpy.ndarray): The low-quality image in RGB color space.
             hq (numpy.ndarray): The high-quality image.
             dot_size (int): The size of the halftone dots.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the RGB halftoned low-quality image and the corresponding high-quality image.
         """
-        dot_type1 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[0]), DOT_TYPE["circle"]
-        )
-        dot_type2 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[1]), DOT_TYPE["circle"]
-        )
-        dot_type3 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[2]), DOT_TYPE["circle"]
-        )
-        r_angle = int(random.choice(self.dot_angle_list[0]))
-        g_angle = int(random.choice(self.dot_angle_list[1]))
-        b_angle = int(random.choice(self.dot_angle_list[2]))
+        dot_type1 = DOT_TYPE.get(rng.choice(self.dot_types_list[0]), DOT_TYPE["circle"])
+        dot_type2 = DOT_TYPE.get(rng.choice(self.dot_types_list[1]), DOT_TYPE["circle"])
+        dot_type3 = DOT_TYPE.get(rng.choice(self.dot_types_list[2]), DOT_TYPE["circle"])
+        r_angle = int(rng.choice(self.dot_angle_list[0]))
+        g_angle = int(rng.choice(self.dot_angle_list[1]))
+        b_angle = int(rng.choice(self.dot_angle_list[2]))
         logging.debug(
             f"Screentone - type: rgb dot: {dot_size} rgb_angle: {r_angle} {g_angle} {b_angle} rgb dot_type: {dot_type1} {dot_type2} {dot_type3}",
         )
@@ -170,7 +167,11 @@ class Screentone:
         return lq, hq
 
     def __hsv_screentone(
-        self, lq: np.ndarray, hq: np.ndarray, dot_size: int
+        self,
+        lq: np.ndarray,
+        hq: np.ndarray,
+        dot_size: int,
+        rng: np.random.Generator,
     ) -> (np.ndarray, np.ndarray):
         """Applies HSV screentone effect to the image.
 
@@ -178,14 +179,13 @@ class Screentone:
             lq (numpy.ndarray): The low-quality image in RGB color space.
             hq (numpy.ndarray): The high-quality image.
             dot_size (int): The size of the halftone dots.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the HSV screentoned low-quality image and the corresponding high-quality image.
         """
-        dot_type1 = DOT_TYPE.get(
-            random.choice(self.dot_types_list[0]), DOT_TYPE["circle"]
-        )
-        v_angle = int(random.choice(self.angle))
+        dot_type1 = DOT_TYPE.get(rng.choice(self.dot_types_list[0]), DOT_TYPE["circle"])
+        v_angle = int(rng.choice(self.angle))
         logging.debug(
             f"Screentone - type: hsv dot: {dot_size} hsv angle: {v_angle} hsv dot_type: {dot_type1}",
         )
@@ -194,12 +194,15 @@ class Screentone:
         lq = cv2.cvtColor(lq, cv2.COLOR_HSV2RGB)
         return lq, hq
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Applies the selected screentone effect to the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the screentoned low-quality image and the corresponding high-quality image.
@@ -212,17 +215,17 @@ class Screentone:
             "gray": self.__gray_halftone,
         }
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
 
-            dot_size = random.choice(self.dot_range)
+            dot_size = rng.choice(self.dot_range)
             if np.ndim(lq) != 2:
-                color_type = random.choice(self.type)
-                lq, hq = HALFTONE_TYPE_MAP[color_type](lq, hq, dot_size)
+                color_type = rng.choice(self.type)
+                lq, hq = HALFTONE_TYPE_MAP[color_type](lq, hq, dot_size, rng)
             else:
-                angle = int(random.choice(self.angle))
+                angle = int(rng.choice(self.angle))
                 dot_type = DOT_TYPE.get(
-                    random.choice(self.dot_type_list), DOT_TYPE["circle"]
+                    rng.choice(self.dot_type_list), DOT_TYPE["circle"]
                 )
                 logging.debug(
                     f"Screentone - type: gray dot: {dot_size}  gray angle: {angle} gray dot_type: {dot_type}",
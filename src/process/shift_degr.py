@@ -2,7 +2,6 @@ import numpy as np
 import cv2 as cv
 from pepeline import cvt_color, CvtType
 from src.process.utils import probability
-from numpy import random
 
 from ..utils.random import safe_uniform, safe_randint
 from src.utils.registry import register_class
@@ -36,7 +35,10 @@ def shift(img, amount_x: int, amount_y: int, fill_color: list | float) -> np.nda
 
 
 def shift_int(
-    img: np.ndarray, amount_channel: list[list[int]], fill_color: list[float]
+    img: np.ndarray,
+    amount_channel: list[list[int]],
+    fill_color: list[float],
+    rng: np.random.Generator,
 ) -> (int, int):
     """
     Shifts the image by random integer amounts within the specified ranges.
@@ -45,6 +47,7 @@ def shift_int(
     img (np.ndarray): The input image.
     amount_channel (list[list[int]]): The ranges for random shifts in x and y directions.
     fill_color (list[float]): The color used to fill the empty space after the shift.
+    rng (np.random.Generator): Random generator of the current image.
 
     Returns:
     np.ndarray: The shifted image.
@@ -52,9 +55,9 @@ def shift_int(
     amount_x = 0
     amount_y = 0
     if amount_channel[0] != [0, 0]:
-        amount_x = safe_randint(amount_channel[0])
+        amount_x = safe_randint(amount_channel[0], rng)
     if amount_channel[1] != [0, 0]:
-        amount_y = safe_randint(amount_channel[1])
+        amount_y = safe_randint(amount_channel[1], rng)
     if amount_x == 0 and amount_y == 0:
         return img
     logging.debug(f"Shift_amount - amount_x: {amount_x} amount_y: {amount_y}")
@@ -62,7 +65,10 @@ def shift_int(
 
 
 def shift_percent(
-    img: np.ndarray, amount_channel: list[list[int]], fill_color: list[float]
+    img: np.ndarray,
+    amount_channel: list[list[int]],
+    fill_color: list[float],
+    rng: np.random.Generator,
 ) -> (int, int):
     """
     Shifts the image by random percentages of its dimensions within the specified ranges.
@@ -71,6 +77,7 @@ def shift_percent(
     img (np.ndarray): The input image.
     amount_channel (list[list[int]]): The ranges for random percentage shifts in x and y directions.
     fill_color (list[float]): The color used to fill the empty space after the shift.
+    rng (np.random.Generator): Random generator of the current image.
 
     Returns:
     np.ndarray: The shifted image.
@@ -79,9 +86,9 @@ def shift_percent(
     amount_y = 0
     shape_img = img.shape
     if amount_channel[0] != [0, 0]:
-        amount_x = int(shape_img[0] * safe_uniform(amount_channel[0]) / 100)
+        amount_x = int(shape_img[0] * safe_uniform(amount_channel[0], rng) / 100)
     if amount_channel[1] != [0, 0]:
-        amount_y = int(shape_img[1] * safe_uniform(amount_channel[1]) / 100)
+        amount_y = int(shape_img[1] * safe_uniform(amount_channel[1], rng) / 100)
     if amount_x == 0 and amount_y == 0:
         return img
     logging.debug(
@@ -147,28 +154,34 @@ class Shift:
         else:
             self.cmyk_amount_list = [not_target, not_target, not_target, not_target]
 
-    def __rgb_chanel_shift(self, img: np.ndarray) -> np.ndarray:
+    def __rgb_chanel_shift(
+        self, img: np.ndarray, rng: np.random.Generator
+    ) -> np.ndarray:
         """
         Applies the shift to the RGB channels of the image.
 
         Parameters:
         img (np.ndarray): The input image.
+        rng (np.random.Generator): Random generator of the current image.
 
         Returns:
         np.ndarray: The shifted image.
         """
         for c in range(3):
             channel_amount = self.rgb_amount_list[c]
-            img[:, :, c] = self.shift_channel(img[:, :, c], channel_amount, [1])
+            img[:, :, c] = self.shift_channel(img[:, :, c], channel_amount, [1], rng)
 
         return img
 
-    def __yuv_chanel_shift(self, img: np.ndarray) -> np.ndarray:
+    def __yuv_chanel_shift(
+        self, img: np.ndarray, rng: np.random.Generator
+    ) -> np.ndarray:
         """
         Applies the shift to the YUV channels of the image.
 
         Parameters:
         img (np.ndarray): The input image.
+        rng (np.random.Generator): Random generator of the current image.
 
         Returns:
         np.ndarray: The shifted image.
@@ -176,15 +189,20 @@ class Shift:
         yuv_img = cvt_color(img, CvtType.RGB2YCvCrBt2020)
         for c in range(3):
             channel_amount = self.yuv_amount_list[c]
-            yuv_img[:, :, c] = self.shift_channel(yuv_img[:, :, c], channel_amount, [1])
+            yuv_img[:, :, c] = self.shift_channel(
+                yuv_img[:, :, c], channel_amount, [1], rng
+            )
         return cvt_color(yuv_img, CvtType.YCvCr2RGBBt2020)
 
-    def __cmyk_chanel_shift(self, img: np.ndarray) -> np.ndarray:
+    def __cmyk_chanel_shift(
+        self, img: np.ndarray, rng: np.random.Generator
+    ) -> np.ndarray:
         """
         Applies the shift to the CMYK channels of the image.
 
         Parameters:
         img (np.ndarray): The input image.
+        rng (np.random.Generator): Random generator of the current image.
 
         Returns:
         np.ndarray: The shifted image.
@@ -193,17 +211,20 @@ class Shift:
         for c in range(4):
             channel_amount = self.cmyk_amount_list[c]
             cmyk_img[:, :, c] = self.shift_channel(
-                cmyk_img[:, :, c], channel_amount, [0]
+                cmyk_img[:, :, c], channel_amount, [0], rng
             )
         return cvt_color(cmyk_img, CvtType.CMYK2RGB)
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """
         Runs the shift transformation on the low-quality (lq) image, optionally returns high-quality (hq) image.
 
         Parameters:
         lq (np.ndarray): The low-quality input image.
         hq (np.ndarray): The high-quality input image.
+        rng (np.random.Generator): Random generator of the current image.
 
         Returns:
         tuple[np.ndarray, np.ndarray]: The transformed low-quality image and the high-quality image.
@@ -216,11 +237,11 @@ class Shift:
             }
             if lq.ndim == 2:
                 return lq, hq
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
-            type_shift = random.choice(self.type_list)
+            type_shift = rng.choice(self.type_list)
             logging.debug(f"Shift - type: {type_shift}")
-            lq = SHIFT_TYPE_MAP[type_shift](lq)
+            lq = SHIFT_TYPE_MAP[type_shift](lq, rng)
             return lq, hq
         except Exception as e:
             logging.error(f"Shift error: {e}")
@@ -1,6 +1,5 @@
 from .utils import probability
 from dataset_support import sin_patern
-import random
 import numpy as np
 from ..utils.registry import register_class
 from ..utils.random import safe_uniform
@@ -26,29 +25,32 @@ class Sin:
     """
 
     def __init__(self, sin_loss_dict: dict):
-        self.shape = sin_loss_dict.get("shape", [100, 1000, 100])
+        self.shape = np.arange(*sin_loss_dict.get("shape", [100, 1000, 100]))
         self.alpha = sin_loss_dict.get("alpha", [0.1, 0.5])
         self.bias = sin_loss_dict.get("bias", [0.8, 1.2])
         self.vertical_prob = sin_loss_dict.get("vertical", 0.5)
         self.probability = sin_loss_dict.get("probability", 1.0)
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """Applies sinusoidal patterns to the input image.
 
         Args:
             lq (numpy.ndarray): The low-quality image.
             hq (numpy.ndarray): The corresponding high-quality image.
+            rng (numpy.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: A tuple containing the image with sinusoidal patterns applied and the corresponding high-quality image.
         """
         try:
-            if probability(self.probability):
+            if probability(self.probability, rng):
                 return lq, hq
-            shape = random.randrange(*self.shape)
-            alpha = safe_uniform(self.alpha)
-            vertical = not probability(self.vertical_prob)
-            bias = safe_uniform(self.bias)
+            shape = int(rng.choice(self.shape))
+            alpha = safe_uniform(self.alpha, rng)
+            vertical = not probability(self.vertical_prob, rng)
+            bias = safe_uniform(self.bias, rng)
             logging.debug(
                 f"Sin - shape: {shape} alpha: {alpha:.4f} vertical: {vertical} bias: {bias:.4f}"
             )
@@ -1,10 +1,8 @@
-import random
 import numpy as np
 from pepeline.pepeline import fast_color_level
 
 from .utils import probability
 from ..constants import INTERPOLATION_MAP, SUBSAMPLING_MAP, YUV_MAP
-from numpy.random import choice
 from src.utils.registry import register_class
 from chainner_ext import resize, ResizeFilter
 import cv2 as cv
@@ -82,20 +80,21 @@ class Subsampling:
             254,
         )
 
-    def __sample(self, lq: np.ndarray) -> np.ndarray:
+    def __sample(self, lq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
         """
         Applies subsampling to the image according to the specified format.
 
         Args:
             lq (np.ndarray): Low-quality input image.
+            rng (np.random.Generator): Random generator of the current image.
 
         Returns:
             np.ndarray: Image after subsampling.
         """
         shape_lq = lq.shape
-        down_alg = INTERPOLATION_MAP[choice(self.down_alg)]
-        up_alg = INTERPOLATION_MAP[choice(self.up_alg)]
-        scale_list = SUBSAMPLING_MAP[random.choice(self.format_list)]
+        down_alg = INTERPOLATION_MAP[rng.choice(self.down_alg)]
+        up_alg = INTERPOLATION_MAP[rng.choice(self.up_alg)]
+        scale_list = SUBSAMPLING_MAP[rng.choice(self.format_list)]
         logging.debug(
             f"Subsampling: format - {scale_list} down_alg - {down_alg} up_alg - {up_alg}"
         )
@@ -105,28 +104,31 @@ class Subsampling:
             )
         return lq
 
-    def run(self, lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
+    def run(
+        self, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+    ) -> (np.ndarray, np.ndarray):
         """
         Runs the subsampling process and optional blurring on the input image.
 
         Args:
             lq (np.ndarray): Low-quality input image.
             hq (np.ndarray): High-quality reference image.
+            rng (np.random.Generator): Random generator of the current image.
 
         Returns:
             tuple: Modified low-quality image and the original high-quality image.
         """
         try:
-            if lq.ndim == 2 or lq.shape[2] == 1 or probability(self.probability):
+            if lq.ndim == 2 or lq.shape[2] == 1 or probability(self.probability, rng):
                 return lq, hq
-            yuv = YUV_MAP[random.choice(self.ycbcr_type)]
+            yuv = YUV_MAP[rng.choice(self.ycbcr_type)]
             lq = colour.RGB_to_YCbCr(
                 lq, in_bits=8, K=colour.models.rgb.ycbcr.WEIGHTS_YCBCR[yuv]
             ).astype(np.float32)  # cv2.cvtColor(lq,cv2.COLOR_RGB2YCrCb)
 
-            lq = self.__sample(lq)
+            lq = self.__sample(lq, rng)
             if self.blur_kernels:
-                sigma = safe_uniform(self.blur_kernels)
+                sigma = safe_uniform(self.blur_kernels, rng)
                 if sigma != 0.0:
                     logging.debug(f"Subsampling blur: sigma - {sigma}")
                     lq[..., 1] = cv.GaussianBlur(
@@ -3,9 +3,11 @@ from pepeline import cvt_color, CvtType
 from dataset_support import gray_or_color
 import cv2 as cv
 
+from ..utils.pipeline import FLOAT32, convert
 
-def probability(prob: float) -> bool:
-    if prob > np.random.uniform(0, 1):
+
+def probability(prob: float, rng: np.random.Generator) -> bool:
+    if prob > rng.uniform(0, 1):
         return False
     else:
         return True
@@ -35,7 +37,8 @@ def color_or_gray(img: np.ndarray) -> np.ndarray:
 
 def img2gray(img: np.ndarray) -> np.ndarray:
     if img.ndim != 2 and img.shape[2] != 1:
-        return cvt_color(img, CvtType.RGB2GrayBt2020)
+        # Stages may return uint8 or float16, cvt_color only takes float32
+        return cvt_color(convert(img, FLOAT32), CvtType.RGB2GrayBt2020)
     else:
         return img
 
@@ -44,7 +47,170 @@ def lq_hq2grays(lq: np.ndarray, hq: np.ndarray) -> (np.ndarray, np.ndarray):
     return img2gray(lq), img2gray(hq)
 
 
-def laplace_filter(img: np.ndarray, mean_min: float) -> bool:
+def laplace_score(img: np.ndarray) -> np.float32:
+    """Mean absolute Laplacian of the gray image, the value laplace_filter compares."""
     gray_img = img2gray(img)
     laplace_img = cv.Laplacian(gray_img, -1)
-    return np.mean(np.abs(laplace_img)) < mean_min
+    return np.mean(np.abs(laplace_img))
+
+
+def laplace_filter(img: np.ndarray, mean_min: float) -> bool:
+    return laplace_score(img) < mean_min
+
+
+def window_sums(
+    integral: np.ndarray, x: np.ndarray, y: np.ndarray, height: int, width: int
+) -> np.ndarray:
+    """Returns the sums of the height x width windows with top left corners (x, y) from an integral image."""
+    return (
+        integral[x + height, y + width]
+        - integral[x, y + width]
+        - integral[x + height, y]
+        + integral[x, y]
+    )
+
+
+def tile_laplacian(gray_img: np.ndarray, tile_size: int) -> np.ndarray:
+    """Laplacian of an image as if every tile_size x tile_size tile was filtered on its own.
+
+    The Laplacian is computed once on the full image and only the first and last row and
+    column of every tile are corrected for the reflected border the per-tile filter would use.
+    """
+    laplace_img = cv.Laplacian(gray_img, -1)
+    if tile_size < 2:
+        return laplace_img
+    h, w = gray_img.shape
+    for axis, length in ((0, h), (1, w)):
+        starts = np.arange(tile_size, length, tile_size)
+        ends = starts - 1
+        first = np.take(gray_img, starts + 1, axis) - np.take(
+            gray_img, starts - 1, axis
+        )
+        last = np.take(gray_img, ends - 1, axis) - np.take(gray_img, ends + 1, axis)
+        if axis == 0:
+            laplace_img[starts] += first
+            laplace_img[ends] += last
+        else:
+            laplace_img[:, starts] += first
+            laplace_img[:, ends] += last
+    return laplace_img
+
+
+def window_scores(
+    img: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    height: int,
+    width: int,
+    tile_size: int = None,
+) -> np.ndarray:
+    """Returns the laplace_score of every window.
+
+    Window scores come from integral images of the full image, so no Python loop runs over the windows.
+    With tile_size, the Laplacian of every grid tile is computed as if the tile was filtered on its own.
+    """
+    gray_img = img2gray(img)
+    if tile_size:
+        laplace_img = tile_laplacian(gray_img, tile_size)
+    else:
+        laplace_img = cv.Laplacian(gray_img, -1)
+    integral = cv.integral(np.abs(laplace_img), sdepth=cv.CV_64F)
+    return window_sums(integral, x, y, height, width) / (height * width)
+
+
+def window_wb(
+    img: np.ndarray, x: np.ndarray, y: np.ndarray, height: int, width: int
+) -> np.ndarray:
+    """Returns a mask of the windows that are pure white or pure black."""
+    solid = np.zeros(np.shape(x), dtype=bool)
+    for value in (0.0, 1.0):
+        pixels = img == value
+        if pixels.ndim == 3:
+            pixels = pixels.all(axis=2)
+        integral = cv.integral(pixels.astype(np.uint8))
+        solid |= window_sums(integral, x, y, height, width) == height * width
+    return solid
+
+
+def window_mask(
+    img: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    height: int,
+    width: int,
+    mean_min: float = None,
+    no_wb: bool = False,
+    tile_size: int = None,
+) -> np.ndarray:
+    """Returns a mask of the windows that pass laplace_filter, or no_wb when mean_min is unset."""
+    if mean_min:
+        return window_scores(img, x, y, height, width, tile_size) >= mean_min
+    if no_wb:
+        return ~window_wb(img, x, y, height, width)
+    return np.ones(np.shape(x), dtype=bool)
+
+
+def scores_mask(
+    scores: np.ndarray, solid: np.ndarray, mean_min: float = None, no_wb: bool = False
+) -> np.ndarray:
+    """window_mask from precomputed window_scores and window_wb."""
+    if mean_min:
+        return scores >= mean_min
+    if no_wb:
+        return ~solid
+    return np.ones(np.shape(scores), dtype=bool)
+
+
+def tile_mask(
+    img: np.ndarray, tile_size: int, mean_min: float = None, no_wb: bool = False
+) -> np.ndarray:
+    """Returns a (rows, columns) mask of the grid tiles that pass laplace_filter, or no_wb when mean_min is unset."""
+    img, x, y = _grid(img, tile_size)
+    if not x.size:
+        return np.zeros(x.shape, dtype=bool)
+    return window_mask(img, x, y, tile_size, tile_size, mean_min, no_wb, tile_size)
+
+
+def tile_scores(img: np.ndarray, tile_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the laplace_score and the window_wb mask of every grid tile, both (rows, columns)."""
+    img, x, y = _grid(img, tile_size)
+    if not x.size:
+        return np.zeros(x.shape), np.zeros(x.shape, dtype=bool)
+    return (
+        window_scores(img, x, y, tile_size, tile_size, tile_size),
+        window_wb(img, x, y, tile_size, tile_size),
+    )
+
+
+def _grid(img: np.ndarray, tile_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the part of an image covered by full tiles and the corners of the tiles."""
+    rows, columns = img.shape[0] // tile_size, img.shape[1] // tile_size
+    x, y = np.meshgrid(
+        np.arange(rows) * tile_size, np.arange(columns) * tile_size, indexing="ij"
+    )
+    return img[: rows * tile_size, : columns * tile_size], x, y
+
+
+def random_windows(
+    img: np.ndarray,
+    height: int,
+    width: int,
+    count: int,
+    rng: np.random.Generator,
+    align: int = 1,
+    mean_min: float = None,
+    no_wb: bool = False,
+    attempts: int = 8,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the top left corners of up to count random height x width windows that pass the filters.
+
+    With a filter, count * attempts candidates are drawn at once and the first count accepted ones are kept.
+    Corners are multiples of align.
+    """
+    max_x = (img.shape[0] - height) // align
+    max_y = (img.shape[1] - width) // align
+    candidates = count * attempts if mean_min or no_wb else count
+    x = rng.integers(max_x + 1, size=candidates) * align
+    y = rng.integers(max_y + 1, size=candidates) * align
+    keep = window_mask(img, x, y, height, width, mean_min, no_wb)
+    return x[keep][:count], y[keep][:count]
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from tqdm import tqdm
+
+# Bytes of idle buffers every thread keeps, set from the config by configure()
+_limit = 256 * 1024 * 1024
+_local = threading.local()
+_lock = threading.Lock()
+# Buffers taken, buffers taken without allocating and their bytes. A multiprocessing.Array
+# when share_stats() made the workers of a process pool count into one place.
+_stats = [0, 0, 0]
+
+
+def configure(limit_mb: float) -> None:
+    """Sets how many MB of idle buffers every thread keeps, 0 allocates every buffer."""
+    global _limit
+    _limit = int(limit_mb * 1024 * 1024)
+
+
+def share_stats(counters) -> None:
+    """Counts into counters, a multiprocessing.Array("q", 3) shared by the processes of a pool."""
+    global _stats
+    _stats = counters
+
+
+def _count(nbytes: int | None) -> None:
+    lock = _stats.get_lock() if hasattr(_stats, "get_lock") else _lock
+    with lock:
+        _stats[0] += 1
+        if nbytes is not None:
+            _stats[1] += 1
+            _stats[2] += nbytes
+
+
+def stats() -> tuple[int, int, int]:
+    """Returns the buffers taken, the buffers reused and the bytes that were not allocated for them."""
+    return tuple(_stats[:3])
+
+
+def report() -> None:
+    """Prints how many allocations the arenas avoided."""
+    taken, reused, nbytes = stats()
+    if taken:
+        tqdm.write(
+            f"Buffer arena - {reused} of {taken} scratch buffers reused, "
+            f"{nbytes / 1024 / 1024:.1f} MB not allocated"
+        )
+
+
+class BufferArena:
+    """Scratch buffers of one thread, reused by shape and dtype.
+
+    A buffer is taken for a temporary that does not outlive a degradation and given back
+    when it is done, so the next image of the same size gets the same memory instead of a
+    new allocation. Idle buffers above the limit are dropped, the least recently used first.
+
+    Args:
+        limit (int): Bytes of idle buffers kept.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.idle = OrderedDict()
+        self.size = 0
+
+    def take(self, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """Returns an uninitialized buffer."""
+        key = (tuple(shape), np.dtype(dtype).str)
+        buffers = self.idle.get(key)
+        if not buffers:
+            _count(None)
+            return np.empty(shape, dtype)
+        buffer = buffers.pop()
+        if not buffers:
+            del self.idle[key]
+        self.size -= buffer.nbytes
+        _count(buffer.nbytes)
+        return buffer
+
+    def give(self, buffer: np.ndarray) -> None:
+        """Takes back a buffer from take() that is no longer used."""
+        if buffer.nbytes > self.limit:
+            return
+        key = (buffer.shape, buffer.dtype.str)
+        self.idle.setdefault(key, []).append(buffer)
+        self.idle.move_to_end(key)
+        self.size += buffer.nbytes
+        while self.size > self.limit:
+            oldest, buffers = next(iter(self.idle.items()))
+            self.size -= buffers.pop(0).nbytes
+            if not buffers:
+                del self.idle[oldest]
+
+
+def arena() -> BufferArena:
+    """Returns the arena of the current thread."""
+    current = getattr(_local, "arena", None)
+    if current is None or current.limit != _limit:
+        current = _local.arena = BufferArena(_limit)
+    return current
+
+
+@contextmanager
+def scratch(shape: tuple, dtype: np.dtype = np.float32):
+    """Lends a buffer of the current thread's arena for the duration of the with block.
+
+    The buffer is uninitialized, fill it with an out= parameter and do not keep a reference
+    to it after the block.
+    """
+    current = arena()
+    buffer = current.take(shape, dtype)
+    try:
+        yield buffer
+    finally:
+        current.give(buffer)
@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import uuid
+from multiprocessing.util import Finalize
+from os.path import join
+
+import numpy as np
+
+from .encode import to_uint8
+
+# .npy header size, large enough to rewrite the shape in place while the array grows
+HEADER_SIZE = 256
+
+
+def npy_header(shape: tuple, dtype: np.dtype) -> bytes:
+    """Returns a version 1.0 .npy header padded to HEADER_SIZE bytes."""
+    header = repr(
+        {"descr": np.dtype(dtype).str, "fortran_order": False, "shape": tuple(shape)}
+    )
+    header = header.ljust(HEADER_SIZE - 10 - 1) + "\n"
+    if len(header) + 10 != HEADER_SIZE:
+        raise ValueError(f"Shape {shape} does not fit into the .npy header")
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode()
+
+
+class GrowableArray:
+    """A .npy file of equally shaped items that grows while items are appended.
+
+    The file is a valid .npy at any time, np.load(path, mmap_mode="r") maps it directly.
+    Capacity doubles when it runs out, the header is rewritten with the final length by close().
+
+    Args:
+        path (str): Path of the .npy file.
+        item_shape (tuple of int): Shape of one item.
+        dtype (numpy.dtype): Data type of the items.
+        capacity (int, optional): Number of items allocated up front. Defaults to 1024.
+    """
+
+    def __init__(
+        self, path: str, item_shape: tuple, dtype: np.dtype, capacity: int = 1024
+    ):
+        self.path = path
+        self.item_shape = tuple(item_shape)
+        self.dtype = np.dtype(dtype)
+        self.item_size = int(np.prod(self.item_shape)) * self.dtype.itemsize
+        self.capacity = 0
+        self.array = None
+        with open(path, "wb"):
+            pass
+        self.grow(capacity)
+
+    def grow(self, capacity: int) -> None:
+        """Extends the file to capacity items and maps it again."""
+        with open(self.path, "r+b") as file:
+            file.write(npy_header((capacity, *self.item_shape), self.dtype))
+            file.truncate(HEADER_SIZE + capacity * self.item_size)
+        self.capacity = capacity
+        self.array = np.memmap(
+            self.path,
+            self.dtype,
+            "r+",
+            HEADER_SIZE,
+            (capacity, *self.item_shape),
+        )
+
+    def close(self, length: int) -> None:
+        """Flushes the items and cuts the file down to the first length items."""
+        self.array.flush()
+        self.array = None
+        with open(self.path, "r+b") as file:
+            file.write(npy_header((length, *self.item_shape), self.dtype))
+            file.truncate(HEADER_SIZE + length * self.item_size)
+
+
+class ArrayStore:
+    """Writes equally shaped lq/hq pairs, such as tiles, into memory mapped .npy arrays.
+
+    Every process writes its own part: <prefix>.lq.npy, <prefix>.hq.npy, the output name of
+    every slot in <prefix>.names.txt, one line per slot, and the shapes and length in <prefix>.json, with
+    prefix = part-<pid>-<random token>. A writer reserves a slot under a lock and copies its pair into the
+    mapped arrays without encoding, so any number of threads can write at once. The item
+    shape is taken from the first pair, pairs with another shape are rejected.
+
+    Args:
+        folder (str): Folder of the arrays.
+        only_lq (bool, optional): Do not store hq. Defaults to False.
+    """
+
+    def __init__(self, folder: str, only_lq: bool = False):
+        self.folder = folder
+        self.only_lq = only_lq
+        self.lock = threading.Lock()
+        self.prefix = None
+        self.arrays = {}
+        self.names = None
+        self.length = 0
+        self.finalizer = None
+
+    def __start(self, lq: np.ndarray, hq: np.ndarray | None) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        self.prefix = join(self.folder, f"part-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.arrays = {"lq": GrowableArray(f"{self.prefix}.lq.npy", lq.shape, lq.dtype)}
+        if hq is not None:
+            self.arrays["hq"] = GrowableArray(
+                f"{self.prefix}.hq.npy", hq.shape, hq.dtype
+            )
+        # Line buffered, so the names of a crashed run are still on disk
+        self.names = open(f"{self.prefix}.names.txt", "w", buffering=1)
+        self.length = 0
+        # Workers of a process pool never return to the caller, close their part on exit
+        self.finalizer = Finalize(self, ArrayStore.close, args=(self,), exitpriority=10)
+
+    def write(self, output_name: str, lq: np.ndarray, hq: np.ndarray | None) -> int:
+        """Stores one pair and returns its slot.
+
+        Raises:
+            ValueError: If the pair does not have the shape of the first pair.
+        """
+        lq = to_uint8(lq)
+        hq = None if self.only_lq else to_uint8(hq)
+        pair = {"lq": lq, "hq": hq}
+        with self.lock:
+            if self.prefix is None:
+                self.__start(lq, hq)
+            for kind, array in self.arrays.items():
+                if pair[kind].shape != array.item_shape:
+                    raise ValueError(
+                        f"{kind} shape {pair[kind].shape} differs from {array.item_shape}"
+                    )
+            slot = self.length
+            self.length += 1
+            self.names.write(f"{output_name}\n")
+            targets = {}
+            for kind, array in self.arrays.items():
+                if slot == array.capacity:
+                    array.grow(array.capacity * 2)
+                # A reference to the current mapping stays valid while another writer grows the file
+                targets[kind] = array.array
+        for kind, target in targets.items():
+            target[slot] = pair[kind]
+        return slot
+
+    def close(self) -> None:
+        """Cuts the arrays to the written length and saves the names and metadata."""
+        with self.lock:
+            if self.prefix is None:
+                return
+            for array in self.arrays.values():
+                array.close(self.length)
+            self.names.close()
+            with open(f"{self.prefix}.json", "w") as file:
+                json.dump(
+                    {
+                        "length": self.length,
+                        "shape": {
+                            kind: list(array.item_shape)
+                            for kind, array in self.arrays.items()
+                        },
+                        "dtype": self.arrays["lq"].dtype.str,
+                    },
+                    file,
+                )
+            self.prefix = None
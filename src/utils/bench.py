@@ -0,0 +1,495 @@
+import copy
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import cv2 as cv
+import numpy as np
+from pepeline import save
+from tqdm import tqdm
+
+from .pipeline import convert, run_turn
+from .registry import get_class, registered_classes
+
+# Option of every degradation whose values are benchmarked one by one, as (key, ...) paths
+CHOICES = {
+    "blur": ("filter",),
+    "compress": ("algorithm",),
+    "dithering": ("dithering_type",),
+    "halo": ("type_halo",),
+    "noise": ("type_noise",),
+    "resize": ("alg_lq",),
+    "screentone": ("color", "type_halftone"),
+    "shift": ("shift_type",),
+}
+# Probability keys set to 1, so every timed run applies the degradation
+PROBABILITIES = ("probability", "probability_one", "probability_two")
+# Timed seconds and runs of a fast case before its median is taken
+MIN_TIME = 0.2
+MAX_RUNS = 100
+# (height, width) of the images of the end-to-end dataset
+DATASET_SIZES = [(480, 640), (768, 1024), (1080, 1920), (2048, 2048), (1536, 3072)]
+# Entry point that runs one config of run_e2e in a new process
+BENCH_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "bench.py",
+)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def synthetic_image(
+    height: int, width: int, channels: int, seed: int = 0
+) -> np.ndarray:
+    """Returns a float32 image with smooth shapes, edges and fine noise, closer to a photo than pure noise.
+
+    Args:
+        height (int): Height of the image.
+        width (int): Width of the image.
+        channels (int): 1 for a gray (height, width) image, 3 for RGB.
+        seed (int, optional): Seed of the image. Defaults to 0.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    coarse = rng.random((8, 8, channels), dtype=np.float32)
+    img = cv.resize(coarse, (width, height), interpolation=cv.INTER_CUBIC)
+    img = img.reshape(shape)
+    blocks = rng.random((32, 32), dtype=np.float32) > 0.7
+    edges = cv.resize(
+        blocks.astype(np.float32), (width, height), interpolation=cv.INTER_NEAREST
+    )
+    if channels != 1:
+        edges = edges[..., None]
+    img = img * 0.7 + edges * 0.2 + rng.random(shape, dtype=np.float32) * 0.1
+    return np.clip(img, 0, 1).astype(np.float32)
+
+
+def _set_probabilities(options: dict) -> dict:
+    for key in PROBABILITIES:
+        if key in options:
+            options[key] = 1
+    for key in ("one_degradation", "two_degradation"):
+        for inner in options.get(key, []):
+            _set_probabilities(inner)
+    return options
+
+
+def micro_cases(config: dict) -> list[tuple[str, dict]]:
+    """Returns (name, options) of every benchmarked degradation.
+
+    Every degradation of config is taken with its probabilities set to 1, configs/bench_micro.hcl
+    has parameters that always change the image. The option in
+    CHOICES is split into one case per value, named type:value, the rest is benchmarked
+    as it is. Registered degradations missing from config are built with their defaults
+    where that works.
+    """
+    cases = []
+    for options in config.get("degradation", []):
+        options = _set_probabilities(copy.deepcopy(options))
+        process_type = options["type"]
+        path = CHOICES.get(process_type)
+        parent = options
+        for key in (path or ())[:-1]:
+            parent = parent.get(key, {})
+            # Blocks like color { ... } are loaded as a list of one dict
+            if isinstance(parent, list):
+                parent = parent[0] if parent else {}
+        values = parent.get(path[-1]) if path else None
+        if not values:
+            cases.append((process_type, options))
+            continue
+        for value in values:
+            parent[path[-1]] = [value]
+            cases.append((f"{process_type}:{value}", copy.deepcopy(options)))
+    named = {options["type"] for _, options in cases}
+    for process_type in sorted(set(registered_classes) - named):
+        try:
+            get_class(process_type)({"type": process_type})
+        except Exception:
+            continue
+        cases.append((process_type, {"type": process_type}))
+    return cases
+
+
+def _unchanged(result: np.ndarray, img: np.ndarray) -> bool:
+    """Whether result would be saved with the same pixels as img."""
+    return result.shape == img.shape and np.array_equal(
+        convert(result, (np.uint8,)), convert(img, (np.uint8,))
+    )
+
+
+def _time_case(
+    stage, img: np.ndarray, repeat: int, seed: int
+) -> tuple[float, str | None]:
+    """Returns the median seconds of a run of stage on img, or the error that stopped it.
+
+    Fast cases run more often than repeat, until MIN_TIME seconds or MAX_RUNS runs are timed.
+    Every run draws its parameters with its own seed. A run that returns the image unchanged
+    did no work, so it fails the case instead of being reported as throughput.
+    """
+    times = []
+    # The first run is not timed, it loads codecs and warms caches
+    run = 0
+    while run <= repeat or (sum(times) < MIN_TIME and run <= MAX_RUNS):
+        lq, hq = img.copy(), img.copy()
+        rng = np.random.default_rng([seed, run])
+        start = time.perf_counter()
+        try:
+            lq, hq = run_turn([stage], lq, hq, rng)
+        except Exception as e:
+            return float("nan"), str(e)
+        if run:
+            times.append(time.perf_counter() - start)
+        if _unchanged(lq, img) and _unchanged(hq, img):
+            return float("nan"), f"no-op: run {run} returned the input unchanged"
+        run += 1
+    return float(np.median(times)), None
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_micro(
+    config: dict,
+    sizes: list[int],
+    repeat: int = 3,
+    only: list[str] | None = None,
+    seed: int = 0,
+) -> dict:
+    """Benchmarks every case of micro_cases on synthetic gray and RGB images of every size.
+
+    Args:
+        config (dict): Config whose degradations give the parameter sets.
+        sizes (list of int): Height and width of the images.
+        repeat (int, optional): Timed runs of every case, the median is reported. Defaults to 3.
+        only (list of str, optional): Only benchmark these types. Defaults to None.
+        seed (int, optional): Seed of the images and of the degradations. Defaults to 0.
+
+    Returns:
+        dict: The environment and a result of every case, image and size, with the median
+            seconds and megapixels per second, or the error of a case that failed.
+    """
+    cases = [
+        (name, options)
+        for name, options in micro_cases(config)
+        if not only or options["type"] in only
+    ]
+    results = []
+    with tqdm(total=len(cases) * len(sizes) * 2) as pbar:
+        for size in sizes:
+            for image, channels in (("gray", 1), ("rgb", 3)):
+                img = synthetic_image(size, size, channels, seed)
+                for name, options in cases:
+                    pbar.set_postfix_str(f"{name} {image} {size}", refresh=False)
+                    stage = get_class(options["type"])(copy.deepcopy(options))
+                    seconds, error = _time_case(stage, img, repeat, seed)
+                    result = {
+                        "name": name,
+                        "image": image,
+                        "size": size,
+                        "seconds": seconds,
+                        "mpx_s": size * size / 1e6 / seconds if not error else None,
+                    }
+                    if error:
+                        result["error"] = error
+                    results.append(result)
+                    pbar.update(1)
+    return {"environment": _environment(), "repeat": repeat, "results": results}
+
+
+def _case(result: dict) -> str:
+    """Returns the name of a result with the image and size of micro results."""
+    return " ".join(
+        str(result[key]) for key in ("name", "image", "size") if key in result
+    )
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.1) -> list[dict]:
+    """Returns the results that got slower than baseline by more than threshold.
+
+    Args:
+        current (dict): Report of run_micro or run_e2e.
+        baseline (dict): Earlier report of the same kind.
+        threshold (float, optional): Allowed slowdown, 0.1 flags cases more than 10% slower.
+            Defaults to 0.1.
+
+    Returns:
+        list of dict: The case, the seconds of both runs and their ratio of every regression.
+    """
+    before = {_case(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get(_case(result))
+        if old is None or result.get("error") or old.get("error"):
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "case": _case(result),
+                    "before": old["seconds"],
+                    "after": result["seconds"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def format_micro(report: dict) -> str:
+    """Returns the results of run_micro as a table."""
+    lines = [f"{'case':<36}{'image':>6}{'size':>6}{'ms':>11}{'MP/s':>10}"]
+    for result in report["results"]:
+        if result.get("error"):
+            lines.append(
+                f"{result['name']:<36}{result['image']:>6}{result['size']:>6}"
+                f"  error: {result['error']}"
+            )
+            continue
+        lines.append(
+            f"{result['name']:<36}{result['image']:>6}{result['size']:>6}"
+            f"{result['seconds'] * 1000:>11.2f}{result['mpx_s']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def make_dataset(folder: str, count: int, seed: int = 0) -> list[str]:
+    """Writes count synthetic PNGs of varied sizes to folder, unless it already holds them.
+
+    Sizes are drawn from DATASET_SIZES and every fifth image is gray, all from seed, so
+    every machine benchmarks the same images.
+
+    Returns:
+        list of str: Filenames of the images.
+    """
+    description = {"count": count, "seed": seed, "sizes": DATASET_SIZES}
+    meta_path = os.path.join(folder, "dataset.json")
+    rng = np.random.default_rng(seed)
+    names = [f"{index:05d}.png" for index in range(count)]
+    if os.path.exists(meta_path) and load_report(meta_path) == description:
+        return names
+    os.makedirs(folder, exist_ok=True)
+    for stale in glob.glob(os.path.join(glob.escape(folder), "*.png")):
+        os.remove(stale)
+    for index, name in enumerate(tqdm(names, desc="Dataset")):
+        height, width = DATASET_SIZES[rng.integers(len(DATASET_SIZES))]
+        channels = 1 if index % 5 == 4 else 3
+        save(
+            synthetic_image(height, width, channels, seed + index),
+            os.path.join(folder, name),
+        )
+    save_report(description, meta_path)
+    return names
+
+
+def _tree_rss(root: int) -> int:
+    """Returns the resident bytes of a process and all its descendants, 0 without /proc."""
+    parents = {}
+    for stat_path in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat_path) as file:
+                stat = file.read()
+        except OSError:
+            continue
+        # The name in parentheses may contain spaces, the parent pid is the second field after it
+        fields = stat[stat.rfind(")") + 2 :].split()
+        parents[int(stat_path.split("/")[2])] = int(fields[1])
+    tree = {root}
+    changed = True
+    while changed:
+        children = {pid for pid, parent in parents.items() if parent in tree}
+        changed = not children <= tree
+        tree |= children
+    total = 0
+    for pid in tree:
+        try:
+            with open(f"/proc/{pid}/statm") as file:
+                total += int(file.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            continue
+    return total
+
+
+class ResourceMonitor:
+    """Measures the CPU time and memory of this process and its children while it is entered.
+
+    CPU time and the peak of the largest process come from getrusage, which counts children
+    once they have exited, like the workers of a process pool at the end of a run. The peak
+    of the whole process tree is sampled from /proc every interval seconds.
+
+    Args:
+        interval (float, optional): Seconds between /proc samples. Defaults to 0.2.
+    """
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.peak_total = 0
+        self.usage = {}
+
+    def __sample(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.peak_total = max(self.peak_total, _tree_rss(os.getpid()))
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.cpu = _cpu_seconds()
+        self.sampler = threading.Thread(target=self.__sample, daemon=True)
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stopped.set()
+        self.sampler.join()
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        seconds = time.perf_counter() - self.start
+        cpu = _cpu_seconds() - self.cpu
+        self.usage = {
+            "seconds": seconds,
+            "cpu_s": cpu,
+            "cpu_util": cpu / seconds / (os.cpu_count() or 1),
+            # ru_maxrss is in KB on Linux
+            "peak_rss_mb": max(own.ru_maxrss, children.ru_maxrss) / 1024,
+            "peak_total_rss_mb": self.peak_total / 1024 / 1024 or None,
+        }
+
+
+def _cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def e2e_configs(folder: str = "configs") -> list[str]:
+    """Returns the shipped configs, default.hcl, full.hcl and every custom config."""
+    return [
+        os.path.join(folder, "default.hcl"),
+        os.path.join(folder, "full.hcl"),
+    ] + sorted(glob.glob(os.path.join(glob.escape(folder), "custom", "**", "*.hcl")))
+
+
+def run_e2e(
+    configs: list[str],
+    map_types: list[str],
+    workers: list[int],
+    data: str,
+    work: str,
+    count: int = 64,
+    seed: int = 0,
+) -> dict:
+    """Runs every config under every map_type and worker count on a synthetic dataset.
+
+    Every run is a new process, `bench.py run`, so its peak memory is its own.
+
+    Args:
+        configs (list of str): Paths of the configs.
+        map_types (list of str): map_type of the runs, "for" runs once whatever the workers.
+        workers (list of int): num_workers of the runs.
+        data (str): Folder of the synthetic dataset, made by make_dataset.
+        work (str): Output folder of the runs, cleared by every run.
+        count (int, optional): Images in the dataset. Defaults to 64.
+        seed (int, optional): Seed of the dataset and of the runs. Defaults to 0.
+
+    Returns:
+        dict: The environment, the dataset and a result of every run, with images per second,
+            CPU time and utilisation and peak memory, or the error of a run that failed.
+    """
+    make_dataset(data, count, seed)
+    runs = []
+    for config in configs:
+        for map_type in map_types:
+            for num_workers in [1] if map_type == "for" else workers:
+                runs.append((config, map_type, num_workers))
+    results = []
+    for config, map_type, num_workers in tqdm(runs, desc="Runs"):
+        name = (
+            f"{os.path.splitext(os.path.basename(config))[0]} {map_type} x{num_workers}"
+        )
+        overrides = {
+            "input": data,
+            "output": work,
+            "out_clear": True,
+            "map_type": map_type,
+            "num_workers": num_workers,
+            "seed": seed,
+            "debug": False,
+            "resume": False,
+        }
+        process = subprocess.run(
+            [sys.executable, BENCH_SCRIPT, "run", config, json.dumps(overrides)],
+            capture_output=True,
+            text=True,
+        )
+        lines = [
+            line for line in process.stdout.splitlines() if line.startswith("BENCH ")
+        ]
+        result = {
+            "name": name,
+            "config": config,
+            "map_type": map_type,
+            "workers": num_workers,
+        }
+        if process.returncode or not lines:
+            result["error"] = (process.stderr or process.stdout).strip()[-500:]
+        else:
+            usage = json.loads(lines[-1][len("BENCH ") :])
+            usage["images_s"] = count / usage["seconds"]
+            result.update(usage)
+        results.append(result)
+    return {
+        "environment": _environment(),
+        "dataset": {"count": count, "seed": seed, "sizes": DATASET_SIZES},
+        "results": results,
+    }
+
+
+def format_e2e(report: dict) -> str:
+    """Returns the results of run_e2e as a table."""
+    lines = [
+        f"{'run':<36}{'img/s':>9}{'s':>9}{'cpu':>8}{'peak MB':>10}{'total MB':>10}"
+    ]
+    for result in report["results"]:
+        if result.get("error"):
+            error = result["error"].splitlines()[-1] if result["error"] else ""
+            lines.append(f"{result['name']:<36}  error: {error}")
+            continue
+        total = result["peak_total_rss_mb"]
+        lines.append(
+            f"{result['name']:<36}{result['images_s']:>9.2f}{result['seconds']:>9.2f}"
+            f"{result['cpu_util']:>8.0%}{result['peak_rss_mb']:>10.0f}"
+            f"{total if total is not None else float('nan'):>10.0f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+import uuid
+from os.path import join
+from typing import Callable
+
+import numpy as np
+
+
+class DecodeCache:
+    """Decoded input images kept on disk as .npy files that later runs memory map.
+
+    An entry is keyed by the absolute path, modification time and size of the input file and
+    by how it was decoded, so a changed file is decoded again. Entries are mapped copy-on-write:
+    degradations may write into the image without changing the cache. When the folder grows
+    beyond its size, the least recently used entries are deleted. Several processes can share a folder,
+    entries are written to a temporary file and renamed into place.
+
+    Args:
+        folder (str): Folder of the cache.
+        size (float, optional): Maximum size of the folder in MB. Defaults to 10240.
+    """
+
+    def __init__(self, folder: str, size: float = 10240):
+        self.folder = os.path.expanduser(folder)
+        self.limit = int(size * 1024 * 1024)
+        self.lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+        self.size = self.__scan()[1]
+
+    def __scan(self) -> tuple[list, int]:
+        """Returns (mtime, size, path) of every entry, oldest first, and their total size."""
+        entries = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith(".npy"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        return entries, sum(size for _, size, _ in entries)
+
+    def __key(self, path: str, variant: str) -> str:
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}\0{variant}"
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def get(
+        self, path: str, variant: str, decode: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        """Returns the cached image of path, or decodes it with decode() and caches it.
+
+        Args:
+            path (str): Input file.
+            variant (str): How decode() decodes the file, part of the key.
+            decode (Callable): Decodes the file.
+        """
+        entry = join(self.folder, f"{self.__key(path, variant)}.npy")
+        try:
+            img = np.load(entry, mmap_mode="c")
+            # The modification time orders the entries for eviction
+            os.utime(entry)
+            return np.asarray(img)
+        except (FileNotFoundError, ValueError, OSError):
+            pass
+        img = decode()
+        self.__put(entry, img)
+        return img
+
+    def __put(self, entry: str, img: np.ndarray) -> None:
+        if img.nbytes > self.limit:
+            return
+        temporary = f"{entry}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                np.save(file, img)
+            os.replace(temporary, entry)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        with self.lock:
+            self.size += img.nbytes
+            if self.size > self.limit:
+                self.__evict()
+
+    def __evict(self) -> None:
+        """Deletes the least recently used entries until the folder is below 90% of its size."""
+        entries, self.size = self.__scan()
+        target = self.limit * 0.9
+        for _, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
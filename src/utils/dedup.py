@@ -0,0 +1,111 @@
+import hashlib
+import os
+import shutil
+import threading
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl that makes a copy-on-write clone of a file on btrfs, xfs and other Linux file systems
+FICLONE = 0x40049409
+
+
+def reflink(source: str, destination: str) -> None:
+    """Makes destination a copy-on-write clone of source, raises OSError where that is not supported."""
+    if fcntl is None:
+        raise OSError("reflink is not supported on this platform")
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+
+
+def clone_file(source: str, destination: str, mode: str) -> None:
+    """Materializes destination from source without decoding it.
+
+    Args:
+        source (str): Existing file.
+        destination (str): File to create, replaced if it exists.
+        mode (str): "hardlink", "reflink" or "copy". Hardlinks and reflinks fall back to a copy
+            when the file system does not support them.
+    """
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        if mode == "hardlink":
+            os.link(source, destination)
+            return
+        if mode == "reflink":
+            reflink(source, destination)
+            return
+    except OSError:
+        pass
+    shutil.copyfile(source, destination)
+
+
+def array_digest(img: np.ndarray) -> bytes:
+    """Returns a digest of the shape, type and content of an array."""
+    digest = hashlib.blake2b(f"{img.shape}{img.dtype}".encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(img).data)
+    return digest.digest()
+
+
+class SharedOutput:
+    """A file shared by several outputs with identical content.
+
+    The first output to be saved writes the file, every later one is hardlinked to it.
+    Outputs that go into a container share the encoded bytes instead. Safe to use from
+    several writer threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.path = None
+        self.data = None
+
+    def save(self, save_function: Callable[[str], None], path: str) -> None:
+        with self.lock:
+            if self.path is None:
+                save_function(path)
+                self.path = path
+            else:
+                clone_file(self.path, path, "hardlink")
+
+    def encode(self, encode_function: Callable[[], bytes]) -> bytes:
+        """Returns the encoded file, encoding it only for the first output."""
+        with self.lock:
+            if self.data is None:
+                self.data = encode_function()
+            return self.data
+
+
+class SourceHq(NamedTuple):
+    """HQ that is still the decoded input file, saved by cloning the file instead of encoding.
+
+    Attributes:
+        img (numpy.ndarray): HQ image, encoded if the file cannot be cloned.
+        path (str): Path of the input file.
+    """
+
+    img: np.ndarray
+    path: str
+
+
+class SharedHq(NamedTuple):
+    """HQ of a variant, saved once per distinct content.
+
+    Attributes:
+        img (numpy.ndarray or SourceHq): HQ image.
+        output (SharedOutput): File shared by every variant with the same HQ.
+    """
+
+    img: np.ndarray | SourceHq
+    output: SharedOutput
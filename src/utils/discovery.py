@@ -0,0 +1,93 @@
+import math
+import os
+from itertools import islice
+from os.path import join, splitext
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+def normalize_extensions(extensions: list[str] | None) -> set[str] | None:
+    """Returns the extensions as a lowercase set with a leading dot, None keeps every file."""
+    if not extensions:
+        return None
+    return {
+        extension.lower() if extension.startswith(".") else f".{extension.lower()}"
+        for extension in extensions
+    }
+
+
+def scan_images(
+    folder: str,
+    recursive: bool = False,
+    extensions: set[str] | None = None,
+    sort: bool = False,
+) -> Iterator[str]:
+    """Yields the files of a folder relative to it, while the folder is still being listed.
+
+    os.scandir reports the entry type from the directory listing itself, so unlike
+    os.path.isfile no stat call is needed per file. Files come in the order of the
+    directory listing, which is stable for an unchanged folder on one file system, and
+    subdirectories are walked depth first after the files.
+
+    Args:
+        folder (str): Input folder.
+        recursive (bool, optional): Also walk subdirectories. Defaults to False.
+        extensions (set of str, optional): Lowercase extensions to keep, None keeps every file.
+            Defaults to None.
+        sort (bool, optional): Sort the entries of every directory by name, so the order is
+            the same on every machine and file system. A directory is then listed completely
+            before its first file is yielded. Defaults to False.
+    """
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        subdirs = []
+        with os.scandir(join(folder, relative)) as entries:
+            if sort:
+                entries = sorted(entries, key=lambda entry: entry.name)
+            for entry in entries:
+                name = join(relative, entry.name) if relative else entry.name
+                if entry.is_file():
+                    if (
+                        extensions is None
+                        or splitext(entry.name)[1].lower() in extensions
+                    ):
+                        yield name
+                elif recursive and entry.is_dir():
+                    subdirs.append(name)
+        stack.extend(reversed(subdirs))
+
+
+def reservoir_sample(
+    names: Iterable[str], size: int, rng: np.random.Generator
+) -> list[str]:
+    """Picks a uniform random subset of size names in one pass with O(size) memory.
+
+    Uses Li's Algorithm L, which draws random numbers only for the names that enter
+    the reservoir instead of one per name. The subset keeps the discovery order.
+
+    Args:
+        names (iterable of str): Names in discovery order.
+        size (int): Number of names to keep.
+        rng (numpy.random.Generator): Random generator of the run.
+    """
+    names = iter(names)
+    reservoir = list(enumerate(islice(names, size)))
+    if len(reservoir) < size or size == 0:
+        return [name for _, name in reservoir]
+    weight = math.exp(math.log(rng.random()) / size)
+    position = size - 1
+    next_position = (
+        position + math.floor(math.log(rng.random()) / math.log(1 - weight)) + 1
+    )
+    for name in names:
+        position += 1
+        if position == next_position:
+            reservoir[int(rng.integers(size))] = (position, name)
+            weight *= math.exp(math.log(rng.random()) / size)
+            next_position += (
+                math.floor(math.log(rng.random()) / math.log(1 - weight)) + 1
+            )
+    reservoir.sort()
+    return [name for _, name in reservoir]
@@ -0,0 +1,120 @@
+import cv2 as cv
+import numpy as np
+
+# zlib levels of the PNG compression presets
+PNG_COMPRESSION = {"none": 0, "fast": 1, "max": 9}
+EXTENSIONS = {"png": ".png", "ppm": ".ppm", "qoi": ".qoi"}
+
+
+def to_uint8(img: np.ndarray) -> np.ndarray:
+    """Converts a float image in [0, 1] to uint8 the same way pepeline.save does."""
+    if img.dtype == np.uint8:
+        return img
+    return np.clip(img * 255, 0, 255).astype(np.uint8)
+
+
+def _to_bgr(img: np.ndarray) -> np.ndarray:
+    """Returns a uint8 image in the channel order of cv.imencode, gray as a 2D array."""
+    img = to_uint8(img)
+    if img.ndim == 3 and img.shape[2] == 1:
+        return img[..., 0]
+    if img.ndim == 3:
+        return cv.cvtColor(img, cv.COLOR_RGB2BGR)
+    return img
+
+
+def encode_png(img: np.ndarray, compression: int = 1) -> bytes:
+    """Encodes an RGB or gray image to PNG bytes with the same pixels pepeline.save would write."""
+    ok, data = cv.imencode(
+        ".png", _to_bgr(img), [cv.IMWRITE_PNG_COMPRESSION, compression]
+    )
+    if not ok:
+        raise ValueError("PNG encoding failed")
+    return data.tobytes()
+
+
+def encode_ppm(img: np.ndarray) -> bytes:
+    """Encodes an image to binary PPM (P6), which stores the pixels uncompressed.
+
+    Gray images are written as three equal channels, so every file matches its .ppm extension.
+    """
+    img = _to_bgr(img)
+    if img.ndim == 2:
+        img = np.repeat(img[..., None], 3, axis=2)
+    ok, data = cv.imencode(".ppm", img)
+    if not ok:
+        raise ValueError("PPM encoding failed")
+    return data.tobytes()
+
+
+def encode_qoi(img: np.ndarray) -> bytes:
+    """Encodes an image to QOI using only the RGB and run operations.
+
+    Every other QOI operation depends on the state left by all previous pixels, these two can
+    be laid out with numpy at once. The file is larger than a full QOI encoder would make it,
+    but any QOI decoder reads it.
+    """
+    img = to_uint8(img)
+    if img.ndim == 2 or img.shape[2] == 1:
+        img = np.repeat(img.reshape(img.shape[0], img.shape[1], 1), 3, axis=2)
+    height, width = img.shape[:2]
+    pixels = img.reshape(-1, 3)
+    previous = np.concatenate([np.zeros((1, 3), np.uint8), pixels[:-1]])
+    repeat = (pixels == previous).all(axis=1)
+    # Position of every repeated pixel inside its run
+    run_start = np.flatnonzero(repeat & ~np.concatenate([[False], repeat[:-1]]))
+    run_end = np.flatnonzero(repeat & ~np.concatenate([repeat[1:], [False]])) + 1
+    run_offset = np.zeros(len(pixels), np.int64)
+    run_offset[run_start] = run_start
+    run_offset = np.maximum.accumulate(run_offset)
+    position = np.arange(len(pixels)) - run_offset
+    run_length = np.zeros(len(pixels), np.int64)
+    run_length[run_start] = run_end - run_start
+    run_length = run_length[run_offset]
+    # A run operation covers at most 62 pixels, one byte at the first pixel of every 62
+    run_byte = repeat & (position % 62 == 0)
+    sizes = np.where(repeat, run_byte.astype(np.int64), 4)
+    offsets = np.cumsum(sizes) - sizes
+    body = np.zeros(int(sizes.sum()), np.uint8)
+    literal = np.flatnonzero(~repeat)
+    body[offsets[literal]] = 0xFE
+    for channel in range(3):
+        body[offsets[literal] + 1 + channel] = pixels[literal, channel]
+    runs = np.flatnonzero(run_byte)
+    remaining = np.minimum(62, run_length[runs] - position[runs])
+    body[offsets[runs]] = 0xC0 | (remaining - 1)
+    header = (
+        b"qoif" + width.to_bytes(4, "big") + height.to_bytes(4, "big") + bytes([3, 0])
+    )
+    return header + body.tobytes() + b"\x00" * 7 + b"\x01"
+
+
+class ImageWriter:
+    """Encodes images to a configurable format.
+
+    Args:
+        format (str, optional): "png", "ppm" (uncompressed PPM, gray as RGB) or "qoi". Defaults to "png".
+        compression (str or int, optional): PNG compression, "none", "fast", "max" or a zlib
+            level from 0 to 9. Defaults to "fast".
+
+    Attributes:
+        extension (str): File extension of the format.
+    """
+
+    def __init__(self, format: str = "png", compression: str | int = "fast"):
+        if format not in EXTENSIONS:
+            raise ValueError(f"Unknown output format {format}")
+        self.format = format
+        self.extension = EXTENSIONS[format]
+        self.compression = PNG_COMPRESSION.get(compression, compression)
+
+    def encode(self, img: np.ndarray) -> bytes:
+        if self.format == "ppm":
+            return encode_ppm(img)
+        if self.format == "qoi":
+            return encode_qoi(img)
+        return encode_png(img, self.compression)
+
+    def write(self, img: np.ndarray, path: str) -> None:
+        with open(path, "wb") as file:
+            file.write(self.encode(img))
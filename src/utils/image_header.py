@@ -0,0 +1,62 @@
+import struct
+from typing import NamedTuple
+
+import pepeline
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Chunks that change how decoded pixels look (transparency, gamma, color space, significant bits),
+# a file with any of them is not the same as the pixels encoded again
+APPEARANCE_CHUNKS = frozenset({"tRNS", "gAMA", "cHRM", "iCCP", "sRGB", "sBIT", "cICP"})
+
+
+class PngHeader(NamedTuple):
+    """Fields of the IHDR chunk of a PNG file.
+
+    Attributes:
+        width (int): Image width.
+        height (int): Image height.
+        bit_depth (int): Bits per sample.
+        color_type (int): 0 gray, 2 RGB, 3 palette, 4 gray with alpha, 6 RGB with alpha.
+        chunks (tuple of str): Types of the chunks before the image data, starting with IHDR.
+    """
+
+    width: int
+    height: int
+    bit_depth: int
+    color_type: int
+    chunks: tuple = ()
+
+
+def read_png_header(path: str) -> PngHeader | None:
+    """Reads the IHDR chunk and the chunk list up to the image data of a PNG file without decoding it.
+
+    Returns None if the file is not a PNG.
+    """
+    with open(path, "rb") as file:
+        data = file.read(26)
+        if len(data) < 26 or data[:8] != PNG_SIGNATURE or data[12:16] != b"IHDR":
+            return None
+        width, height, bit_depth, color_type = struct.unpack(">IIBB", data[16:26])
+        # Chunks that affect the pixels have to come before IDAT, skip from header to header
+        chunks = []
+        file.seek(8)
+        while True:
+            chunk = file.read(8)
+            if len(chunk) < 8:
+                break
+            length, chunk_type = struct.unpack(">I4s", chunk)
+            chunk_type = chunk_type.decode("latin-1")
+            if chunk_type in ("IDAT", "IEND"):
+                break
+            chunks.append(chunk_type)
+            file.seek(length + 4, 1)
+    return PngHeader(width, height, bit_depth, color_type, tuple(chunks))
+
+
+def read_size(path: str) -> tuple[int, int] | None:
+    """Reads (height, width) of an image from its header without decoding it, None if it cannot be read."""
+    try:
+        width, height = pepeline.read_size(str(path))
+    except Exception:
+        return None
+    return height, width
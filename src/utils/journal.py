@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+
+
+class Journal:
+    """Append-only log of the indices of completed work items.
+
+    Every index is written as a little-endian int64 with a single write to a file
+    opened with O_APPEND, so threads and processes can share one journal without locks.
+
+    Args:
+        path (str): Path of the journal file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def completed(self) -> np.ndarray:
+        """Returns the indices of all completed items and cuts off a torn last record."""
+        if not os.path.exists(self.path):
+            return np.zeros(0, dtype="<i8")
+        with open(self.path, "rb") as file:
+            data = file.read()
+        if len(data) % 8:
+            data = data[: len(data) - len(data) % 8]
+            os.truncate(self.path, len(data))
+        return np.frombuffer(data, dtype="<i8")
+
+    def pending_mask(self, indices: np.ndarray) -> np.ndarray:
+        """Returns a mask that is True for the indices that are not completed yet."""
+        if len(indices) == 0:
+            return np.zeros(0, dtype=bool)
+        done = np.zeros(int(indices.max()) + 1, dtype=bool)
+        completed = self.completed()
+        done[completed[completed < len(done)]] = True
+        return ~done[indices]
+
+    def append(self, index: int) -> None:
+        """Marks the item with the given index as completed."""
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, np.int64(index).astype("<i8").tobytes())
+        finally:
+            os.close(fd)
+
+    def remove(self) -> None:
+        """Deletes the journal file."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
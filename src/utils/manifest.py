@@ -0,0 +1,271 @@
+import json
+from typing import Callable, Iterable, NamedTuple
+
+import numpy as np
+
+
+class WorkItem(NamedTuple):
+    """A single unit of work handed to the workers.
+
+    Attributes:
+        index (int): Global index of the image, used for the output name and the seed.
+        seed (int): Seed of the random generator used for this image.
+        name (str): Filename of the image relative to the input folder.
+        output_name (str): Filename under which the result is saved.
+    """
+
+    index: int
+    seed: int
+    name: str
+    output_name: str
+
+    @classmethod
+    def create(cls, index: int, seed: int, name: str, real_name: bool) -> "WorkItem":
+        """Returns the work item of an image, saved under its own name or under the index."""
+        return cls(index, seed, name, name if real_name else f"{index}.png")
+
+
+class TileWindow(NamedTuple):
+    """A crop of a decoded image that is degraded and saved on its own.
+
+    Attributes:
+        key (tuple of int): (Kx, Ky) of a grid tile or (k,) of a random crop, used for the
+            output name and mixed into the seed.
+        x (int): Top row of the crop.
+        y (int): Left column of the crop.
+        height (int): Height of the crop.
+        width (int): Width of the crop.
+    """
+
+    key: tuple
+    x: int
+    y: int
+    height: int
+    width: int
+
+    def output_name(self, item: WorkItem) -> str:
+        return f"{item.index}_{'_'.join(map(str, self.key))}.png"
+
+    def seed(self, item: WorkItem) -> list[int]:
+        return [item.seed, *self.key]
+
+
+class Manifest:
+    """Array-backed list of work items built once at startup.
+
+    Filenames are stored as one utf-8 buffer with an offsets array, indices and seeds
+    as int64 arrays, so a manifest of millions of items stays compact and every
+    item is looked up in O(1).
+
+    Args:
+        names (list of str): Filenames relative to the input folder, in processing order.
+        base_seed (int): Seed of the run, the seed of an item is base_seed + index.
+        real_name (bool, optional): Save results under the input filename instead of the index.
+            Defaults to False.
+
+    Attributes:
+        blob (numpy.ndarray): Concatenated utf-8 encoded filenames.
+        starts (numpy.ndarray): Start of every filename in blob.
+        ends (numpy.ndarray): End of every filename in blob.
+        indices (numpy.ndarray): Global index of every item.
+        seeds (numpy.ndarray): Seed of every item.
+        total (int): Number of items in the full run, a shard or a resumed run holds fewer.
+        fingerprint (dict): Settings of the run that wrote the manifest, None when unknown.
+    """
+
+    def __init__(self, names: list[str], base_seed: int, real_name: bool = False):
+        encoded = [name.encode() for name in names]
+        self.blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        self.ends = np.cumsum([len(name) for name in encoded], dtype=np.int64)
+        self.starts = self.ends - [len(name) for name in encoded]
+        self.indices = np.arange(len(encoded), dtype=np.int64)
+        self.base_seed = int(base_seed)
+        self.seeds = self.indices + self.base_seed
+        self.total = len(encoded)
+        self.real_name = real_name
+        self.fingerprint = None
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, position: int) -> WorkItem:
+        start, end = self.starts[position], self.ends[position]
+        name = self.blob[start:end].tobytes().decode()
+        return WorkItem.create(
+            int(self.indices[position]), int(self.seeds[position]), name, self.real_name
+        )
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def select(self, mask: np.ndarray) -> "Manifest":
+        """Returns the items where mask is True, keeping their index and seed."""
+        manifest = self.__class__.__new__(self.__class__)
+        manifest.blob = self.blob
+        manifest.starts = self.starts[mask]
+        manifest.ends = self.ends[mask]
+        manifest.indices = self.indices[mask]
+        manifest.seeds = self.seeds[mask]
+        manifest.base_seed = self.base_seed
+        manifest.total = self.total
+        manifest.real_name = self.real_name
+        manifest.fingerprint = self.fingerprint
+        return manifest
+
+    def reorder(self, order: np.ndarray) -> "Manifest":
+        """Returns the items at the positions in order, in that order, keeping their index and seed."""
+        return self.select(order)
+
+    def shard(self, shard_index: int, shard_count: int) -> "Manifest":
+        """Returns the items whose index modulo shard_count equals shard_index."""
+        return self.select(self.indices % shard_count == shard_index)
+
+    def names(self) -> list[str]:
+        """Returns the filenames of all items in order."""
+        return [item.name for item in self]
+
+    def save(self, path: str) -> None:
+        """Saves the manifest as an uncompressed .npz archive.
+
+        The names of unselected items are dropped from the blob, so a shard only stores its own names.
+        """
+        lengths = self.ends - self.starts
+        ends = np.cumsum(lengths, dtype=np.int64)
+        starts = ends - lengths
+        blob = self.blob[
+            np.arange(ends[-1] if len(ends) else 0)
+            + np.repeat(self.starts - starts, lengths)
+        ]
+        np.savez(
+            path,
+            blob=blob,
+            starts=starts,
+            ends=ends,
+            indices=self.indices,
+            seeds=self.seeds,
+            base_seed=self.base_seed,
+            total=self.total,
+            real_name=bool(self.real_name),
+            fingerprint=json.dumps(self.fingerprint),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        """Loads a manifest written by save."""
+        data = np.load(path)
+        manifest = cls.__new__(cls)
+        manifest.blob = data["blob"]
+        manifest.starts = data["starts"]
+        manifest.ends = data["ends"]
+        manifest.indices = data["indices"]
+        manifest.seeds = data["seeds"]
+        manifest.base_seed = int(data["base_seed"])
+        manifest.total = (
+            int(data["total"]) if "total" in data else len(manifest.indices)
+        )
+        manifest.real_name = bool(data["real_name"])
+        # Manifests of older runs have no fingerprint
+        manifest.fingerprint = (
+            json.loads(str(data["fingerprint"])) if "fingerprint" in data else None
+        )
+        return manifest
+
+
+class ManifestStream:
+    """Hands out work items while the input folder is still being listed.
+
+    Items get the same index and seed as in a Manifest built from the full listing.
+    The manifest itself is available once the iteration is finished.
+
+    Args:
+        names (iterable of str): Filenames relative to the input folder, in processing order.
+        base_seed (int): Seed of the run, the seed of an item is base_seed + index.
+        real_name (bool, optional): Save results under the input filename instead of the index.
+            Defaults to False.
+        shard (list of int, optional): [shard_index, shard_count], only the items of this shard are
+            handed out. Defaults to None.
+        skip (Callable, optional): Filenames for which it returns True are not handed out, but keep
+            their index and stay in the manifest. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        base_seed: int,
+        real_name: bool = False,
+        shard: list[int] | None = None,
+        skip: Callable[[str], bool] | None = None,
+    ):
+        self.source = names
+        self.base_seed = int(base_seed)
+        self.real_name = real_name
+        self.shard = shard
+        self.skip = skip
+        self.names = []
+
+    def __iter__(self):
+        for index, name in enumerate(self.source):
+            self.names.append(name)
+            if self.shard and index % self.shard[1] != self.shard[0]:
+                continue
+            if self.skip and self.skip(name):
+                continue
+            yield WorkItem.create(index, self.base_seed + index, name, self.real_name)
+
+    def manifest(self) -> Manifest:
+        """Returns the manifest of every item handed out so far."""
+        manifest = Manifest(self.names, self.base_seed, self.real_name)
+        if self.shard:
+            manifest = manifest.shard(*self.shard)
+        return manifest
+
+
+def merge_manifests(manifests: list[Manifest]) -> Manifest:
+    """Merges the manifests of all shards of a run into the manifest of the full run.
+
+    Args:
+        manifests (list of Manifest): Manifests of every shard.
+
+    Returns:
+        Manifest: Manifest with every item of the run, ordered by index.
+
+    Raises:
+        ValueError: If the shards come from different runs, overlap or miss items.
+    """
+    if not manifests:
+        raise ValueError("No manifests to merge")
+    first = manifests[0]
+    for manifest in manifests[1:]:
+        if (
+            manifest.base_seed,
+            manifest.total,
+            manifest.real_name,
+            manifest.fingerprint,
+        ) != (first.base_seed, first.total, first.real_name, first.fingerprint):
+            raise ValueError("Manifests belong to different runs")
+    indices = np.concatenate([manifest.indices for manifest in manifests])
+    counts = (
+        np.bincount(indices, minlength=first.total)
+        if len(indices)
+        else np.zeros(first.total, dtype=np.int64)
+    )
+    if len(counts) > first.total:
+        raise ValueError(
+            f"Index {len(counts) - 1} is outside of the run of {first.total} items"
+        )
+    if (counts > 1).any():
+        raise ValueError(
+            f"{int((counts > 1).sum())} items are in more than one shard, first index {int(np.argmax(counts > 1))}"
+        )
+    if (counts == 0).any():
+        raise ValueError(
+            f"{int((counts == 0).sum())} items are missing, first index {int(np.argmin(counts))}"
+        )
+    names = [name for manifest in manifests for name in manifest.names()]
+    order = np.argsort(indices, kind="stable")
+    merged = Manifest(
+        [names[position] for position in order], first.base_seed, first.real_name
+    )
+    merged.fingerprint = first.fingerprint
+    return merged
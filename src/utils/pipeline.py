@@ -0,0 +1,67 @@
+import numpy as np
+
+from . import profiler
+from .encode import to_uint8
+
+# Dtypes of a stage that does not declare any
+FLOAT32 = (np.float32,)
+# Dtypes the writers save as they are, everything else is converted to the first one
+STORED = (np.uint8, np.float32)
+DTYPES = {"float32": np.float32, "float16": np.float16, "uint8": np.uint8}
+
+
+def convert(img: np.ndarray, dtypes: tuple) -> np.ndarray:
+    """Returns img in the first of dtypes, or img itself when it already has one of them.
+
+    Floats are in [0, 1], uint8 in [0, 255]. uint8 becomes float by dividing by 255, as the
+    degradations did when they converted back, float32 becomes uint8 the way pepeline.save does,
+    float16 is rounded, because truncating it would lose a level on many pixels.
+    """
+    if img.dtype in dtypes:
+        return img
+    dtype = np.dtype(dtypes[0])
+    # float16 holds 8-bit data with rounding error, a stage that takes uint8 gets it back exactly
+    if img.dtype == np.float16 and np.uint8 in dtypes:
+        dtype = np.dtype(np.uint8)
+    if dtype == np.uint8:
+        if img.dtype == np.float16:
+            return np.clip(np.rint(img.astype(np.float32) * 255), 0, 255).astype(
+                np.uint8
+            )
+        return to_uint8(img)
+    if img.dtype == np.uint8:
+        return img.astype(dtype) / dtype.type(255)
+    return img.astype(dtype)
+
+
+def run_turn(
+    turn: list, lq: np.ndarray, hq: np.ndarray, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """Runs lq and hq through a list of degradations, converting them only where a stage needs it.
+
+    A stage lists the dtypes its run accepts in a dtypes attribute, preferred first, and gets
+    float32 when it has none. Images already in an accepted dtype are passed on as they are,
+    so a stage that returns uint8 hands it straight to the next one that takes uint8. A stage
+    with dtypes = None, like and/or, gets the images unchanged and converts in its own turns.
+
+    A stage that changes hq returns a new array. When hq comes back as the converted copy it
+    was given, the original is kept, so an unchanged hq stays the decoded image.
+    """
+    hq_source, hq_copy = None, None
+    for stage in turn:
+        dtypes = getattr(stage, "dtypes", FLOAT32)
+        # The time of a stage includes the conversions it needs
+        with profiler.timed(stage, lq.shape[0] * lq.shape[1]):
+            if dtypes is None:
+                lq, hq = stage.run(lq, hq, rng)
+                continue
+            lq = convert(lq, dtypes)
+            stage_hq = hq
+            if hq.dtype not in dtypes:
+                if hq_source is not hq or hq_copy.dtype not in dtypes:
+                    hq_source, hq_copy = hq, convert(hq, dtypes)
+                stage_hq = hq_copy
+            lq, result_hq = stage.run(lq, stage_hq, rng)
+        if result_hq is not stage_hq:
+            hq = result_hq
+    return lq, hq
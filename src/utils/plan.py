@@ -0,0 +1,246 @@
+import time
+from collections import Counter
+
+import numpy as np
+
+from .pipeline import FLOAT32
+from .registry import registered_classes
+
+# Longest side of the stand-in image the stages of a planned unit run on
+PLAN_SIDE = 64
+# Results of every input the calibration run degrades
+CALIBRATION_UNITS = 16
+
+
+def stand_in_shape(height: int, width: int, channels: int) -> tuple:
+    """Returns the shape of a small image with the aspect ratio and channels of a height x width image."""
+    scale = min(1.0, PLAN_SIDE / max(height, width))
+    shape = (max(8, round(height * scale)), max(8, round(width * scale)))
+    return shape if channels == 1 else (*shape, channels)
+
+
+def stand_in(shape: tuple) -> np.ndarray:
+    """Returns a fixed image of shape with some texture, so stages that look at the pixels do not fail."""
+    rows = np.linspace(0, 1, shape[0], dtype=np.float32)[:, None]
+    columns = np.linspace(0, 1, shape[1], dtype=np.float32)[None, :]
+    img = (np.sin(rows * 17 + columns * 11) * 0.25 + 0.5).astype(np.float32)
+    if len(shape) == 3:
+        img = np.repeat(img[..., None], shape[2], axis=2)
+    return img
+
+
+class StageRecord:
+    """What a planned stage did over all planned units.
+
+    Attributes:
+        runs (int): Units the stage was reached in.
+        applied (int): Units the stage passed its probability and changed the image in.
+        errors (int): Units the stage failed on, usually because the stand-in image is small.
+        choices (dict): Counter of the values rng.choice returned, by the options they came from.
+        megapixels (float): Megapixels of the real images the stage was applied to.
+        seconds (float): Seconds the stage took on the real images of the calibration run.
+        calibrated_megapixels (float): Megapixels of the calibration run the stage was applied to.
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.applied = 0
+        self.errors = 0
+        self.choices = {}
+        self.megapixels = 0.0
+        self.seconds = 0.0
+        self.calibrated_megapixels = 0.0
+
+    def cost(self) -> float | None:
+        """Returns the seconds per megapixel measured by the calibration run, None if it never applied the stage."""
+        if not self.calibrated_megapixels:
+            return None
+        return self.seconds / self.calibrated_megapixels
+
+
+class _Frame:
+    def __init__(self, path: str):
+        self.path = path
+        self.draws = 0
+        self.nested_applied = False
+
+
+class PlanRecorder:
+    """Collects the StageRecord of every stage path while planned turns run.
+
+    The random generator of a unit is wrapped with generator(), so every draw is counted
+    for the stage that makes it and the values of rng.choice are recorded.
+
+    Attributes:
+        stages (dict): StageRecord by stage path, and/compress for stages inside and/or.
+        calibrating (bool): The units are real images, stage times are recorded as calibration.
+        scale (float): Real pixels per pixel of the image the current unit runs on.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.frames = []
+        self.calibrating = False
+        self.scale = 1.0
+
+    def generator(self, rng: np.random.Generator) -> "RecordingGenerator":
+        return RecordingGenerator(rng, self)
+
+    def draw(self, options, value) -> None:
+        """Counts a draw of the current stage, and the value of a choice from options."""
+        if not self.frames:
+            return
+        frame = self.frames[-1]
+        frame.draws += 1
+        if options is None or np.ndim(value) != 0:
+            return
+        options = np.asarray(options)
+        label = (
+            str(options.item()) if options.ndim == 0 else "|".join(map(str, options))
+        )
+        if len(label) > 60:
+            label = label[:57] + "..."
+        choices = self.stages[frame.path].choices
+        choices.setdefault(label, Counter())[str(value)] += 1
+
+    def run(self, stage: "PlannedStage", lq: np.ndarray, hq: np.ndarray, rng):
+        parent = self.frames[-1].path + "/" if self.frames else ""
+        path = parent + stage.name
+        record = self.stages.setdefault(path, StageRecord())
+        frame = _Frame(path)
+        self.frames.append(frame)
+        pixels = lq.shape[0] * lq.shape[1]
+        start = time.perf_counter()
+        try:
+            result = stage.stage.run(lq, hq, rng)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.frames.pop()
+        record.runs += 1
+        if result is None:
+            record.errors += 1
+            return lq, hq
+        operator = getattr(stage.stage, "dtypes", FLOAT32) is None
+        # A stage stopped by its probability makes one draw and returns the image it was given
+        applied = (
+            frame.nested_applied if operator else result[0] is not lq or frame.draws > 1
+        )
+        if applied:
+            record.applied += 1
+            megapixels = pixels * self.scale / 1e6
+            record.megapixels += megapixels
+            if self.calibrating and not operator:
+                record.seconds += elapsed
+                record.calibrated_megapixels += megapixels
+            if self.frames:
+                self.frames[-1].nested_applied = True
+        return result
+
+
+class RecordingGenerator:
+    """numpy.random.Generator that reports its draws to a PlanRecorder.
+
+    Args:
+        rng (numpy.random.Generator): Generator that makes the draws.
+        recorder (PlanRecorder): Recorder of the draws.
+    """
+
+    def __init__(self, rng: np.random.Generator, recorder: PlanRecorder):
+        self.rng = rng
+        self.recorder = recorder
+
+    def choice(self, a, *args, **kwargs):
+        value = self.rng.choice(a, *args, **kwargs)
+        self.recorder.draw(a, value)
+        return value
+
+    def __getattr__(self, name: str):
+        method = getattr(self.rng, name)
+        if not callable(method):
+            return method
+
+        def counted(*args, **kwargs):
+            self.recorder.draw(None, None)
+            return method(*args, **kwargs)
+
+        return counted
+
+
+class PlannedStage:
+    """A stage of a turn whose runs are recorded by a PlanRecorder.
+
+    Args:
+        stage: The degradation.
+        recorder (PlanRecorder): Recorder of the runs.
+    """
+
+    def __init__(self, stage, recorder: PlanRecorder):
+        self.stage = stage
+        self.recorder = recorder
+        cls = type(stage)
+        self.name = next(
+            (key for key, value in registered_classes.items() if value is cls),
+            cls.__name__,
+        )
+        self.dtypes = getattr(stage, "dtypes", FLOAT32)
+
+    def run(self, lq: np.ndarray, hq: np.ndarray, rng) -> tuple:
+        return self.recorder.run(self, lq, hq, rng)
+
+
+def planned_turn(turn: list, recorder: PlanRecorder) -> list:
+    """Returns turn with every stage wrapped in a PlannedStage, including the turns of and/or.
+
+    The turns of and/or stages are replaced in place, build the turn again to run it for real.
+    """
+    for stage in turn:
+        for attribute in ("turn_one", "turn_two"):
+            inner = getattr(stage, attribute, None)
+            if isinstance(inner, list):
+                setattr(stage, attribute, planned_turn(inner, recorder))
+    return [PlannedStage(stage, recorder) for stage in turn]
+
+
+def format_plan(plan: dict) -> str:
+    """Returns the stages, their choices and the estimated cost of ImgProcess.plan as text."""
+    lines = [
+        f"Plan - {plan['items']} images, {plan['units']} results, "
+        f"{plan['megapixels']:.1f} MP"
+        + (f", {plan['unreadable']} headers unreadable" if plan["unreadable"] else "")
+    ]
+    lines.append(
+        f"{'stage':<32}{'reached':>9}{'applied':>9}{'errors':>8}{'s/MP':>9}{'est. s':>10}"
+    )
+    for path, stage in plan["stages"].items():
+        cost = f"{stage['cost']:>9.3f}" if stage["cost"] is not None else f"{'-':>9}"
+        estimate = (
+            f"{stage['seconds']:>10.1f}"
+            if stage["seconds"] is not None
+            else f"{'-':>10}"
+        )
+        lines.append(
+            f"{path:<32}{stage['runs']:>9}{stage['applied']:>9}{stage['errors']:>8}"
+            f"{cost}{estimate}"
+        )
+        for options, counts in stage["choices"].items():
+            total = sum(counts.values())
+            shares = ", ".join(
+                f"{value} {count / total:.0%}"
+                for value, count in sorted(
+                    counts.items(), key=lambda entry: entry[1], reverse=True
+                )
+            )
+            lines.append(f"    {options}: {shares}")
+    for name in ("read", "save"):
+        if plan[name] is not None:
+            lines.append(f"{name:<32}{'':>26}{'':>9}{plan[name]:>10.1f}")
+    if plan["uncalibrated"]:
+        lines.append(
+            "Not applied in the calibration run, not in the estimate: "
+            + ", ".join(plan["uncalibrated"])
+        )
+    lines.append(
+        f"Estimated {plan['cpu_seconds']:.1f} s of work, "
+        f"{plan['wall_seconds']:.1f} s with {plan['workers']} workers"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,246 @@
+import glob
+import json
+import os
+import threading
+import time
+import tracemalloc
+from array import array
+from contextlib import ExitStack, contextmanager
+from multiprocessing.util import Finalize
+from os.path import join
+
+import numpy as np
+from tqdm import tqdm
+
+from .registry import registered_classes
+
+# Folder of the report and of the part files of workers, None when timing is off
+_folder = None
+_part = False
+# Whether sections also record the peak of the memory they allocate
+_memory = False
+_local = threading.local()
+_lock = threading.Lock()
+# tracemalloc has one peak for the whole process, sections that record it run one at a time
+_memory_lock = threading.RLock()
+# Samples of every section by kind ("time" seconds, "peak" bytes, "pixels" of the input) and name
+_samples = {"time": {}, "peak": {}, "pixels": {}}
+_names = {}
+
+
+def configure(folder: str | None, part: bool = False, memory: bool = False) -> None:
+    """Turns timing on and clears the samples, folder None turns it off.
+
+    Args:
+        folder (str): Folder of the report.
+        part (bool, optional): This is a process pool worker, its samples are written to a part
+            file of folder when it exits. Defaults to False.
+        memory (bool, optional): Also record the peak memory every section allocates with
+            tracemalloc. Sections then run one at a time. Defaults to False.
+    """
+    global _folder, _part, _memory
+    with _lock:
+        for samples in _samples.values():
+            samples.clear()
+    _folder = folder
+    _part = part
+    _memory = folder is not None and memory
+    if _memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if folder is not None and part:
+        # Workers of a process pool never return to the caller, save their samples on exit
+        Finalize(None, _save_part, exitpriority=10)
+
+
+def enabled() -> bool:
+    return _folder is not None
+
+
+def _name(section) -> str:
+    if isinstance(section, str):
+        return section
+    cls = type(section)
+    if cls not in _names:
+        keys = [key for key, value in registered_classes.items() if value is cls]
+        _names[cls] = keys[0] if keys else cls.__name__
+    return _names[cls]
+
+
+def _record(kind: str, name: str, value: float) -> None:
+    samples = _samples[kind].get(name)
+    if samples is None:
+        samples = _samples[kind][name] = array("d")
+    samples.append(value)
+
+
+@contextmanager
+def timed(section, pixels: int = 0):
+    """Times the with block when timing is on.
+
+    Sections inside another one are named by their path, so the degradations of an and/or
+    stage are reported as and/compress next to the and stage itself, which includes them.
+
+    Args:
+        section (str | object): Name of the section, or a degradation, named by its registered type.
+        pixels (int, optional): Pixels of the image the section works on, memory is reported per
+            megapixel of it. Defaults to 0, unknown.
+    """
+    if _folder is None:
+        yield
+        return
+    path = getattr(_local, "path", None)
+    if path is None:
+        path = _local.path = []
+    path.append(_name(section))
+    name = "/".join(path)
+    with ExitStack() as stack:
+        if _memory:
+            stack.enter_context(_memory_lock)
+            stack.enter_context(_peak(name, pixels))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            path.pop()
+            with _lock:
+                _record("time", name, elapsed)
+
+
+@contextmanager
+def _peak(name: str, pixels: int):
+    """Records the peak of the memory allocated in the with block above what was allocated before it."""
+    # [allocated at the start, highest peak seen] of every open section of the thread
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    current, peak = tracemalloc.get_traced_memory()
+    if frames:
+        # The peak is reset for this section, the enclosing one keeps what it reached so far
+        frames[-1][1] = max(frames[-1][1], peak)
+    tracemalloc.reset_peak()
+    frames.append([current, current])
+    try:
+        yield
+    finally:
+        start, seen = frames.pop()
+        highest = max(seen, tracemalloc.get_traced_memory()[1])
+        if frames:
+            frames[-1][1] = max(frames[-1][1], highest)
+        with _lock:
+            _record("peak", name, highest - start)
+            _record("pixels", name, pixels)
+
+
+def _save_part() -> None:
+    with _lock:
+        if not _samples["time"]:
+            return
+        np.savez(
+            join(_folder, f"profile.part-{os.getpid()}.npz"),
+            **{
+                f"{kind}|{name}": np.frombuffer(samples)
+                for kind, named in _samples.items()
+                for name, samples in named.items()
+            },
+        )
+
+
+def _merged() -> dict:
+    """Returns the samples of this process and of the part files of the workers, removing the parts."""
+    merged = {
+        kind: {name: [np.frombuffer(samples)] for name, samples in named.items()}
+        for kind, named in _samples.items()
+    }
+    for part in glob.glob(join(glob.escape(_folder), "profile.part-*.npz")):
+        with np.load(part) as archive:
+            for key in archive.files:
+                kind, name = key.split("|", 1)
+                merged[kind].setdefault(name, []).append(archive[key])
+        os.remove(part)
+    return {
+        kind: {name: np.concatenate(samples) for name, samples in named.items()}
+        for kind, named in merged.items()
+    }
+
+
+def _memory_sections(peaks: dict, pixels: dict) -> dict:
+    sections = {}
+    for name in sorted(peaks):
+        peak = peaks[name] / 1024 / 1024
+        megapixels = pixels[name] / 1e6
+        known = megapixels > 0
+        per_megapixel = peak[known] / megapixels[known]
+        sections[name] = {
+            "count": len(peak),
+            "p95_mb": float(np.percentile(peak, 95)),
+            "max_mb": float(peak.max()),
+            "max_mb_per_mp": float(per_megapixel.max()) if known.any() else None,
+            "mean_mb_per_mp": float(per_megapixel.mean()) if known.any() else None,
+        }
+    return sections
+
+
+def report(wall: float) -> None:
+    """Prints the time spent in every section and writes it to profile.json in the folder.
+
+    Args:
+        wall (float): Wall time of the run in seconds. The share of a section is its total
+            time over it, with several workers the shares add up to more than 1.
+    """
+    if _folder is None:
+        return
+    with _lock:
+        merged = _merged()
+    sections = {}
+    for name in sorted(merged["time"]):
+        samples = merged["time"][name]
+        sections[name] = {
+            "count": len(samples),
+            "total": float(samples.sum()),
+            "p50": float(np.percentile(samples, 50)),
+            "p95": float(np.percentile(samples, 95)),
+            "max": float(samples.max()),
+            "share": float(samples.sum() / wall) if wall else 0.0,
+        }
+    profile = {"wall": wall, "sections": sections}
+    if merged["peak"]:
+        profile["memory"] = _memory_sections(merged["peak"], merged["pixels"])
+    with open(join(_folder, "profile.json"), "w") as file:
+        json.dump(profile, file, indent=2)
+    lines = [
+        f"{'section':<32}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'share':>8}"
+    ]
+    for name, section in sorted(
+        sections.items(), key=lambda entry: entry[1]["total"], reverse=True
+    ):
+        lines.append(
+            f"{name:<32}{section['count']:>8}{section['total']:>10.2f}"
+            f"{section['p50'] * 1000:>10.2f}{section['p95'] * 1000:>10.2f}"
+            f"{section['max'] * 1000:>10.2f}{section['share']:>8.1%}"
+        )
+    tqdm.write(f"Profile - wall time {wall:.2f} s\n" + "\n".join(lines))
+    if "memory" in profile:
+        tqdm.write(_format_memory(profile["memory"]))
+
+
+def _format_memory(memory: dict) -> str:
+    """Returns the memory of every section as a table, the most per megapixel first."""
+    lines = [
+        f"{'section':<32}{'count':>8}{'p95 MB':>10}{'max MB':>10}{'max MB/MP':>11}{'mean MB/MP':>12}"
+    ]
+    for name, section in sorted(
+        memory.items(),
+        key=lambda entry: entry[1]["max_mb_per_mp"] or -1,
+        reverse=True,
+    ):
+        per_megapixel = (
+            f"{section['max_mb_per_mp']:>11.1f}{section['mean_mb_per_mp']:>12.1f}"
+            if section["max_mb_per_mp"] is not None
+            else f"{'-':>11}{'-':>12}"
+        )
+        lines.append(
+            f"{name:<32}{section['count']:>8}{section['p95_mb']:>10.1f}"
+            f"{section['max_mb']:>10.1f}{per_megapixel}"
+        )
+    return "Profile - peak memory allocated by each section\n" + "\n".join(lines)
@@ -0,0 +1,174 @@
+import glob
+import os
+import threading
+import uuid
+from multiprocessing.util import Finalize
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ImageScores(NamedTuple):
+    """What is known about one input image, independent of the thresholds of a run.
+
+    Attributes:
+        height (int): Height of the decoded image.
+        width (int): Width of the decoded image.
+        channels (int): Channels of the decoded image.
+        laplace (numpy.float32): laplace_score of the image, NaN when unknown.
+        gray (int): 1 if color_or_gray makes the image gray, 0 if not, -1 when unknown.
+        tile_size (int): Tile size of tile_scores and tile_wb, 0 when they are unknown.
+        tile_scores (numpy.ndarray): laplace_score of every grid tile, (rows, columns).
+        tile_wb (numpy.ndarray): Whether every grid tile is pure white or pure black, (rows, columns).
+    """
+
+    height: int
+    width: int
+    channels: int
+    laplace: np.float32 = np.float32("nan")
+    gray: int = -1
+    tile_size: int = 0
+    tile_scores: np.ndarray = np.zeros((0, 0))
+    tile_wb: np.ndarray = np.zeros((0, 0), dtype=bool)
+
+
+class QualityIndex:
+    """Sidecar index of per-image scores, so later runs skip rejected images without decoding them.
+
+    Entries are keyed by the filename relative to the input folder and are only used while
+    the modification time and size of the file are unchanged. Scores depend on how images
+    are decoded, an index written with another variant of the settings starts empty.
+
+    The workers of a process pool write their new entries to <path>.part-<pid>-<token>.npz
+    when they exit, the main process merges them into the index with save().
+
+    Args:
+        path (str): Path of the .npz index.
+        variant (str): Decoding settings the scores were computed with.
+        part (bool, optional): Save new entries to a part file of this process. Defaults to False.
+    """
+
+    def __init__(self, path: str, variant: str, part: bool = False):
+        self.path = path
+        self.variant = variant
+        self.part = part
+        self.lock = threading.Lock()
+        self.records = self.__load(path) if os.path.exists(path) else {}
+        self.updated = {}
+        self.finalizer = None
+
+    def __load(self, path: str) -> dict:
+        try:
+            with np.load(path) as archive:
+                data = dict(archive)
+        except (OSError, ValueError):
+            return {}
+        if str(data["variant"]) != self.variant:
+            return {}
+        records = {}
+        tile_ends = np.cumsum(data["tile_rows"] * data["tile_cols"])
+        tile_starts = tile_ends - data["tile_rows"] * data["tile_cols"]
+        for i, name in enumerate(data["names"]):
+            shape = (int(data["tile_rows"][i]), int(data["tile_cols"][i]))
+            tiles = slice(tile_starts[i], tile_ends[i])
+            scores = ImageScores(
+                int(data["height"][i]),
+                int(data["width"][i]),
+                int(data["channels"][i]),
+                data["laplace"][i],
+                int(data["gray"][i]),
+                int(data["tile_size"][i]),
+                data["tile_scores"][tiles].reshape(shape),
+                data["tile_wb"][tiles].reshape(shape),
+            )
+            records[str(name)] = (int(data["mtime"][i]), int(data["size"][i]), scores)
+        return records
+
+    def lookup(self, folder: str, name: str) -> ImageScores | None:
+        """Returns the scores of an input file, None when it is unknown or has changed."""
+        record = self.updated.get(name) or self.records.get(name)
+        if record is None:
+            return None
+        try:
+            stat = os.stat(os.path.join(folder, name))
+        except OSError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != record[:2]:
+            return None
+        return record[2]
+
+    def update(self, folder: str, name: str, img: np.ndarray, **fields) -> None:
+        """Stores scores of a decoded input image, fields are ImageScores attributes."""
+        stat = os.stat(os.path.join(folder, name))
+        known = self.lookup(folder, name)
+        if known is None:
+            channels = img.shape[2] if img.ndim == 3 else 1
+            known = ImageScores(img.shape[0], img.shape[1], channels)
+        with self.lock:
+            self.updated[name] = (
+                stat.st_mtime_ns,
+                stat.st_size,
+                known._replace(**fields),
+            )
+            if self.part and self.finalizer is None:
+                # Workers of a process pool never return to the caller, save their part on exit
+                self.finalizer = Finalize(
+                    self, QualityIndex.save, args=(self,), exitpriority=10
+                )
+
+    def save(self) -> None:
+        """Writes new entries, to the part file of this process or merged with every part into the index."""
+        with self.lock:
+            if self.part:
+                if self.updated:
+                    token = uuid.uuid4().hex[:8]
+                    self.__write(
+                        f"{self.path}.part-{os.getpid()}-{token}.npz", self.updated
+                    )
+                    self.updated = {}
+                return
+            parts = glob.glob(f"{glob.escape(self.path)}.part-*.npz")
+            for part in parts:
+                self.records.update(self.__load(part))
+            self.records.update(self.updated)
+            self.updated = {}
+            if parts or os.path.exists(self.path) or self.records:
+                self.__write(self.path, self.records)
+            for part in parts:
+                os.remove(part)
+
+    def __write(self, path: str, records: dict) -> None:
+        names = list(records)
+        entries = [records[name] for name in names]
+        scores = [entry[2] for entry in entries]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez(
+                file,
+                variant=self.variant,
+                names=np.array(names, dtype=str),
+                mtime=np.array([entry[0] for entry in entries], dtype=np.int64),
+                size=np.array([entry[1] for entry in entries], dtype=np.int64),
+                height=np.array([s.height for s in scores], dtype=np.int32),
+                width=np.array([s.width for s in scores], dtype=np.int32),
+                channels=np.array([s.channels for s in scores], dtype=np.int32),
+                laplace=np.array([s.laplace for s in scores], dtype=np.float32),
+                gray=np.array([s.gray for s in scores], dtype=np.int8),
+                tile_size=np.array([s.tile_size for s in scores], dtype=np.int32),
+                tile_rows=np.array(
+                    [s.tile_scores.shape[0] for s in scores], dtype=np.int64
+                ),
+                tile_cols=np.array(
+                    [s.tile_scores.shape[1] for s in scores], dtype=np.int64
+                ),
+                tile_scores=np.concatenate(
+                    [s.tile_scores.ravel() for s in scores] or [np.zeros(0)]
+                ),
+                tile_wb=np.concatenate(
+                    [s.tile_wb.ravel() for s in scores] or [np.zeros(0, dtype=bool)]
+                ),
+            )
+        os.replace(temporary, path)
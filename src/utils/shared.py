@@ -0,0 +1,42 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+
+class SharedImage(NamedTuple):
+    """Picklable handle of a decoded image placed in shared memory.
+
+    Attributes:
+        name (str): Name of the shared memory block.
+        shape (tuple of int): Shape of the image.
+        dtype (str): Data type of the image.
+    """
+
+    name: str
+    shape: tuple
+    dtype: str
+
+    @classmethod
+    def create(cls, img: np.ndarray) -> tuple["SharedImage", SharedMemory]:
+        """Copies an image into a new shared memory block.
+
+        The caller owns the returned block and must close and unlink it once every
+        worker is done with the image.
+        """
+        memory = SharedMemory(create=True, size=max(1, img.nbytes))
+        np.ndarray(img.shape, img.dtype, buffer=memory.buf)[...] = img
+        return cls(memory.name, img.shape, img.dtype.str), memory
+
+    def apply(self, function: Callable, *args):
+        """Calls function(img, *args) with the image backed by the shared memory block, without copying.
+
+        The function must not keep a reference to the image, the block is closed when it returns.
+        """
+        memory = SharedMemory(name=self.name)
+        try:
+            return function(
+                np.ndarray(self.shape, np.dtype(self.dtype), buffer=memory.buf), *args
+            )
+        finally:
+            memory.close()
@@ -0,0 +1,114 @@
+import logging
+import threading
+from queue import Queue
+from typing import Callable, Iterable
+
+from tqdm import tqdm
+
+_STOP = object()
+
+
+class StagePipeline:
+    """Runs items through a chain of thread pools connected by bounded queues.
+
+    Every stage is a function that takes one item and returns an iterable of items for
+    the next stage (or None to drop the item). The return value of the last stage is ignored.
+    The progress bar counts input items whose results have all left the last stage.
+
+    Args:
+        stages (list of tuple): (name, function, num_workers) for every stage, in order.
+        queue_size (int): Maximum number of items waiting in front of each stage.
+
+    Attributes:
+        queues (list of Queue): Input queue of every stage.
+        depth_sum (list of int): Sum of the sampled queue depths, used for the final report.
+        samples (int): Number of queue depth samples taken.
+    """
+
+    def __init__(self, stages: list[tuple[str, Callable, int]], queue_size: int):
+        self.names = [name for name, _, _ in stages]
+        self.functions = [function for _, function, _ in stages]
+        self.workers = [max(1, int(workers)) for _, _, workers in stages]
+        self.queues = [Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self.alive = list(self.workers)
+        self.lock = threading.Lock()
+        self.depth_sum = [0] * len(stages)
+        self.samples = 0
+        self.pbar = None
+
+    def queue_sizes(self) -> dict[str, int]:
+        """Returns the number of items waiting in front of every stage."""
+        return {name: queue.qsize() for name, queue in zip(self.names, self.queues)}
+
+    def __sample(self) -> None:
+        sizes = self.queue_sizes()
+        with self.lock:
+            self.samples += 1
+            for index, size in enumerate(sizes.values()):
+                self.depth_sum[index] += size
+            self.pbar.set_postfix(sizes, refresh=False)
+            self.pbar.update(1)
+
+    def __finish(self, pending: list, count: int) -> None:
+        """Adds count items to the unfinished items of an input item, which is done at zero."""
+        with self.lock:
+            pending[0] += count
+            done = pending[0] == 0
+        if done:
+            self.__sample()
+
+    def __worker(self, index: int) -> None:
+        function = self.functions[index]
+        queue = self.queues[index]
+        last = index == len(self.functions) - 1
+        while True:
+            entry = queue.get()
+            if entry is _STOP:
+                break
+            # Unfinished items derived from the same input item, shared by all of them
+            pending, item = entry
+            try:
+                result = function(item)
+                if not last and result is not None:
+                    for next_item in result:
+                        self.__finish(pending, 1)
+                        self.queues[index + 1].put((pending, next_item))
+            except Exception as e:
+                logging.error("Stage %s failed: %s", self.names[index], str(e))
+            self.__finish(pending, -1)
+        with self.lock:
+            self.alive[index] -= 1
+            done = self.alive[index] == 0
+        if done and not last:
+            for _ in range(self.workers[index + 1]):
+                self.queues[index + 1].put(_STOP)
+
+    def run(self, items: Iterable, total: int | None = None) -> None:
+        """Feeds the items into the first stage and waits until every stage is drained."""
+        self.pbar = tqdm(total=total)
+        threads = []
+        for index, workers in enumerate(self.workers):
+            for _ in range(workers):
+                thread = threading.Thread(
+                    target=self.__worker, args=(index,), daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+        for item in items:
+            self.queues[0].put(([1], item))
+        for _ in range(self.workers[0]):
+            self.queues[0].put(_STOP)
+        for thread in threads:
+            thread.join()
+        self.pbar.close()
+        self.report()
+
+    def report(self) -> None:
+        """Prints the average number of items that waited in front of every stage."""
+        if not self.samples:
+            return
+        report = ", ".join(
+            f"{name}: {depth / self.samples:.2f}"
+            for name, depth in zip(self.names, self.depth_sum)
+        )
+        tqdm.write(f"Average queue depth - {report}")
@@ -0,0 +1,159 @@
+import io
+import itertools
+import logging
+import os
+import tarfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from multiprocessing.util import Finalize
+from os.path import join
+from queue import Queue
+
+_STOP = object()
+
+
+def sample_key(name: str) -> str:
+    """Returns name as a WebDataset key, with the dots of its basename percent encoded.
+
+    WebDataset splits a member name into key and suffix at the first dot of the basename,
+    so a dot of the key would move part of it into the suffix. Folders may keep their dots,
+    and urllib.parse.unquote gives the name back.
+    """
+    folder, base = os.path.split(name)
+    return join(folder, base.replace("%", "%25").replace(".", "%2E"))
+
+
+class TarShardWriter:
+    """Writes samples into size capped tar shards, WebDataset style.
+
+    Every sample is a group of members named <key>.<suffix> that are written next to each
+    other into the same shard. Each writer thread owns one open shard, samples are handed
+    to the writers round robin through bounded queues, so any number of threads can append
+    at once. When a shard is closed an index with the offset and size of every member is
+    written next to it as <shard>.index.
+
+    Shards are named shard-<pid>-<random token>-<number>.tar, so the workers of a process pool can write
+    into the same folder. Writers start on the first sample and are closed by close(), or
+    when the process exits.
+
+    Args:
+        folder (str): Folder of the shards.
+        shard_size (int, optional): Maximum size of a shard in MB. Defaults to 1024.
+        writers (int, optional): Number of shards written at the same time. Defaults to 1.
+        queue_size (int, optional): Maximum number of samples waiting for every writer. Defaults to 16.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        shard_size: int = 1024,
+        writers: int = 1,
+        queue_size: int = 16,
+    ):
+        self.folder = folder
+        self.shard_size = shard_size * 1024 * 1024
+        self.writers = max(1, writers)
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.queues = None
+        self.threads = []
+        self.numbers = itertools.count()
+        # Pids are reused, the token keeps a later run from overwriting shards of an earlier one
+        self.token = uuid.uuid4().hex[:8]
+        self.turn = itertools.count()
+        self.finalizer = None
+
+    def __start(self) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        self.queues = [Queue(maxsize=self.queue_size) for _ in range(self.writers)]
+        for queue in self.queues:
+            thread = threading.Thread(target=self.__writer, args=(queue,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        # Workers of a process pool never return to the caller, close their shards on exit
+        self.finalizer = Finalize(
+            self, TarShardWriter.close, args=(self,), exitpriority=10
+        )
+
+    def write(self, key: str, members: dict[str, bytes]) -> Future:
+        """Queues one sample and returns a future that completes once it is in a shard.
+
+        Args:
+            key (str): Key of the sample, members are stored as <sample_key(key)>.<suffix>.
+            members (dict): Content of every member by suffix, for example {"lq.png": ...}.
+        """
+        with self.lock:
+            if self.queues is None:
+                self.__start()
+            queue = self.queues[next(self.turn) % self.writers]
+        future = Future()
+        queue.put((sample_key(key), members, future))
+        return future
+
+    def __open(self) -> tuple[tarfile.TarFile, str, list]:
+        name = f"shard-{os.getpid()}-{self.token}-{next(self.numbers):06d}.tar"
+        path = join(self.folder, name)
+        return tarfile.open(path, "w", format=tarfile.PAX_FORMAT), path, []
+
+    @staticmethod
+    def __close(tar: tarfile.TarFile, path: str, index: list) -> None:
+        tar.close()
+        with open(f"{path}.index", "w") as file:
+            file.writelines(
+                f"{member}\t{offset}\t{size}\n" for member, offset, size in index
+            )
+
+    def __writer(self, queue: Queue) -> None:
+        tar, path, index = None, None, []
+        while True:
+            sample = queue.get()
+            if sample is _STOP:
+                break
+            key, members, future = sample
+            try:
+                size = sum(len(data) for data in members.values())
+                if tar is not None and tar.offset + size > self.shard_size:
+                    self.__close(tar, path, index)
+                    tar = None
+                if tar is None:
+                    tar, path, index = self.__open()
+                for suffix, data in members.items():
+                    info = tarfile.TarInfo(f"{key}.{suffix}")
+                    info.size = len(data)
+                    info.mtime = int(time.time())
+                    tar.addfile(info, io.BytesIO(data))
+                    # The data ends at the current offset minus the padding to 512 bytes
+                    offset = tar.offset - (len(data) + 511) // 512 * 512
+                    index.append((info.name, offset, len(data)))
+                tar.fileobj.flush()
+                future.set_result(None)
+            except Exception as e:
+                logging.error("Writing %s to %s failed: %s", key, path, str(e))
+                future.set_exception(e)
+        if tar is not None:
+            self.__close(tar, path, index)
+
+    def close(self) -> None:
+        """Flushes every queued sample and closes the open shards."""
+        with self.lock:
+            queues, self.queues = self.queues, None
+        if queues is None:
+            return
+        for queue in queues:
+            queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+
+def merge_indexes(folder: str, path: str) -> None:
+    """Writes one index of every shard in folder, with the shard name in the first column."""
+    with open(path, "w") as out:
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".tar.index"):
+                continue
+            shard = name[: -len(".index")]
+            with open(join(folder, name)) as file:
+                out.writelines(f"{shard}\t{line}" for line in file)
@@ -0,0 +1,51 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.util import Finalize
+from typing import Callable
+
+
+class AsyncWriter:
+    """Runs save calls on a thread pool, so degradation workers do not wait for encoding.
+
+    At most queue_size saves wait at once, a worker that gets ahead of the writers blocks
+    until one of them finishes. Failed saves are logged. The pool is drained by close(),
+    or when the process exits.
+
+    Args:
+        threads (int): Number of writer threads.
+        queue_size (int): Maximum number of saves waiting for a writer.
+    """
+
+    def __init__(self, threads: int, queue_size: int):
+        self.threads = max(1, threads)
+        self.slots = threading.BoundedSemaphore(max(1, queue_size))
+        self.lock = threading.Lock()
+        self.pool = None
+        self.finalizer = None
+
+    def submit(self, function: Callable, *args) -> Future:
+        """Queues function(*args) and returns its future."""
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(self.threads)
+                # Workers of a process pool never return to the caller, drain their writers on exit
+                self.finalizer = Finalize(
+                    self, AsyncWriter.close, args=(self,), exitpriority=20
+                )
+        self.slots.acquire()
+        future = self.pool.submit(function, *args)
+        future.add_done_callback(self.__done)
+        return future
+
+    def __done(self, future: Future) -> None:
+        self.slots.release()
+        if future.exception() is not None:
+            logging.error("Saving failed: %s", str(future.exception()))
+
+    def close(self) -> None:
+        """Waits for every queued save."""
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
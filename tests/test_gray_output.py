@@ -0,0 +1,31 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+from src.process.utils import img2gray, lq_hq2grays
+from src.utils.encode import ImageWriter, to_uint8
+from src.utils.pipeline import FLOAT32, convert
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float16])
+def test_img2gray_of_stage_dtypes(dtype):
+    # compress, canny and median blur return uint8, dtype = "float16" keeps float16
+    img = convert(
+        np.random.default_rng(0).random((16, 16, 3), dtype=np.float32), (dtype,)
+    )
+    expected = img2gray(convert(img, FLOAT32))
+    np.testing.assert_array_equal(img2gray(img), expected)
+    lq, hq = lq_hq2grays(
+        img, img.astype(np.float32) / (255 if dtype == np.uint8 else 1)
+    )
+    assert lq.shape == hq.shape == (16, 16)
+
+
+def test_ppm_of_gray_image():
+    img = np.random.default_rng(0).random((16, 24), dtype=np.float32)
+    data = ImageWriter("ppm").encode(img)
+    assert data.startswith(b"P6")
+    decoded = cv.imdecode(np.frombuffer(data, np.uint8), cv.IMREAD_UNCHANGED)
+    assert decoded.shape == (16, 24, 3)
+    for channel in range(3):
+        np.testing.assert_array_equal(decoded[..., channel], to_uint8(img))
@@ -0,0 +1,53 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from pepeline import save
+
+from src.logic.process import ImgProcess
+from src.utils.image_header import read_png_header
+
+
+def insert_chunk(path: str, chunk_type: bytes, data: bytes) -> None:
+    """Inserts a chunk right after IHDR, where tRNS and color management chunks go."""
+    with open(path, "rb") as file:
+        png = file.read()
+    chunk = struct.pack(">I", len(data)) + chunk_type + data
+    chunk += struct.pack(">I", zlib.crc32(chunk_type + data))
+    with open(path, "wb") as file:
+        file.write(png[:33] + chunk + png[33:])
+
+
+@pytest.mark.parametrize(
+    "chunk",
+    [
+        None,
+        (b"tRNS", struct.pack(">HHH", 0, 0, 0)),
+        (b"gAMA", struct.pack(">I", 45455)),
+        (b"sBIT", bytes([5, 6, 5])),
+    ],
+)
+def test_hq_link_of_png_chunks(tmp_path, chunk):
+    source = tmp_path / "in"
+    source.mkdir()
+    path = str(source / "image.png")
+    img = (np.random.default_rng(0).random((32, 32, 3)) * 255).astype(np.uint8)
+    save(img, path)
+    if chunk:
+        insert_chunk(path, *chunk)
+        assert chunk[0].decode() in read_png_header(path).chunks
+    output = tmp_path / "out"
+    ImgProcess(
+        {
+            "input": str(source),
+            "output": str(output),
+            "degradation": [],
+            "seed": 0,
+            "map_type": "for",
+            "hq_link": "hardlink",
+        }
+    ).run()
+    linked = os.path.samefile(path, output / "hq" / "0.png")
+    assert linked == (chunk is None)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from pepeline import save
+
+from src.logic.process import ImgProcess
+from src.utils.manifest import Manifest
+
+
+def make_config(tmp_path, **options) -> dict:
+    source = tmp_path / "in"
+    if not source.exists():
+        source.mkdir()
+        rng = np.random.default_rng(0)
+        for index in range(3):
+            save(
+                rng.random((16, 16, 3), dtype=np.float32), str(source / f"{index}.png")
+            )
+    return {
+        "input": str(source),
+        "output": str(tmp_path / "out"),
+        "degradation": [{"type": "blur", "filter": ["box"], "kernel": [1, 2]}],
+        "seed": 0,
+        "map_type": "for",
+        "resume": True,
+        **options,
+    }
+
+
+def test_resume_with_same_settings(tmp_path):
+    ImgProcess(make_config(tmp_path)).run()
+    manifest = Manifest.load(str(tmp_path / "out" / "manifest.npz"))
+    assert manifest.fingerprint["seed"] == 0
+    # The worker count does not change the results
+    assert len(ImgProcess(make_config(tmp_path, num_workers=2)).manifest) == 0
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"seed": 1},
+        {"size": 2},
+        {"shuffle_dataset": True},
+        {"tile": {"size": 8}},
+        {"degradation": [{"type": "blur", "filter": ["gauss"], "kernel": [1, 2]}]},
+    ],
+)
+def test_resume_with_changed_settings(tmp_path, options):
+    ImgProcess(make_config(tmp_path)).run()
+    with pytest.raises(ValueError, match="other settings"):
+        ImgProcess(make_config(tmp_path, **options))
+    ImgProcess(make_config(tmp_path, resume_override=True, **options))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from pepeline import save
+
+from src.logic.process import ImgProcess
+from src.utils.journal import Journal
+from src.utils.registry import register_class
+
+
+@register_class("test_fail_bright")
+class FailBright:
+    """Raises on bright tiles, so an image fails after some of its tiles are done."""
+
+    def __init__(self, options: dict):
+        pass
+
+    def run(self, lq, hq, rng):
+        if lq.mean() > 0.7:
+            raise ValueError("bright tile")
+        return lq, hq
+
+
+@pytest.mark.parametrize("map_type", ["for", "thread", "stream"])
+def test_tiles_before_a_failure_are_saved(tmp_path, map_type):
+    source = tmp_path / "in"
+    source.mkdir()
+    img = np.full((32, 32, 3), 0.2, dtype=np.float32)
+    # Tiles are made row by row, (1, 0) fails after (0, 0) and (0, 1)
+    img[16:, :16] = 0.9
+    save(img, str(source / "0.png"))
+    output = tmp_path / "out"
+    ImgProcess(
+        {
+            "input": str(source),
+            "output": str(output),
+            "degradation": [{"type": "test_fail_bright"}],
+            "seed": 0,
+            "map_type": map_type,
+            "resume": True,
+            "tile": {"size": 16},
+        }
+    ).run()
+    assert sorted(path.name for path in (output / "lq").iterdir()) == [
+        "0_0_0.png",
+        "0_0_1.png",
+    ]
+    # The image failed, a resumed run tries it again
+    assert len(Journal(str(output / "journal.bin")).completed()) == 0
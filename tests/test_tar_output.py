@@ -0,0 +1,28 @@
+import re
+import tarfile
+from urllib.parse import unquote
+
+from src.utils.tar_output import TarShardWriter, sample_key
+
+# How WebDataset splits a member name into the key of its sample and the suffix
+WEBDATASET_NAME = re.compile(r"^((?:.*/|)[^.]+)[.]([^/]*)$")
+
+
+def test_dotted_names_keep_their_key(tmp_path):
+    names = ["a.b", "a_b", "v1.2.final_0", "sub.dir/x.y", "100%.b"]
+    writer = TarShardWriter(str(tmp_path))
+    for name in names:
+        writer.write(name, {"lq.png": b"lq", "hq.png": b"hq"})
+    writer.close()
+    (shard,) = tmp_path.glob("*.tar")
+    samples = {}
+    with tarfile.open(shard) as tar:
+        for member in tar.getnames():
+            key, suffix = WEBDATASET_NAME.match(member).groups()
+            samples.setdefault(unquote(key), set()).add(suffix)
+    assert samples == {name: {"lq.png", "hq.png"} for name in names}
+
+
+def test_sample_key_without_dots_is_unchanged():
+    assert sample_key("12_3") == "12_3"
+    assert sample_key("sub/12") == "sub/12"
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from pepeline import save
+
+from src.logic.process import ImgProcess
+from src.process.utils import tile_mask
+from src.utils.journal import Journal
+
+
+def noise_image(height: int, width: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).random((height, width, 3), dtype=np.float32)
+
+
+@pytest.mark.parametrize(
+    "mean_min, no_wb", [(0.02, False), (None, True), (None, False)]
+)
+@pytest.mark.parametrize("shape", [(40, 40), (40, 100), (100, 40)])
+def test_tile_mask_of_image_smaller_than_tile(shape, mean_min, no_wb):
+    mask = tile_mask(noise_image(*shape), 64, mean_min, no_wb)
+    assert mask.shape == (shape[0] // 64, shape[1] // 64)
+    assert not mask.any()
+
+
+@pytest.mark.parametrize(
+    "map_type, parallel",
+    [("thread", True), ("thread", False), ("stream", False), ("for", False)],
+)
+def test_run_with_image_smaller_than_tile(tmp_path, map_type, parallel):
+    source = tmp_path / "in"
+    source.mkdir()
+    save(noise_image(40, 40), str(source / "small.png"))
+    save(noise_image(128, 128, 1), str(source / "large.png"))
+    output = tmp_path / "out"
+    ImgProcess(
+        {
+            "input": str(source),
+            "output": str(output),
+            "degradation": [],
+            "seed": 0,
+            "map_type": map_type,
+            "num_workers": 2,
+            "resume": True,
+            "laplace_filter": 0.001,
+            "tile": {"size": 64, "parallel": parallel},
+        }
+    ).run()
+    # The small image gives no tiles and is complete, so a resumed run skips it
+    assert len(Journal(str(output / "journal.bin")).completed()) == 2
+    assert len(list((output / "lq").iterdir())) == 4